@@ -1,114 +1,652 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-from resume_parser import parse_resume
-from skill_matcher import match_skills
-from bias_detector import check_bias
-from candidate_ranker import rank_candidates
+from resume_parser import parse_resume, open_upload
+from bias_detector import get_bias_report, invalidate_bias_report, job_description_key
 from interview_questions import generate_interview_questions
-from culture_fit import assess_culture_fit
-from salary_benchmark import benchmark_salary, extract_salary_info_from_resume
-from scheduler import schedule_interview, get_available_slots, cancel_interview, get_scheduled_interviews
-from offer_letter import generate_offer_letter, generate_quick_offer
-import os
-import tempfile
+from salary_benchmark import benchmark_salary, benchmark_salaries, get_salary_tables
+from scheduler import (
+    schedule_interview, get_available_slots, cancel_interview, get_scheduled_interviews,
+    register_resource, list_resources, schedule_bulk
+)
+from offer_letter import (
+    generate_offer_letter, generate_quick_offer, generate_offer_batch, get_template, list_templates,
+    stream_ndjson, stream_zip
+)
+from candidate_ranker import summarize_rankings
+from pipeline import screen_batch, analyze_resume, iter_parsed
+from prescreen import prescreen, select_for_escalation
+from config import PRESCREEN_MAX_RESUMES, OFFER_BATCH_MAX, SALARY_BATCH_MAX, RESPONSE_TIMINGS, RANK_WEIGHTS
+from candidate_store import (
+    save_upload_analysis, requisition_key_for, list_candidates, get_candidate, rerank_candidates,
+    semantic_search, backfill_embeddings
+)
+from embedding_index import get_index_stats
+from llm_client import LLMError, LLMOverloaded
+from llm_dispatcher import QueueFull, get_dispatcher, get_dispatcher_stats, set_dispatch
+from job_queue import submit_batch_job, get_batch_job_status, start_workers
+from llm_cache import get_cache_stats, clear_cache
+from resume_features import get_feature_cache_stats
+from structured_output import get_structured_output_stats
+from metrics import (
+    render_metrics, register_collector, start_trace, current_trace, record_stage, in_context, inc, observe
+)
+from requisition import create_requisition, get_requisition
+from contextlib import ExitStack
+import math
+import queue
+import sqlite3
+import threading
+import time
 import json
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-@app.route("/upload", methods=["POST"])
-def upload_resume():
-    file = request.files["resume"]
-    job_desc = request.form["job_desc"]
-    company_values = request.form.get("company_values", "")
-    job_location = request.form.get("location", "")
+# Endpoints that call the model, with the dispatcher priority class their model requests get
+MODEL_ENDPOINTS = {
+    'upload_resume': 'interactive',
+    'upload_resume_stream': 'interactive',
+    'create_job_requisition': 'interactive',
+    'get_bias_analysis': 'interactive',
+    'get_interview_questions': 'interactive',
+    'semantic_candidate_search': 'interactive',
+    'batch_process': 'batch',
+    'backfill_candidate_embeddings': 'background'
+}
+
+
+@app.before_request
+def begin_request_trace():
+    """Start timing the request and collecting its stage timings and model usage"""
+    g.request_started = time.perf_counter()
+    start_trace()
+
 
-    # Use temporary file that auto-deletes
-    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
-        temp_path = temp_file.name
-        file.save(temp_path)
+@app.before_request
+def admit_model_request():
+    """Tag model requests with their priority and requisition, and turn them away early when the queue is full"""
+    priority = MODEL_ENDPOINTS.get(request.endpoint)
+    if not priority:
+        return None
+    
+    # Fair-queuing flow: the requisition, or the job description the request screens against
+    values = request.get_json(silent=True) if request.is_json else request.form
+    if not isinstance(values, dict):
+        values = {}
+    requisition_id, job_desc = values.get('requisition_id'), values.get('job_desc')
+    if isinstance(requisition_id, str) and requisition_id:
+        set_dispatch(priority, requisition_id)
+    else:
+        set_dispatch(priority, requisition_key_for(job_desc) if isinstance(job_desc, str) and job_desc else None)
     
     try:
-        resume_text = parse_resume(temp_path)
-        
-        # Core analysis
-        skill_analysis = match_skills(resume_text, job_desc)
-        bias_report = check_bias(job_desc)
-        
-        # New features
-        culture_fit = assess_culture_fit(resume_text, company_values, job_desc)
-        interview_qs = generate_interview_questions(job_desc, resume_text, num_questions=5)
-        
-        # Salary benchmarking
-        years_exp, skills = extract_salary_info_from_resume(resume_text, job_desc)
-        job_title = extract_job_title(job_desc)
-        salary_data = benchmark_salary(job_title, job_location, years_exp, skills)
-        
-    finally:
-        # Clean up temporary file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        get_dispatcher().check_admission(priority)
+    except QueueFull as e:
+        return overloaded_response(str(e), e.retry_after)
+    return None
 
-    return jsonify({
-        "analysis": skill_analysis,
-        "bias_report": bias_report,
-        "culture_fit": culture_fit,
-        "interview_questions": interview_qs,
-        "salary_benchmark": salary_data
-    })
 
+def overloaded_response(message, retry_after):
+    """429 telling the client when the model queue should have room again"""
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
 
-@app.route("/batch", methods=["POST"])
-def batch_process():
-    """Process multiple resumes at once"""
-    files = request.files.getlist("resumes")
-    job_desc = request.form["job_desc"]
-    company_values = request.form.get("company_values", "")
+
+@app.errorhandler(LLMOverloaded)
+def handle_llm_overloaded(e):
+    """Model calls that could not get a dispatcher slot and were not handled by a fallback"""
+    return overloaded_response(str(e), e.retry_after)
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and its latency per endpoint and status"""
+    endpoint = request.endpoint or 'unknown'
+    inc('hr_http_requests_total', {'endpoint': endpoint, 'status': str(response.status_code)})
+    if hasattr(g, 'request_started'):
+        observe('hr_http_request_duration_seconds', time.perf_counter() - g.request_started, {'endpoint': endpoint})
+    return response
+
+
+def collect_cache_metrics():
+    """Counters kept by the LLM cache, structured output and resume feature cache"""
+    samples = []
+    llm_cache = get_cache_stats()
+    for counter in ('hits', 'misses', 'evictions'):
+        samples.append(('hr_llm_cache_events_total', 'counter', 'LLM result cache lookups and evictions',
+                        {'event': counter}, llm_cache[counter]))
+    if llm_cache['entries'] is not None:
+        samples.append(('hr_llm_cache_entries', 'gauge', 'Entries in the LLM result cache', {}, llm_cache['entries']))
+    for counter, value in get_structured_output_stats().items():
+        samples.append(('hr_structured_output_total', 'counter',
+                        'Structured output requests, malformed outputs, re-asks and failures', {'event': counter}, value))
+    features = get_feature_cache_stats()
+    for counter in ('hits', 'misses'):
+        samples.append(('hr_resume_features_cache_total', 'counter', 'Resume feature cache lookups',
+                        {'event': counter}, features[counter]))
+    return samples
+
+
+register_collector(collect_cache_metrics)
+
+
+def include_timings(values):
+    """Whether to add the timings block to a response (?timings=0/1 or form field, default RESPONSE_TIMINGS)"""
+    value = values.get('timings')
+    if value in (None, ''):
+        return RESPONSE_TIMINGS
+    return value not in ('0', 'false', 'no')
+
+
+def response_timings(timings):
+    """Stage timings plus the request's model usage and fallbacks"""
+    trace = current_trace()
+    return dict(timings, **trace.to_dict()) if trace else timings
+
+
+def resolve_requisition(form):
+    """
+    Look up the requisition referenced by a request, if any
     
-    if len(files) > 50:
-        return jsonify({"error": "Maximum 50 resumes per batch"}), 400
+    Returns:
+        Tuple of (requisition or None, error response or None)
+    """
+    requisition_id = form.get("requisition_id")
+    if not requisition_id:
+        return None, None
     
-    candidates = []
+    requisition = get_requisition(requisition_id)
+    if not requisition:
+        return None, (jsonify({"error": f"Requisition {requisition_id} not found"}), 404)
     
-    for idx, file in enumerate(files):
-        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
-            temp_path = temp_file.name
-            file.save(temp_path)
-        
+    return requisition, None
+
+
+@app.route("/requisition", methods=["POST"])
+def create_job_requisition():
+    """Analyze a job description once and store it for later screening"""
+    data = request.get_json(silent=True) or {}
+    job_desc = data.get('job_desc', '')
+    
+    if not isinstance(job_desc, str) or not job_desc.strip():
+        return jsonify({"error": "job_desc is required"}), 400
+    
+    requisition = create_requisition(
+        job_desc,
+        location=data.get('location', ''),
+        company_values=data.get('company_values', '')
+    )
+    return jsonify(requisition)
+
+
+@app.route("/requisition/<requisition_id>", methods=["GET"])
+def get_job_requisition(requisition_id):
+    """Get a stored requisition"""
+    requisition = get_requisition(requisition_id)
+    if not requisition:
+        return jsonify({"error": f"Requisition {requisition_id} not found"}), 404
+    
+    return jsonify(requisition)
+
+
+def get_analysis_mode(form):
+    """Read the optional analysis_mode field ("separate" or "combined")"""
+    mode = form.get("analysis_mode") or None
+    if mode not in (None, 'separate', 'combined'):
+        return None, (jsonify({"error": "analysis_mode must be 'separate' or 'combined'"}), 400)
+    return mode, None
+
+
+def get_escalate_top_k(form):
+    """Read the optional escalate_top_k field (resumes sent to the model after pre-screening)"""
+    value = form.get("escalate_top_k")
+    if value in (None, ''):
+        return None, None
+    if not value.isdigit():
+        return None, (jsonify({"error": "escalate_top_k must be a non-negative integer"}), 400)
+    return int(value), None
+
+
+def parse_upload_request():
+    """
+    Read the resume and job details of a single-resume request
+    
+    Returns:
+        Tuple of (file, job_desc, company_values, job_location, requisition, error response or None)
+    """
+    file = request.files["resume"]
+    requisition, error = resolve_requisition(request.form)
+    if error:
+        return None, None, None, None, None, error
+    
+    if requisition:
+        job_desc = requisition['job_desc']
+        company_values = request.form.get("company_values") or requisition['company_values']
+        job_location = request.form.get("location") or requisition['location']
+    else:
+        job_desc = request.form["job_desc"]
+        company_values = request.form.get("company_values", "")
+        job_location = request.form.get("location", "")
+    
+    return file, job_desc, company_values, job_location, requisition, None
+
+
+def store_upload_analysis(filename, resume_text, sections, job_desc, requisition):
+    """Persist a single-resume analysis, returning its candidate ID (None if storing failed)"""
+    try:
+        return save_upload_analysis(
+            filename.replace('.pdf', ''), resume_text, sections, requisition_key_for(job_desc, requisition)
+        )
+    except sqlite3.Error as e:
+        print(f"Error storing candidate: {e}")
+        return None
+
+
+@app.route("/upload", methods=["POST"])
+def upload_resume():
+    request_started = time.perf_counter()
+    file, job_desc, company_values, job_location, requisition, error = parse_upload_request()
+    if error:
+        return error
+    mode, error = get_analysis_mode(request.form)
+    if error:
+        return error
+    
+    # Parse in memory (large uploads spill to a temporary file)
+    with open_upload(file) as source:
+        parse_started = time.perf_counter()
+        resume_text = parse_resume(source)
+        parse_seconds = time.perf_counter() - parse_started
+        record_stage('parse', parse_seconds)
+    
+    sections, timings = analyze_resume(resume_text, job_desc, company_values, job_location, requisition, mode=mode)
+    timings['parse'] = round(parse_seconds, 3)
+    candidate_id = store_upload_analysis(file.filename, resume_text, sections, job_desc, requisition)
+    timings['total'] = round(time.perf_counter() - request_started, 3)
+    
+    result = {
+        "analysis": sections['analysis'],
+        "bias_report": sections['bias_report'],
+        "culture_fit": sections['culture_fit'],
+        "interview_questions": sections['interview_questions'],
+        "salary_benchmark": sections['salary_benchmark'],
+        "candidate_id": candidate_id
+    }
+    if include_timings(request.values):
+        result["timings"] = response_timings(timings)
+    return jsonify(result)
+
+
+@app.route("/upload/stream", methods=["POST"])
+def upload_resume_stream():
+    """
+    Streaming variant of /upload using server-sent events
+    
+    Emits 'token' events with model output as it is generated, a 'reset'
+    event when a section's malformed output is discarded and re-asked, a
+    'section' event as each part of the analysis finishes and a final
+    'done' event with the timings.
+    """
+    request_started = time.perf_counter()
+    file, job_desc, company_values, job_location, requisition, error = parse_upload_request()
+    if error:
+        return error
+    mode, error = get_analysis_mode(request.form)
+    if error:
+        return error
+    
+    with open_upload(file) as source:
+        parse_started = time.perf_counter()
+        resume_text = parse_resume(source)
+        record_stage('parse', time.perf_counter() - parse_started)
+    filename = file.filename
+    send_timings = include_timings(request.values)
+    
+    events = queue.Queue()
+    
+    def stream_token(section, token):
+        if token is None:
+            events.put(('reset', {'section': section}))
+        else:
+            events.put(('token', {'section': section, 'token': token}))
+    
+    def run_analysis():
         try:
-            resume_text = parse_resume(temp_path)
-            skill_analysis = match_skills(resume_text, job_desc)
-            culture_fit = assess_culture_fit(resume_text, company_values, job_desc)
-            
-            candidates.append({
-                'name': file.filename.replace('.pdf', ''),
-                'analysis': skill_analysis,
-                'resume_text': resume_text,
-                'culture_score': culture_fit.get('culture_score', 70)
-            })
+            sections, timings = analyze_resume(
+                resume_text, job_desc, company_values, job_location, requisition,
+                on_token=stream_token,
+                on_section=lambda section, value: events.put(('section', {'section': section, 'data': value})),
+                mode=mode
+            )
+            candidate_id = store_upload_analysis(filename, resume_text, sections, job_desc, requisition)
+            timings['total'] = round(time.perf_counter() - request_started, 3)
+            done = {'candidate_id': candidate_id}
+            if send_timings:
+                done['timings'] = response_timings(timings)
+            events.put(('done', done))
         except Exception as e:
-            print(f"Error processing {file.filename}: {e}")
-            continue
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            print(f"Error streaming analysis: {e}")
+            events.put(('error', {'error': str(e)}))
     
-    # Rank candidates
-    ranked = rank_candidates(candidates, {'job_desc': job_desc})
+    threading.Thread(target=in_context(run_analysis), daemon=True).start()
+    
+    def generate():
+        while True:
+            event, payload = events.get()
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            if event in ('done', 'error'):
+                break
+    
+    return Response(generate(), mimetype="text/event-stream", headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Disable proxy buffering so events arrive immediately
+    })
+
+
+def parse_batch_request(max_resumes=50):
+    """
+    Read the resumes and job details of a batch request
+    
+    Args:
+        max_resumes: Largest number of resumes accepted
+    
+    Returns:
+        Tuple of (files, job_desc, company_values, requisition, error response or None)
+    """
+    files = request.files.getlist("resumes")
+    requisition, error = resolve_requisition(request.form)
+    if error:
+        return None, None, None, None, error
+    
+    if len(files) > max_resumes:
+        return None, None, None, None, (jsonify({"error": f"Maximum {max_resumes} resumes per batch"}), 400)
+    
+    if requisition:
+        job_desc = requisition['job_desc']
+        company_values = request.form.get("company_values") or requisition['company_values']
+    else:
+        job_desc = request.form["job_desc"]
+        company_values = request.form.get("company_values", "")
+    
+    return files, job_desc, company_values, requisition, None
+
+
+@app.route("/batch", methods=["POST"])
+def batch_process():
+    """Process multiple resumes at once"""
+    files, job_desc, company_values, requisition, error = parse_batch_request()
+    if error:
+        return error
+    mode, error = get_analysis_mode(request.form)
+    if error:
+        return error
+    escalate_top_k, error = get_escalate_top_k(request.form)
+    if error:
+        return error
+    
+    # Load uploads in memory (large ones spill to temporary files)
+    with ExitStack() as stack:
+        resumes = [
+            (file.filename.replace('.pdf', ''), stack.enter_context(open_upload(file)))
+            for file in files
+        ]
+        
+        # Parse and analyze concurrently, then rank
+        ranked = screen_batch(
+            resumes, job_desc, company_values, requisition=requisition, mode=mode,
+            escalate_top_k=escalate_top_k
+        )
     
     return jsonify({
         "total_processed": len(ranked),
         "total_candidates": len(ranked),  # Backwards compatibility
         "ranked_candidates": ranked[:10],  # Top 10
-        "summary": {
-            "excellent": len([c for c in ranked if c['total_score'] >= 85]),
-            "good": len([c for c in ranked if 70 <= c['total_score'] < 85]),
-            "moderate": len([c for c in ranked if 55 <= c['total_score'] < 70]),
-            "poor": len([c for c in ranked if c['total_score'] < 55])
-        }
+        "summary": summarize_rankings(ranked)
+    })
+
+
+@app.route("/prescreen", methods=["POST"])
+def prescreen_batch():
+    """Rank a large batch of resumes with the model-free pre-screen scorer"""
+    files, job_desc, _, requisition, error = parse_batch_request(PRESCREEN_MAX_RESUMES)
+    if error:
+        return error
+    top_n = request.form.get("top_n", "50")
+    if not top_n.isdigit():
+        return jsonify({"error": "top_n must be a non-negative integer"}), 400
+    
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        resumes = [
+            (file.filename.replace('.pdf', ''), stack.enter_context(open_upload(file)))
+            for file in files
+        ]
+        texts = [None] * len(resumes)
+        errors = []
+        for idx, text, parse_error in iter_parsed(resumes):
+            texts[idx] = text
+            if parse_error:
+                errors.append({'name': resumes[idx][0], 'error': parse_error})
+    
+    parsed = [idx for idx, text in enumerate(texts) if text is not None]
+    scores = prescreen([texts[idx] for idx in parsed], job_desc, requisition['skills'] if requisition else None)
+    
+    ranked = []
+    for rank, pos in enumerate(select_for_escalation(scores, int(top_n)), 1):
+        ranked.append(dict(scores[pos], rank=rank, name=resumes[parsed[pos]][0]))
+    
+    return jsonify({
+        "total_processed": len(parsed),
+        "ranked_candidates": ranked,
+        "errors": errors,
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    })
+
+
+@app.route("/batch/jobs", methods=["POST"])
+def submit_batch_process():
+    """Queue a batch for background processing and return its job ID immediately"""
+    files, job_desc, company_values, requisition, error = parse_batch_request()
+    if error:
+        return error
+    
+    resumes = [(file.filename.replace('.pdf', ''), file.read()) for file in files]
+    job_id = submit_batch_job(resumes, job_desc, company_values, requisition)
+    
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "total": len(resumes),
+        "status_url": f"/batch/{job_id}/status"
+    }), 202
+
+
+@app.route("/batch/<job_id>/status", methods=["GET"])
+def batch_job_status(job_id):
+    """Get per-resume progress and the partial ranking of a batch job"""
+    status = get_batch_job_status(job_id)
+    if not status:
+        return jsonify({"error": f"Batch job {job_id} not found"}), 404
+    
+    return jsonify(status)
+
+
+def get_int_arg(args, name, default):
+    """Read an optional integer query parameter"""
+    value = args.get(name, '')
+    if not value:
+        return default, None
+    try:
+        return int(value), None
+    except ValueError:
+        return None, (jsonify({"error": f"{name} must be an integer"}), 400)
+
+
+def merge_rank_weights(overrides):
+    """
+    RANK_WEIGHTS with some weights replaced
+    
+    Args:
+        overrides: Dict of weight name ('skill', 'experience', 'culture') to a
+            number or numeric string; weights not given keep their default
+    
+    Returns:
+        Tuple of (weights dict, error response or None)
+    """
+    weights = dict(RANK_WEIGHTS)
+    for name, value in overrides.items():
+        if name not in weights:
+            expected = ', '.join(RANK_WEIGHTS)
+            return None, (jsonify({"error": f"Unknown weight '{name}', expected one of: {expected}"}), 400)
+        try:
+            weight = None if isinstance(value, bool) else float(value)
+        except (TypeError, ValueError):
+            weight = None
+        if weight is None or not math.isfinite(weight):
+            return None, (jsonify({"error": f"Weight '{name}' must be a number"}), 400)
+        weights[name] = weight
+    return weights, None
+
+
+def get_candidate_filter(args):
+    """Requisition key from ?requisition_id= or ?job_key= (as returned by the store)"""
+    return args.get("requisition_id") or args.get("job_key") or None
+
+
+@app.route("/candidates", methods=["GET"])
+def search_candidates():
+    """List stored candidates with optional skill, score and full-text filters"""
+    page, error = get_int_arg(request.args, "page", 1)
+    if error:
+        return error
+    per_page, error = get_int_arg(request.args, "per_page", 20)
+    if error:
+        return error
+    min_score, error = get_int_arg(request.args, "min_score", None)
+    if error:
+        return error
+    
+    try:
+        result = list_candidates(
+            requisition_key=get_candidate_filter(request.args),
+            skill=request.args.get("skill") or None,
+            min_score=min_score,
+            query=request.args.get("q") or None,
+            sort=request.args.get("sort", "skill_score"),
+            page=page,
+            per_page=per_page
+        )
+    except sqlite3.OperationalError as e:
+        # Malformed full-text query syntax
+        return jsonify({"error": f"Invalid search query: {e}"}), 400
+    
+    return jsonify(result)
+
+
+@app.route("/candidates/<int:candidate_id>", methods=["GET"])
+def get_stored_candidate(candidate_id):
+    """Get a stored candidate with resume text and analysis"""
+    candidate = get_candidate(candidate_id)
+    if not candidate:
+        return jsonify({"error": f"Candidate {candidate_id} not found"}), 404
+    return jsonify(candidate)
+
+
+@app.route("/candidates/rank", methods=["GET"])
+def rank_stored_candidates():
+    """Re-rank all stored candidates of a requisition without re-analyzing them"""
+    requisition_key = get_candidate_filter(request.args)
+    if not requisition_key:
+        return jsonify({"error": "requisition_id or job_key is required"}), 400
+    top_k, error = get_int_arg(request.args, "top_k", 10)
+    if error:
+        return error
+    
+    weights, error = merge_rank_weights({
+        name: request.args[f"weight_{name}"] for name in RANK_WEIGHTS if request.args.get(f"weight_{name}")
+    })
+    if error:
+        return error
+    
+    ranked, summary = rerank_candidates(requisition_key, weights, top_k)
+    return jsonify({
+        "requisition_key": requisition_key,
+        "ranked_candidates": ranked,
+        "summary": summary
+    })
+
+
+@app.route("/candidates/semantic", methods=["POST"])
+def semantic_candidate_search():
+    """Find the stored resumes that best fit a job description by embedding similarity"""
+    data = request.get_json(silent=True) or {}
+    job_desc = data.get('job_desc', '')
+    if not isinstance(job_desc, str) or not job_desc.strip():
+        return jsonify({"error": "job_desc is required"}), 400
+    top_k = data.get('top_k', 10)
+    if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+        return jsonify({"error": "top_k must be a positive integer"}), 400
+    weights = data.get('weights') or {}
+    if not isinstance(weights, dict):
+        return jsonify({"error": "weights must be an object of weight name to number"}), 400
+    weights, error = merge_rank_weights(weights)
+    if error:
+        return error
+    
+    try:
+        ranked = semantic_search(job_desc, top_k, weights)
+    except LLMError as e:
+        return jsonify({"error": f"Embedding model unavailable: {e}"}), 503
+    
+    return jsonify({"ranked_candidates": ranked, "index": get_index_stats()})
+
+
+@app.route("/candidates/embeddings/backfill", methods=["POST"])
+def backfill_candidate_embeddings():
+    """Add stored resumes that are missing from the semantic search index"""
+    try:
+        added = backfill_embeddings()
+    except LLMError as e:
+        return jsonify({"error": f"Embedding model unavailable: {e}"}), 503
+    return jsonify({"added": added, "index": get_index_stats()})
+
+
+@app.route("/bias", methods=["POST"])
+def get_bias_analysis():
+    """Get the (memoized) bias report for a job description"""
+    data = request.get_json(silent=True) or {}
+    job_desc = data.get('job_desc', '')
+    
+    if not isinstance(job_desc, str) or not job_desc.strip():
+        return jsonify({"error": "job_desc is required"}), 400
+    
+    try:
+        bias_report, cached = get_bias_report(job_desc)
+    except LLMOverloaded:
+        raise  # 429 with Retry-After
+    except LLMError as e:
+        return jsonify({"error": f"Model unavailable: {e}"}), 503
+    return jsonify({
+        'bias_report': bias_report,
+        'job_key': job_description_key(job_desc),
+        'cached': cached
     })
 
 
+@app.route("/bias/invalidate", methods=["POST"])
+def invalidate_bias_analysis():
+    """Drop memoized and cached bias reports for one job description, or all of them"""
+    data = request.get_json(silent=True) or {}
+    
+    removed = invalidate_bias_report(
+        job_description=data.get('job_desc'),
+        key=data.get('job_key')
+    )
+    return jsonify({'success': True, 'invalidated': removed})
+
+
 @app.route("/questions", methods=["POST"])
 def get_interview_questions():
     """Generate interview questions endpoint"""
@@ -134,24 +672,48 @@ def get_salary_benchmark():
     return jsonify(salary_data)
 
 
-def extract_job_title(job_desc):
-    """Extract job title from job description"""
-    import re
-    
-    # Look for common patterns
-    patterns = [
-        r'(?:position|role|job):\s*([^\n]+)',
-        r'(?:hiring|seeking)\s+(?:a\s+)?([a-zA-Z\s]+?)(?:\s+to|\s+for)',
-        r'^([a-zA-Z\s]+)\s+(?:Position|Role|Job)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, job_desc, re.IGNORECASE | re.MULTILINE)
-        if match:
-            return match.group(1).strip()
+@app.route("/salary/batch", methods=["POST"])
+def get_salary_benchmark_batch():
+    """Benchmark many role/location/experience rows in one request"""
+    data = request.get_json() or {}
+    rows = data.get('rows')
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"error": "rows must be a non-empty list"}), 400
+    if len(rows) > SALARY_BATCH_MAX:
+        return jsonify({"error": f"At most {SALARY_BATCH_MAX} rows per request"}), 400
     
-    # Default fallback
-    return "Software Engineer"
+    results = benchmark_salaries(rows, include_recommendation=bool(data.get('include_recommendation', False)))
+    return jsonify({
+        'results': results,
+        'count': len(results),
+        'errors': sum(1 for result in results if 'error' in result),
+        'data_version': get_salary_tables().version
+    })
+
+
+@app.route("/cache/stats", methods=["GET"])
+def llm_cache_stats():
+    """Get LLM result cache and resume feature cache hit/miss counters"""
+    return jsonify(dict(get_cache_stats(), resume_features=get_feature_cache_stats()))
+
+
+@app.route("/llm/stats", methods=["GET"])
+def structured_output_stats():
+    """Get structured output counters and the model dispatcher's in-flight and queued requests"""
+    return jsonify(dict(get_structured_output_stats(), dispatcher=get_dispatcher_stats()))
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Stage latency, model token, cache and fallback metrics in the Prometheus text format"""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/cache/clear", methods=["POST"])
+def llm_cache_clear():
+    """Remove all cached LLM results"""
+    clear_cache()
+    return jsonify({'success': True, 'message': 'LLM cache cleared'})
 
 
 @app.route("/schedule", methods=["POST"])
@@ -165,12 +727,46 @@ def create_interview_schedule():
         date=data.get('date'),
         time=data.get('time'),
         interview_type=data.get('interview_type', 'Technical'),
-        duration_minutes=data.get('duration_minutes', 60)
+        duration_minutes=data.get('duration_minutes', 60),
+        interviewer_id=data.get('interviewer_id'),
+        room_id=data.get('room_id')
     )
     
     return jsonify(result)
 
 
+@app.route("/schedule/resources", methods=["POST"])
+def save_schedule_resource():
+    """Register or update an interviewer or room with its working hours"""
+    result = register_resource(request.get_json())
+    return jsonify(result), (200 if result['success'] else 400)
+
+
+@app.route("/schedule/resources", methods=["GET"])
+def list_schedule_resources():
+    """List registered interviewers and rooms (optionally ?kind=interviewer|room)"""
+    resources = list_resources(request.args.get('kind'))
+    return jsonify({'resources': resources, 'count': len(resources)})
+
+
+@app.route("/schedule/bulk", methods=["POST"])
+def bulk_schedule_interviews():
+    """Assign interview slots to a ranked shortlist in one pass"""
+    data = request.get_json() or {}
+    
+    result = schedule_bulk(
+        candidates=data.get('candidates'),
+        start_date=data.get('start_date'),
+        days=data.get('days', 5),
+        duration_minutes=data.get('duration_minutes', 60),
+        interview_type=data.get('interview_type', 'Technical'),
+        step_minutes=data.get('step_minutes'),
+        max_per_day=data.get('max_per_day'),
+        dry_run=bool(data.get('dry_run', False))
+    )
+    return jsonify(result), (200 if result['success'] else 400)
+
+
 @app.route("/schedule/available", methods=["GET"])
 def get_available_interview_slots():
     """Get available interview slots for a date"""
@@ -209,10 +805,57 @@ def create_offer_letter():
     salary_data = data.get('salary_data', {})
     company_info = data.get('company_info')
     
-    offer = generate_offer_letter(candidate_data, job_details, salary_data, company_info)
+    try:
+        offer = generate_offer_letter(candidate_data, job_details, salary_data, company_info, data.get('template'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify(offer)
 
 
+@app.route("/offer/batch", methods=["POST"])
+def create_offer_batch():
+    """
+    Generate offer letters for a hiring wave in one request
+    
+    Streams NDJSON (one offer per line) or, with "format": "zip", a zip of
+    <offer_id>.txt letters plus manifest.json.
+    """
+    data = request.get_json() or {}
+    offers = data.get('offers')
+    if not isinstance(offers, list) or not offers:
+        return jsonify({"error": "offers must be a non-empty list"}), 400
+    if len(offers) > OFFER_BATCH_MAX:
+        return jsonify({"error": f"At most {OFFER_BATCH_MAX} offers per request"}), 400
+    output_format = data.get('format', 'ndjson')
+    if output_format not in ('ndjson', 'zip'):
+        return jsonify({"error": "format must be 'ndjson' or 'zip'"}), 400
+    
+    try:
+        rendered = generate_offer_batch(
+            offers, data.get('company_info'), data.get('job_details'), data.get('salary_data'), data.get('template')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if output_format == 'zip':
+        return Response(stream_zip(rendered), mimetype="application/zip", headers={
+            'Content-Disposition': 'attachment; filename="offers.zip"'
+        })
+    return Response(stream_ndjson(rendered), mimetype="application/x-ndjson")
+
+
+@app.route("/offer/templates", methods=["GET"])
+def list_offer_templates():
+    """List the available offer letter templates and the fields each uses"""
+    templates = []
+    for name in list_templates():
+        try:
+            templates.append({'name': name, 'fields': sorted(get_template(name).fields)})
+        except ValueError as e:
+            templates.append({'name': name, 'error': str(e)})
+    return jsonify({'templates': templates})
+
+
 @app.route("/offer/quick", methods=["POST"])
 def create_quick_offer():
     """Generate a quick offer letter with minimal details"""
@@ -226,5 +869,9 @@ def create_quick_offer():
     
     return jsonify(offer)
 
+# Batch workers start with the app, also under a WSGI server; jobs left over from a stopped
+# process are resumed once their lease expires
+start_workers()
+
 if __name__ == "__main__":
     app.run(debug=False, host="127.0.0.1", port=5000)
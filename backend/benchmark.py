@@ -0,0 +1,390 @@
+"""
+Benchmark
+Offline latency and throughput benchmark of /upload, /batch and /schedule against the mock Ollama server
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+import io
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_CASES_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'test_cases')
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'data', 'benchmarks')
+SCENARIOS = ('upload', 'batch', 'schedule')
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q in 0-100) of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb(children=False):
+    """
+    Peak resident set size in MB, or None if unavailable
+    
+    Args:
+        children: Report the largest finished child process (the PDF parse
+            workers) instead of this process, where the app runs in-process
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize(samples, elapsed):
+    """
+    Aggregate one scenario
+    
+    Args:
+        samples: List of dicts with 'seconds', 'ok', 'resumes' and 'fallbacks'
+        elapsed: Wall time of the whole scenario in seconds
+    
+    Returns:
+        Dict with request counts, latency percentiles (ms) and throughput
+    """
+    latencies = [sample['seconds'] * 1000 for sample in samples]
+    resumes = sum(sample['resumes'] for sample in samples if sample['ok'])
+    summary = {
+        'requests': len(samples),
+        'errors': sum(not sample['ok'] for sample in samples),
+        'fallbacks': sum(sample['fallbacks'] for sample in samples),
+        'elapsed_seconds': round(elapsed, 3),
+        'requests_per_second': round(len(samples) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            'max': max(latencies, default=None)
+        }
+    }
+    summary['latency_ms'] = {
+        name: round(value, 1) if value is not None else None for name, value in summary['latency_ms'].items()
+    }
+    if resumes:
+        summary['resumes'] = resumes
+        summary['resumes_per_minute'] = round(resumes * 60 / elapsed, 1)
+    return summary
+
+
+def run_concurrently(calls, concurrency):
+    """Run request callables on a thread pool; returns (samples, elapsed seconds)"""
+    def timed_call(call):
+        started = time.perf_counter()
+        try:
+            sample = call()
+        except Exception as e:
+            print(f"Error during benchmark request: {e}")
+            sample = {'ok': False, 'resumes': 0, 'fallbacks': 0}
+        sample['seconds'] = time.perf_counter() - started
+        return sample
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(timed_call, calls))
+    return samples, time.perf_counter() - started
+
+
+def load_test_cases():
+    """PDF resumes and the job description shipped in test_cases/"""
+    names = sorted(name for name in os.listdir(TEST_CASES_DIR) if name.endswith('.pdf'))
+    pdfs = []
+    for name in names:
+        with open(os.path.join(TEST_CASES_DIR, name), 'rb') as handle:
+            pdfs.append((name, handle.read()))
+    with open(os.path.join(TEST_CASES_DIR, 'webdev_job_description.txt'), encoding='utf-8') as handle:
+        job_desc = handle.read()
+    return pdfs, job_desc
+
+
+def reset_parse_caches():
+    """Forget extracted text and resume features so the next requests parse their PDFs again"""
+    from resume_features import extract_features
+    from resume_parser import clear_text_cache
+    clear_text_cache()
+    extract_features.cache_clear()
+
+
+def bench_upload(client, pdfs, job_desc, requests_count, concurrency):
+    """Single resume analysis, cycling through the test PDFs"""
+    def call(name, content):
+        response = client.post('/upload', data={
+            'resume': (io.BytesIO(content), name),
+            'job_desc': job_desc
+        }, content_type='multipart/form-data')
+        result = response.get_json(silent=True) or {}
+        return {
+            'ok': response.status_code == 200 and 'error' not in result,
+            'resumes': 1,
+            'fallbacks': len(result.get('timings', {}).get('fallbacks', []))
+        }
+    
+    calls = [
+        (lambda pdf=pdfs[idx % len(pdfs)]: call(*pdf))
+        for idx in range(requests_count)
+    ]
+    return run_concurrently(calls, concurrency)
+
+
+def bench_batch(client, pdfs, job_desc, rounds, concurrency):
+    """Batch screening of all test PDFs per request"""
+    def call():
+        # Every round measures parsing too, not just the first
+        reset_parse_caches()
+        response = client.post('/batch', data={
+            'resumes': [(io.BytesIO(content), name) for name, content in pdfs],
+            'job_desc': job_desc
+        }, content_type='multipart/form-data')
+        return {'ok': response.status_code == 200, 'resumes': len(pdfs), 'fallbacks': 0}
+    
+    return run_concurrently([call] * rounds, concurrency)
+
+
+def bench_schedule(client, requests_count, concurrency):
+    """Single bookings on distinct slots of three interviewers, then bulk allocation dry runs"""
+    for idx in range(3):
+        client.post('/schedule/resources', json={
+            'kind': 'interviewer', 'id': f'bench-{idx}', 'name': f'Benchmark Interviewer {idx}'
+        })
+    
+    first_day = date.today() + timedelta(days=1)
+    hours = ['09:00', '10:00', '11:00', '13:00', '14:00', '15:00', '16:00']
+    
+    def book(idx):
+        slot = idx // 3
+        response = client.post('/schedule', json={
+            'candidate_name': f'Candidate {idx}',
+            'candidate_email': f'candidate{idx}@example.com',
+            'date': (first_day + timedelta(days=slot // len(hours))).isoformat(),
+            'time': hours[slot % len(hours)],
+            'interviewer_id': f'bench-{idx % 3}'
+        })
+        return {'ok': bool((response.get_json(silent=True) or {}).get('success')), 'resumes': 0, 'fallbacks': 0}
+    
+    def bulk():
+        response = client.post('/schedule/bulk', json={
+            'candidates': [{'name': f'Shortlisted {idx}'} for idx in range(50)],
+            'start_date': first_day.isoformat(),
+            'days': 10,
+            'dry_run': True
+        })
+        return {'ok': response.status_code == 200, 'resumes': 0, 'fallbacks': 0}
+    
+    calls = [(lambda idx=idx: book(idx)) for idx in range(requests_count)]
+    calls += [bulk] * max(1, requests_count // 10)
+    return run_concurrently(calls, concurrency)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_mock(latency, tokens_per_second):
+    """Launch mock_ollama.py in its own process (keeps its memory and threads out of the measurement)"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'mock_ollama.py'), '--port', str(port),
+         '--latency', str(latency), '--tokens-per-second', str(tokens_per_second)],
+        stdout=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{url}/api/tags", timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('Mock Ollama server did not start')
+
+
+def run_benchmark(args):
+    """
+    Run the selected scenarios against an isolated copy of the app
+    
+    The app is imported in-process with fresh stores in a temporary
+    directory and, unless --cache is given, the LLM result cache off so
+    every request reaches the (mock) model.
+    """
+    data_dir = tempfile.mkdtemp(prefix='hr-bench-')
+    mock = None
+    if args.ollama_url:
+        ollama_url = args.ollama_url
+    else:
+        mock, ollama_url = start_mock(args.latency, args.tokens_per_second)
+    
+    os.environ.update({
+        'OLLAMA_BASE_URL': ollama_url,
+        'LLM_CACHE_ENABLED': '1' if args.cache else '0',
+        'LLM_CACHE_PATH': os.path.join(data_dir, 'llm_cache.sqlite3'),
+        'CANDIDATE_STORE_PATH': os.path.join(data_dir, 'candidates.sqlite3'),
+        'EMBED_INDEX_DIR': os.path.join(data_dir, 'embeddings'),
+        'BATCH_QUEUE_PATH': os.path.join(data_dir, 'batch_jobs.sqlite3'),
+        'SCHEDULE_DB_PATH': os.path.join(data_dir, 'schedule.sqlite3'),
+        'RESPONSE_TIMINGS': '1'
+    })
+    
+    try:
+        sys.path.insert(0, BACKEND_DIR)
+        from app import app
+        from pipeline import shutdown_parse_pool
+        
+        client = app.test_client()
+        pdfs, job_desc = load_test_cases()
+        results = {}
+        for scenario in args.scenarios:
+            print(f"Running {scenario}...")
+            # Scenarios share the process; do not let one reuse text another already parsed
+            reset_parse_caches()
+            if scenario == 'upload':
+                samples, elapsed = bench_upload(client, pdfs, job_desc, args.requests, args.concurrency)
+            elif scenario == 'batch':
+                samples, elapsed = bench_batch(client, pdfs, job_desc, args.batch_rounds, args.concurrency)
+            else:
+                samples, elapsed = bench_schedule(client, args.requests, args.concurrency)
+            results[scenario] = summarize(samples, elapsed)
+        
+        # ru_maxrss is a high-water mark for the whole run, so memory is reported once, not per scenario.
+        # Children only count once they exit: stop the parse workers, and read before the mock server
+        # process is reaped so it does not count as a child.
+        shutdown_parse_pool()
+        children_peak = peak_rss_mb(children=True)
+    finally:
+        if mock:
+            mock.terminate()
+            mock.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'settings': {
+            'ollama_url': args.ollama_url or 'mock',
+            'latency_seconds': None if args.ollama_url else args.latency,
+            'tokens_per_second': None if args.ollama_url else args.tokens_per_second,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'batch_rounds': args.batch_rounds,
+            'llm_cache': args.cache,
+            'resumes_available': len(pdfs)
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'commit': git_commit()
+        },
+        'scenarios': results,
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_children_mb': children_peak
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(current, baseline):
+    """Print the change of each scenario's p95 latency and throughput against an earlier run"""
+    print(f"\nCompared with {baseline.get('timestamp')} ({baseline.get('environment', {}).get('commit')}):")
+    for scenario, summary in current['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(scenario)
+        if not previous:
+            continue
+        for label, now, before in (
+            ('p95 ms', summary['latency_ms']['p95'], previous['latency_ms']['p95']),
+            ('req/s', summary['requests_per_second'], previous['requests_per_second']),
+            ('resumes/min', summary.get('resumes_per_minute'), previous.get('resumes_per_minute'))
+        ):
+            if now is None or not before:
+                continue
+            print(f"  {scenario:<9} {label:<12} {before:>10} -> {now:>10} ({(now - before) / before:+.1%})")
+
+
+def print_report(report):
+    print(f"\n{'scenario':<9} {'requests':>8} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'req/s':>7} {'resumes/min':>11}")
+    for scenario, summary in report['scenarios'].items():
+        latency = {name: '-' if value is None else value for name, value in summary['latency_ms'].items()}
+        print(f"{scenario:<9} {summary['requests']:>8} {summary['errors']:>6} {latency['p50']:>9} "
+              f"{latency['p95']:>9} {latency['p99']:>9} {summary['requests_per_second'] or '-':>7} "
+              f"{summary.get('resumes_per_minute', '-'):>11}")
+    print(f"\nPeak RSS over the whole run: {report['peak_rss_mb'] or '-'} MB in the benchmark process running "
+          f"the app, {report['peak_rss_children_mb'] or '-'} MB in the largest PDF parse worker")
+
+
+def positive_float(value):
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError('must be greater than 0')
+    return number
+
+
+def positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError('must be greater than 0')
+    return number
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the screening API without a live Ollama')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--requests', type=positive_int, default=20, help='/upload and /schedule requests per run')
+    parser.add_argument('--batch-rounds', type=positive_int, default=3, help='/batch requests (all test PDFs each)')
+    parser.add_argument('--concurrency', type=positive_int, default=4, help='concurrent client requests')
+    parser.add_argument('--latency', type=float, default=0.2, help='mock seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=positive_float, default=50.0, help='mock generation rate')
+    parser.add_argument('--ollama-url', help='benchmark against this Ollama instead of the mock')
+    parser.add_argument('--cache', action='store_true', help='keep the LLM result cache enabled')
+    parser.add_argument('--output', help='results file (default data/benchmarks/benchmark-<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+    
+    report = run_benchmark(args)
+    print_report(report)
+    
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nResults saved to {output}")
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            compare(report, json.load(handle))
@@ -1,7 +1,26 @@
-import ollama
+from collections import OrderedDict
+import hashlib
+import threading
 
-def check_bias(job_description):
-    prompt = f"""CRITICAL: You must ONLY analyze the exact text provided below. DO NOT invent or imagine phrases.
+from llm_cache import delete_cached, delete_tagged
+from llm_client import chat, cache_key_for
+
+OPTIONS = {
+    "temperature": 0.1,
+    "num_predict": 500
+}
+
+# Bias reports memoized per normalized job description
+MAX_MEMOIZED_REPORTS = 1000
+_bias_reports = OrderedDict()
+_in_flight = {}
+_memo_lock = threading.Lock()
+
+# Persisted reports are tagged with this prefix and the job description key
+CACHE_TAG_PREFIX = "bias:"
+
+def build_bias_prompt(job_description):
+    return f"""CRITICAL: You must ONLY analyze the exact text provided below. DO NOT invent or imagine phrases.
 
 JOB DESCRIPTION TO ANALYZE:
 ---START---
@@ -37,13 +56,97 @@ No discriminatory language detected in this job description. The language used a
 
 **VERIFICATION CHECK**: Have you quoted actual text from the job description? If not, revise your answer."""
 
-    response = ollama.chat(
-        model="recruitment-screener",
-        messages=[{"role": "user", "content": prompt}],
-        options={
-            "temperature": 0.1,
-            "num_predict": 500
-        }
-    )
+def check_bias(job_description, on_token=None):
+    prompt = build_bias_prompt(job_description)
+    return chat(prompt, OPTIONS, on_token=on_token,
+                cache_tag=CACHE_TAG_PREFIX + job_description_key(job_description))
+
+
+def normalize_job_description(job_description):
+    """Collapse whitespace so reformatted copies of a posting share one report"""
+    return " ".join((job_description or "").split())
+
+
+def job_description_key(job_description):
+    """Stable identifier for a normalized job description"""
+    normalized = normalize_job_description(job_description)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def get_bias_report(job_description, on_token=None):
+    """
+    Get the bias report for a job description, computing it at most once
+    
+    Concurrent requests for the same posting wait for the first one to
+    finish instead of issuing their own model call. on_token only receives
+    tokens when this call is the one running the analysis.
+    
+    Returns:
+        Tuple of (bias report text, whether it was already memoized)
+    """
+    normalized = normalize_job_description(job_description)
+    key = job_description_key(normalized)
+    
+    while True:
+        with _memo_lock:
+            if key in _bias_reports:
+                _bias_reports.move_to_end(key)
+                return _bias_reports[key][1], True
+            
+            pending = _in_flight.get(key)
+            if pending is None:
+                pending = _in_flight[key] = threading.Event()
+                break
+        pending.wait()
+    
+    try:
+        report = check_bias(normalized, on_token)
+        with _memo_lock:
+            _bias_reports[key] = (normalized, report)
+            while len(_bias_reports) > MAX_MEMOIZED_REPORTS:
+                _bias_reports.popitem(last=False)
+        return report, False
+    finally:
+        with _memo_lock:
+            _in_flight.pop(key).set()
+
 
-    return response["message"]["content"]
+def invalidate_bias_report(job_description=None, key=None):
+    """
+    Drop memoized and persisted bias reports so the next request re-runs the analysis
+    
+    The persisted model output is found by its cache tag, so reports
+    memoized by another worker or before a restart are removed too.
+    
+    Args:
+        job_description: Posting to invalidate (normalized before lookup)
+        key: Job description key, as returned by job_description_key
+        If neither is given, every bias report is dropped.
+    
+    Returns:
+        Number of reports removed
+    """
+    with _memo_lock:
+        if job_description is not None:
+            normalized = normalize_job_description(job_description)
+            keys = [job_description_key(normalized)]
+            # Reports cached before they were tagged can still be found by their prompt
+            delete_cached(cache_key_for(build_bias_prompt(normalized), OPTIONS))
+        elif key is not None:
+            keys = [key]
+        else:
+            keys = list(_bias_reports)
+        
+        for k in keys:
+            entry = _bias_reports.get(k)
+            if entry is not None:
+                delete_cached(cache_key_for(build_bias_prompt(entry[0]), OPTIONS))
+        
+        if job_description is None and key is None:
+            tags = delete_tagged(CACHE_TAG_PREFIX, prefix=True)
+        else:
+            tags = delete_tagged(CACHE_TAG_PREFIX + keys[0])
+        
+        removed = {k for k in keys if _bias_reports.pop(k, None) is not None}
+        removed.update(tag[len(CACHE_TAG_PREFIX):] for tag in tags)
+        return len(removed)
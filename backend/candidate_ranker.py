@@ -3,56 +3,162 @@ Candidate Ranking System
 Ranks candidates based on multiple criteria: skills, experience, culture fit
 """
 
-def rank_candidates(candidates, job_requirements):
+import re
+
+import numpy as np
+
+from config import RANK_WEIGHTS
+from resume_features import extract_features
+
+SCORE_PATTERN = re.compile(r'(?:Match Score|Final Score).*?(\d+)/100', re.IGNORECASE)
+
+# Candidates scored by the model-free pre-screen only; their scores are not comparable to model scores
+PRESCREEN_TIER = 'prescreen'
+
+def rank_candidates(candidates, job_requirements, weights=None, top_k=None):
     """
     Rank candidates based on match score and other criteria
     
     Args:
-        candidates: List of dicts with 'name', 'score', 'analysis', 'resume_text'
+        candidates: List of dicts with 'name', 'analysis', 'resume_text' and,
+            for structured model output, the validated 'skill_score'; a
+            precomputed 'experience_score' and the 'culture_score' are used
+            when present
         job_requirements: Dict with job description details
+        weights: Dict of 'skill', 'experience' and 'culture' weights
+            (default RANK_WEIGHTS)
+        top_k: Only return the best top_k candidates (default all)
     
     Returns:
-        Sorted list of candidates with ranking
+        Sorted list of candidates with ranking; candidates whose score could
+        not be determined are ranked with 0 and flagged 'needs_review', and
+        pre-screen-only candidates are ranked below every model-scored one
     """
-    ranked = []
+    return rank_with_summary(candidates, job_requirements, weights, top_k)[0]
+
+
+def rank_with_summary(candidates, job_requirements, weights=None, top_k=None):
+    """
+    Rank candidates and count the whole pool per score band in one pass
     
-    for idx, candidate in enumerate(candidates):
-        # Extract score from analysis
-        score = extract_score(candidate.get('analysis', ''))
-        
-        # Calculate ranking factors
-        skill_score = score if score else 0
-        experience_score = calculate_experience_score(candidate.get('resume_text', ''))
-        
-        # Calculate total ranking score
-        total_score = (skill_score * 0.7) + (experience_score * 0.3)
+    Takes the same arguments as rank_candidates.
+    
+    Returns:
+        Tuple of (ranked top_k candidates, summary of all candidates)
+    """
+    columns = build_feature_columns(candidates)
+    totals = compute_total_scores(columns, weights)
+    
+    ranked = []
+    for rank, idx in enumerate(top_k_indices(totals, top_k, columns['prescreen_only']), 1):
+        candidate = candidates[idx]
+        skill_score = columns['skill'][idx].item()
         
         ranked.append({
-            'rank': 0,  # Will be set after sorting
+            'rank': rank,
             'name': candidate.get('name', f'Candidate {idx+1}'),
             'skill_score': skill_score,  # Frontend expects 'skill_score'
             'skill_match_score': skill_score,  # Backwards compatibility
-            'experience_score': experience_score,
-            'total_score': round(total_score, 2),
+            'experience_score': columns['experience'][idx].item(),
+            'culture_score': columns['culture'][idx].item(),
+            'total_score': totals[idx].item(),
             'analysis': candidate.get('analysis', ''),
-            'recommendation': get_recommendation(total_score)
+            'recommendation': get_recommendation(totals[idx]),
+            'needs_review': bool(columns['needs_review'][idx]),
+            'tier': candidate.get('tier', 'llm'),
+            'candidate_id': candidate.get('candidate_id')
         })
     
-    # Sort by total score descending
-    ranked.sort(key=lambda x: x['total_score'], reverse=True)
+    return ranked, summarize_scores(totals, columns['prescreen_only'])
+
+
+def build_feature_columns(candidates):
+    """
+    Collect candidate features into column arrays
+    
+    Returns:
+        Dict of NumPy arrays: 'skill', 'experience', 'culture' and the
+        booleans 'needs_review' (no skill score could be determined) and
+        'prescreen_only' (scored without the model)
+    """
+    n = len(candidates)
+    skill = np.zeros(n)
+    experience = np.zeros(n)
+    culture = np.zeros(n)
+    needs_review = np.zeros(n, dtype=bool)
+    prescreen_only = np.zeros(n, dtype=bool)
+    
+    for idx, candidate in enumerate(candidates):
+        prescreen_only[idx] = candidate.get('tier') == PRESCREEN_TIER
+        
+        # Prefer the validated score; only legacy free-text analyses are scraped
+        score = candidate.get('skill_score')
+        if score is None:
+            score = extract_score(candidate.get('analysis', ''))
+        if score is None:
+            needs_review[idx] = True
+        else:
+            skill[idx] = score
+        
+        experience_score = candidate.get('experience_score')
+        if experience_score is None:
+            experience_score = calculate_experience_score(candidate.get('resume_text', ''))
+        experience[idx] = experience_score
+        culture[idx] = candidate.get('culture_score') or 0
+    
+    return {
+        'skill': skill,
+        'experience': experience,
+        'culture': culture,
+        'needs_review': needs_review,
+        'prescreen_only': prescreen_only
+    }
+
+
+def compute_total_scores(columns, weights=None):
+    """Weighted total score per candidate, rounded to 2 decimals"""
+    weights = weights or RANK_WEIGHTS
+    totals = (
+        columns['skill'] * weights.get('skill', 0)
+        + columns['experience'] * weights.get('experience', 0)
+        + columns['culture'] * weights.get('culture', 0)
+    )
+    return np.round(totals, 2)
+
+
+def top_k_indices(totals, k=None, demoted=None):
+    """
+    Indices of the k highest totals, best first
     
-    # Assign ranks
-    for idx, candidate in enumerate(ranked):
-        candidate['rank'] = idx + 1
+    Uses partial selection so only the top k are sorted; ties keep input
+    order, matching a stable sort of the whole list. Entries flagged in the
+    optional boolean array demoted come after all others whatever their total.
+    """
+    if demoted is not None and demoted.any():
+        first = np.flatnonzero(~demoted)
+        second = np.flatnonzero(demoted)
+        head = first[top_k_indices(totals[first], k)]
+        rest = None if k is None else k - len(head)
+        return np.concatenate([head, second[top_k_indices(totals[second], rest)]])
     
-    return ranked
+    n = len(totals)
+    if k is None or k >= n:
+        selected = np.arange(n)
+    elif k <= 0:
+        return np.array([], dtype=int)
+    else:
+        threshold = np.partition(totals, n - k)[n - k]
+        above = np.flatnonzero(totals > threshold)
+        ties = np.flatnonzero(totals == threshold)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+    
+    return selected[np.lexsort((selected, -totals[selected]))]
 
 
 def extract_score(analysis_text):
-    """Extract numerical score from analysis text"""
-    import re
-    match = re.search(r'(?:Match Score|Final Score).*?(\d+)/100', analysis_text, re.IGNORECASE)
-    return int(match.group(1)) if match else 50
+    """Extract numerical score from analysis text, or None if it has no score"""
+    match = SCORE_PATTERN.search(analysis_text)
+    return int(match.group(1)) if match else None
 
 
 def calculate_experience_score(resume_text):
@@ -60,21 +166,15 @@ def calculate_experience_score(resume_text):
     Calculate experience score based on resume content
     Simple heuristic based on years mentioned
     """
-    import re
-    
-    # Look for year patterns (e.g., "5+ years", "3 years")
-    year_patterns = re.findall(r'(\d+)\+?\s*years?', resume_text.lower())
+    features = extract_features(resume_text)
     
-    if year_patterns:
-        max_years = max([int(y) for y in year_patterns])
+    # Year patterns (e.g., "5+ years", "3 years")
+    if features.years_experience is not None:
         # Cap at 100, scale linearly (10 years = 100)
-        return min(100, max_years * 10)
+        return min(100, features.years_experience * 10)
     
     # Look for job titles/positions as proxy
-    experience_keywords = ['senior', 'lead', 'manager', 'director', 'principal', 'architect']
-    count = sum(1 for keyword in experience_keywords if keyword in resume_text.lower())
-    
-    return min(100, count * 15)
+    return min(100, len(features.experience_keywords) * 15)
 
 
 def get_recommendation(score):
@@ -87,3 +187,30 @@ def get_recommendation(score):
         return "MAYBE - Adequate match, consider if no better candidates"
     else:
         return "NO HIRE - Poor match, not recommended"
+
+
+def summarize_rankings(ranked):
+    """Count ranked candidates per score band"""
+    return summarize_scores(
+        np.array([c['total_score'] for c in ranked], dtype=float),
+        np.array([c.get('tier') == PRESCREEN_TIER for c in ranked], dtype=bool)
+    )
+
+
+def summarize_scores(totals, prescreen_only=None):
+    """
+    Count total scores per band (poor < 55 <= moderate < 70 <= good < 85 <= excellent)
+    
+    Pre-screen-only candidates are left out of the bands and counted
+    separately under 'prescreen_only'.
+    """
+    prescreened = 0
+    if prescreen_only is not None:
+        prescreened = int(prescreen_only.sum())
+        totals = totals[~prescreen_only]
+    
+    poor, moderate, good, excellent = np.bincount(
+        np.searchsorted([55, 70, 85], totals, side='right'), minlength=4
+    ).tolist()
+    return {"excellent": excellent, "good": good, "moderate": moderate, "poor": poor,
+            "prescreen_only": prescreened}
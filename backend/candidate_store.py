@@ -0,0 +1,419 @@
+"""
+Candidate Store
+Persistent SQLite store of screened candidates with full-text and indexed search
+"""
+
+from datetime import datetime
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+
+from config import CANDIDATE_STORE_ENABLED, CANDIDATE_STORE_PATH, EMBED_INDEX_ENABLED
+from llm_client import LLMError
+from llm_dispatcher import dispatch_as
+from requisition import SKILL_PATTERN
+from bias_detector import job_description_key
+from candidate_ranker import rank_candidates, rank_with_summary, extract_score, calculate_experience_score
+import embedding_index
+
+_local = threading.local()
+
+# Resumes waiting to be embedded; indexing runs on a background thread, off the request path
+_index_queue = queue.Queue()
+_indexer = None
+_indexer_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    requisition_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    text_sha256 TEXT NOT NULL,
+    resume_text TEXT NOT NULL,
+    skills TEXT NOT NULL DEFAULT '',
+    skill_score REAL,
+    experience_score REAL,
+    culture_score REAL,
+    prescreen_score REAL,
+    tier TEXT NOT NULL DEFAULT 'llm',
+    analysis TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (requisition_key, text_sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_skill_score ON candidates (requisition_key, skill_score DESC);
+CREATE INDEX IF NOT EXISTS idx_candidates_created ON candidates (requisition_key, created_at DESC);
+CREATE TABLE IF NOT EXISTS candidate_skills (
+    candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE,
+    skill TEXT NOT NULL,
+    PRIMARY KEY (skill, candidate_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+    name, resume_text, skills, analysis, content='candidates', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS candidates_ai AFTER INSERT ON candidates BEGIN
+    INSERT INTO candidates_fts (rowid, name, resume_text, skills, analysis)
+    VALUES (new.id, new.name, new.resume_text, new.skills, new.analysis);
+END;
+CREATE TRIGGER IF NOT EXISTS candidates_ad AFTER DELETE ON candidates BEGIN
+    INSERT INTO candidates_fts (candidates_fts, rowid, name, resume_text, skills, analysis)
+    VALUES ('delete', old.id, old.name, old.resume_text, old.skills, old.analysis);
+END;
+CREATE TRIGGER IF NOT EXISTS candidates_au AFTER UPDATE ON candidates BEGIN
+    INSERT INTO candidates_fts (candidates_fts, rowid, name, resume_text, skills, analysis)
+    VALUES ('delete', old.id, old.name, old.resume_text, old.skills, old.analysis);
+    INSERT INTO candidates_fts (rowid, name, resume_text, skills, analysis)
+    VALUES (new.id, new.name, new.resume_text, new.skills, new.analysis);
+END;
+"""
+
+# Columns that listings may be sorted by (all descending)
+SORT_COLUMNS = {
+    'skill_score': 'skill_score',
+    'culture_score': 'culture_score',
+    'experience_score': 'experience_score',
+    'created_at': 'created_at'
+}
+
+# Columns returned by listings (the full resume text only comes with get_candidate)
+LIST_COLUMNS = (
+    "c.id, c.requisition_key, c.name, c.skills, c.skill_score, c.experience_score, "
+    "c.culture_score, c.prescreen_score, c.tier, c.source, c.created_at"
+)
+
+
+def _connect():
+    """Return this thread's connection to the candidate database"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(CANDIDATE_STORE_PATH), exist_ok=True)
+        conn = sqlite3.connect(CANDIDATE_STORE_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def requisition_key_for(job_desc, requisition=None):
+    """Key candidates are stored under: the requisition ID, or a hash of the job description"""
+    return requisition['id'] if requisition else f"JD-{job_description_key(job_desc)[:16]}"
+
+
+def extract_resume_skills(resume_text):
+    """Known skills mentioned in a resume, in order of first mention"""
+    skills = []
+    for match in SKILL_PATTERN.finditer(resume_text):
+        skill = match.group(1).lower()
+        if skill not in skills:
+            skills.append(skill)
+    return skills
+
+
+def save_candidates(candidates, requisition_key, source='batch'):
+    """
+    Store screened candidates, replacing earlier results for the same resume and requisition
+    
+    Args:
+        candidates: Candidate dicts as produced by pipeline.iter_screened
+            (name, analysis, resume_text and scores)
+        requisition_key: Requisition ID, or job description key for ad-hoc jobs
+        source: Where the analysis came from ('upload' or 'batch')
+    
+    Returns:
+        List of candidate IDs in input order (None if the store is disabled)
+    """
+    if not CANDIDATE_STORE_ENABLED:
+        return [None] * len(candidates)
+    
+    conn = _connect()
+    now = datetime.now().isoformat()
+    ids = []
+    digests = []
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for candidate in candidates:
+            resume_text = candidate.get('resume_text', '')
+            digests.append(hashlib.sha256(resume_text.encode('utf-8')).hexdigest())
+            skills = extract_resume_skills(resume_text)
+            row = conn.execute(
+                "INSERT INTO candidates (requisition_key, name, text_sha256, resume_text, skills, skill_score, "
+                "experience_score, culture_score, prescreen_score, tier, analysis, source, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (requisition_key, text_sha256) DO UPDATE SET "
+                "name = excluded.name, skills = excluded.skills, skill_score = excluded.skill_score, "
+                "experience_score = excluded.experience_score, culture_score = excluded.culture_score, "
+                "prescreen_score = excluded.prescreen_score, tier = excluded.tier, analysis = excluded.analysis, "
+                "source = excluded.source, created_at = excluded.created_at "
+                "RETURNING id",
+                (requisition_key, candidate.get('name', ''), digests[-1], resume_text, ', '.join(skills),
+                 candidate.get('skill_score'), candidate.get('experience_score'), candidate.get('culture_score'),
+                 candidate.get('prescreen_score'), candidate.get('tier', 'llm'), candidate.get('analysis', ''),
+                 source, now)
+            ).fetchone()
+    
+            conn.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (row['id'],))
+            conn.executemany(
+                "INSERT INTO candidate_skills (candidate_id, skill) VALUES (?, ?)",
+                [(row['id'], skill) for skill in skills]
+            )
+            ids.append(row['id'])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    
+    index_embeddings(digests, [c.get('resume_text', '') for c in candidates])
+    return ids
+
+
+def index_embeddings(digests, texts):
+    """
+    Queue resumes for the semantic search index
+    
+    A background thread embeds them at background priority; resumes lost
+    to a failure or restart are picked up by backfill_embeddings.
+    
+    Returns:
+        Number of resumes queued
+    """
+    if not EMBED_INDEX_ENABLED or not digests:
+        return 0
+    _start_indexer()
+    _index_queue.put((list(digests), list(texts)))
+    return len(digests)
+
+
+def _start_indexer():
+    global _indexer
+    with _indexer_lock:
+        if _indexer is None:
+            _indexer = threading.Thread(target=_indexer_loop, name="embedding-indexer", daemon=True)
+            _indexer.start()
+
+
+def _indexer_loop():
+    """Embed queued resumes, combining whatever has queued up into one pass"""
+    while True:
+        digests, texts = _index_queue.get()
+        done = 1
+        while True:
+            try:
+                more_digests, more_texts = _index_queue.get_nowait()
+            except queue.Empty:
+                break
+            digests += more_digests
+            texts += more_texts
+            done += 1
+        
+        try:
+            with dispatch_as('background'):
+                embedding_index.add_documents(digests, texts)
+        except LLMError as e:
+            print(f"Error indexing resume embeddings: {e}")
+        except Exception as e:
+            print(f"Error updating the embedding index: {e}")
+        finally:
+            for _ in range(done):
+                _index_queue.task_done()
+
+
+def wait_for_indexing():
+    """Block until every queued resume has been indexed (or failed)"""
+    _index_queue.join()
+
+
+def save_upload_analysis(name, resume_text, sections, requisition_key):
+    """
+    Store a single-resume analysis from /upload
+    
+    Args:
+        name: Candidate name (upload filename)
+        resume_text: Parsed resume text
+        sections: Sections returned by pipeline.analyze_resume
+        requisition_key: Requisition ID or job description key
+    
+    Returns:
+        Candidate ID (None if the store is disabled)
+    """
+    culture_fit = sections.get('culture_fit') or {}
+    return save_candidates([{
+        'name': name,
+        'analysis': sections.get('analysis', ''),
+        'skill_score': extract_score(sections.get('analysis', '')),
+        'resume_text': resume_text,
+        'experience_score': calculate_experience_score(resume_text),
+        'culture_score': culture_fit.get('culture_score')
+    }], requisition_key, source='upload')[0]
+
+
+def list_candidates(requisition_key=None, skill=None, min_score=None, query=None,
+                    sort='skill_score', page=1, per_page=20):
+    """
+    List stored candidates, filtered and paginated
+    
+    Args:
+        requisition_key: Only candidates screened for this requisition / job key
+        skill: Only candidates whose resume mentions this skill
+        min_score: Minimum skill score
+        query: FTS5 full-text query over name, resume text, skills and analysis
+        sort: One of SORT_COLUMNS (descending); full-text queries sort by relevance
+        page: 1-based page number
+        per_page: Page size (max 100)
+    
+    Returns:
+        Dict with 'candidates', 'total', 'page' and 'per_page'
+    """
+    per_page = max(1, min(per_page, 100))
+    page = max(1, page)
+    
+    joins = []
+    where = []
+    params = []
+    
+    if query:
+        joins.append("JOIN candidates_fts f ON f.rowid = c.id")
+        where.append("candidates_fts MATCH ?")
+        params.append(query)
+    if skill:
+        joins.append("JOIN candidate_skills s ON s.candidate_id = c.id")
+        where.append("s.skill = ?")
+        params.append(skill.lower())
+    if requisition_key:
+        where.append("c.requisition_key = ?")
+        params.append(requisition_key)
+    if min_score is not None:
+        where.append("c.skill_score >= ?")
+        params.append(min_score)
+    
+    clause = " ".join(joins) + (" WHERE " + " AND ".join(where) if where else "")
+    order = "f.rank" if query else f"c.{SORT_COLUMNS.get(sort, 'skill_score')} DESC"
+    
+    conn = _connect()
+    total = conn.execute(f"SELECT COUNT(*) FROM candidates c {clause}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT {LIST_COLUMNS} FROM candidates c {clause} ORDER BY {order}, c.id LIMIT ? OFFSET ?",
+        params + [per_page, (page - 1) * per_page]
+    ).fetchall()
+    
+    return {
+        'candidates': [dict(row) for row in rows],
+        'total': total,
+        'page': page,
+        'per_page': per_page
+    }
+
+
+def get_candidate(candidate_id):
+    """Get one stored candidate with its resume text and analysis, or None"""
+    row = _connect().execute("SELECT * FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def rerank_candidates(requisition_key, weights=None, top_k=10):
+    """
+    Re-rank every stored candidate of a requisition without re-analyzing them
+    
+    Args:
+        requisition_key: Requisition ID or job description key
+        weights: Optional ranking weights (see candidate_ranker.rank_candidates)
+        top_k: Number of ranked candidates to return
+    
+    Returns:
+        Tuple of (ranked top_k candidates, summary of all candidates)
+    """
+    rows = _connect().execute(
+        "SELECT id, name, skill_score, experience_score, culture_score, tier, analysis "
+        "FROM candidates WHERE requisition_key = ? ORDER BY id",
+        (requisition_key,)
+    ).fetchall()
+    
+    candidates = [dict(row, candidate_id=row['id']) for row in rows]
+    return rank_with_summary(candidates, {'requisition_key': requisition_key}, weights, top_k)
+
+
+def semantic_search(job_desc, top_k=10, weights=None):
+    """
+    Find the stored resumes closest to a job description and rank them
+    
+    The cosine similarity between the job and the resume embedding (x100)
+    stands in for the skill score, so no model analysis is run.
+    
+    Args:
+        job_desc: Job description text
+        top_k: Number of candidates to return
+        weights: Optional ranking weights (see candidate_ranker.rank_candidates)
+    
+    Returns:
+        Ranked list of candidates (see rank_candidates), each with its
+        'similarity'
+    
+    Raises:
+        LLMError if the embedding model cannot be reached
+    """
+    matches = embedding_index.search(job_desc, top_k)
+    if not matches:
+        return []
+    
+    similarity = dict(matches)
+    placeholders = ', '.join('?' * len(matches))
+    rows = _connect().execute(
+        "SELECT id, name, text_sha256, experience_score, culture_score, analysis "
+        f"FROM candidates WHERE text_sha256 IN ({placeholders}) ORDER BY id DESC",
+        list(similarity)
+    ).fetchall()
+    
+    # The same resume may be stored for several requisitions; keep its latest row
+    latest = {}
+    for row in rows:
+        latest.setdefault(row['text_sha256'], row)
+    
+    candidates = [
+        {
+            'candidate_id': latest[key]['id'],
+            'name': latest[key]['name'],
+            'skill_score': round(score * 100, 1),
+            'experience_score': latest[key]['experience_score'],
+            'culture_score': latest[key]['culture_score'],
+            'analysis': latest[key]['analysis'],
+            'tier': 'semantic'
+        }
+        for key, score in matches if key in latest
+    ]
+    
+    ranked = rank_candidates(candidates, {'job_desc': job_desc}, weights)
+    similarity_by_id = {latest[key]['id']: score for key, score in similarity.items() if key in latest}
+    for candidate in ranked:
+        candidate['similarity'] = round(similarity_by_id[candidate['candidate_id']], 4)
+    return ranked
+
+
+def backfill_embeddings(batch_size=500):
+    """
+    Index stored resumes that are missing from the semantic index
+    
+    Returns:
+        Number of resumes added
+    """
+    conn = _connect()
+    added = 0
+    last_id = 0
+    
+    while True:
+        rows = conn.execute(
+            "SELECT id, text_sha256, resume_text FROM candidates WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size)
+        ).fetchall()
+        if not rows:
+            return added
+        last_id = rows[-1]['id']
+        
+        missing = [row for row in rows if not embedding_index.has_document(row['text_sha256'])]
+        if missing:
+            added += embedding_index.add_documents(
+                [row['text_sha256'] for row in missing], [row['resume_text'] for row in missing]
+            )
@@ -0,0 +1,129 @@
+"""
+Combined Analysis
+Single-pass skill match, culture fit and interview questions as structured JSON
+"""
+
+import json
+
+from culture_fit import get_culture_recommendation
+from structured_output import (
+    SkillMatchResult, CultureFitResult, SKILL_MATCH_SCHEMA, CULTURE_FIT_SCHEMA,
+    request_structured, validate_schema
+)
+
+OPTIONS = {
+    'temperature': 0.1,
+    'num_predict': 900
+}
+
+QUESTIONS_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'category': {'type': 'string'},
+            'question': {'type': 'string'}
+        },
+        'required': ['category', 'question']
+    }
+}
+
+
+def build_schema(include_questions=True):
+    """JSON schema passed to Ollama's format option"""
+    properties = {'skill_match': SKILL_MATCH_SCHEMA, 'culture_fit': CULTURE_FIT_SCHEMA}
+    if include_questions:
+        properties['interview_questions'] = QUESTIONS_SCHEMA
+    return {'type': 'object', 'properties': properties, 'required': list(properties)}
+
+
+def run_combined_analysis(resume_text, job_desc, company_values="", include_questions=True,
+                          num_questions=5, on_token=None):
+    """
+    Analyze a resume with one structured model call
+    
+    Args:
+        resume_text: Candidate resume content
+        job_desc: Job description (or a requisition summary)
+        company_values: Company culture description
+        include_questions: Also generate interview questions
+        num_questions: Number of interview questions to ask for
+        on_token: Optional callback receiving the raw JSON as it streams
+    
+    Returns:
+        Dict with 'analysis', 'culture_fit' and (optionally) 'interview_questions'
+        in the same shapes the per-module functions return
+    
+    Raises:
+        LLMError if the model call fails, ValueError if the output stays
+        malformed (callers fall back to the per-module calls)
+    """
+    skill_match, culture, questions = request_combined_analysis(
+        resume_text, job_desc, company_values, include_questions, num_questions, on_token
+    )
+    
+    sections = {
+        'analysis': skill_match.to_markdown(),
+        'culture_fit': culture.to_dict(get_culture_recommendation(culture.culture_score))
+    }
+    if include_questions:
+        sections['interview_questions'] = {
+            'questions': questions,
+            'raw_output': json.dumps(questions)
+        }
+    return sections
+
+
+def request_combined_analysis(resume_text, job_desc, company_values="", include_questions=True,
+                              num_questions=5, on_token=None):
+    """
+    Make the structured model call behind run_combined_analysis
+    
+    Returns:
+        Tuple of (SkillMatchResult, CultureFitResult, questions); questions
+        is None when include_questions is False
+    """
+    if not company_values:
+        company_values = "collaborative, innovative, results-driven, growth mindset"
+    
+    questions_task = ""
+    if include_questions:
+        questions_task = f"""
+3. interview_questions: {num_questions} targeted questions - 2 Technical Skills, 2 Experience & Projects,
+   1 Cultural Fit - that verify resume claims and probe gaps against the job requirements."""
+    
+    prompt = f"""You are a VERY STRICT recruitment analyst. Analyze the candidate below and answer ONLY with JSON.
+
+RESUME:
+{resume_text}
+
+JOB DESCRIPTION:
+{job_desc}
+
+COMPANY VALUES:
+{company_values}
+
+TASKS:
+1. skill_match: List the required skills, check each against the resume and score the overlap (0-100).
+   - Different domain (web dev vs data science, frontend vs backend): match_score must be below 35
+   - Missing core skill: -20 points each; missing required degree: -25; missing experience level: -15
+   - verdict is one of STRONG MATCH, MODERATE MATCH, WEAK MATCH, POOR MATCH
+2. culture_fit: Score alignment with the company values (0-100) from evidence of collaboration,
+   innovation, work style and values; list 2-3 strengths, any concerns and a 2-3 sentence assessment.{questions_task}
+
+Only use evidence that appears in the resume."""
+    
+    return request_structured(
+        prompt, build_schema(include_questions), lambda data: parse_combined(data, include_questions),
+        OPTIONS, timeout=90, on_token=on_token
+    )
+
+
+def parse_combined(data, include_questions=True):
+    """Validate a decoded response and split it into typed results, raising ValueError on mismatch"""
+    validate_schema(data, build_schema(include_questions))
+    return (
+        SkillMatchResult.from_dict(data['skill_match']),
+        CultureFitResult.from_dict(data['culture_fit']),
+        data['interview_questions'] if include_questions else None
+    )
@@ -0,0 +1,140 @@
+"""
+Runtime Configuration
+Tunable settings read from environment variables
+"""
+
+import os
+
+
+def _int_env(name, default):
+    """Read a positive integer setting, falling back to the default"""
+    try:
+        value = int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def _float_env(name, default):
+    """Read a non-negative float setting, falling back to the default"""
+    try:
+        value = float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value >= 0 else default
+
+
+# Batch pipeline
+PARSE_WORKERS = _int_env('PARSE_WORKERS', min(4, os.cpu_count() or 1))
+LLM_CONCURRENCY = _int_env('LLM_CONCURRENCY', 4)
+
+# Single resume pipeline: total seconds allowed for the parallel analysis stages
+UPLOAD_DEADLINE_SECONDS = _int_env('UPLOAD_DEADLINE_SECONDS', 90)
+
+# LLM result cache
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', '1') not in ('0', 'false', 'no')
+LLM_CACHE_PATH = os.environ.get(
+    'LLM_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'llm_cache.sqlite3')
+)
+LLM_CACHE_TTL_SECONDS = _int_env('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600)
+LLM_CACHE_MAX_ENTRIES = _int_env('LLM_CACHE_MAX_ENTRIES', 5000)
+
+# Resume parsing budget and extracted-text cache
+PARSE_MAX_PAGES = _int_env('PARSE_MAX_PAGES', 10)
+PARSE_MAX_CHARS = _int_env('PARSE_MAX_CHARS', 20000)
+PARSE_CACHE_MAX_ENTRIES = _int_env('PARSE_CACHE_MAX_ENTRIES', 256)
+
+# Uploads larger than this many bytes are spilled to a temporary file
+UPLOAD_SPILL_BYTES = _int_env('UPLOAD_SPILL_BYTES', 5 * 1024 * 1024)
+
+# Background batch job queue
+BATCH_QUEUE_PATH = os.environ.get(
+    'BATCH_QUEUE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'batch_jobs.sqlite3')
+)
+BATCH_WORKERS = _int_env('BATCH_WORKERS', 1)
+# Seconds a worker's claim on a running job lasts without a heartbeat before another process may resume it
+BATCH_LEASE_SECONDS = _int_env('BATCH_LEASE_SECONDS', 60)
+
+# Ollama backend
+OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', os.environ.get('OLLAMA_HOST', 'http://localhost:11434')).rstrip('/')
+if '://' not in OLLAMA_BASE_URL:
+    OLLAMA_BASE_URL = f"http://{OLLAMA_BASE_URL}"
+LLM_MODEL = os.environ.get('LLM_MODEL', 'recruitment-screener')
+LLM_CONNECT_TIMEOUT = _int_env('LLM_CONNECT_TIMEOUT', 5)
+LLM_READ_TIMEOUT = _int_env('LLM_READ_TIMEOUT', 60)
+LLM_MAX_RETRIES = _int_env('LLM_MAX_RETRIES', 2)
+LLM_POOL_SIZE = _int_env('LLM_POOL_SIZE', 16)
+
+# Analysis mode: "separate" (one model call per module) or "combined" (one structured call)
+ANALYSIS_MODE = os.environ.get('ANALYSIS_MODE', 'separate')
+
+# Structured (JSON) model output: attempts per call before giving up on malformed output
+STRUCTURED_MAX_ATTEMPTS = _int_env('STRUCTURED_MAX_ATTEMPTS', 2)
+
+# Model-free pre-screening: resumes escalated to the model per batch (0 = analyze all)
+PRESCREEN_TOP_K = _int_env('PRESCREEN_TOP_K', 0)
+PRESCREEN_MAX_RESUMES = _int_env('PRESCREEN_MAX_RESUMES', 2000)
+
+# Candidate ranking weights (total = skill * w + experience * w + culture * w)
+RANK_WEIGHTS = {
+    'skill': _float_env('RANK_WEIGHT_SKILL', 0.7),
+    'experience': _float_env('RANK_WEIGHT_EXPERIENCE', 0.3),
+    'culture': _float_env('RANK_WEIGHT_CULTURE', 0.0)
+}
+
+# Persistent candidate store (parsed text, scores and analyses per requisition)
+CANDIDATE_STORE_ENABLED = os.environ.get('CANDIDATE_STORE_ENABLED', '1') != '0'
+CANDIDATE_STORE_PATH = os.environ.get(
+    'CANDIDATE_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'candidates.sqlite3')
+)
+
+# Semantic resume search (embedding index stored as a memory-mapped matrix)
+EMBED_INDEX_ENABLED = os.environ.get('EMBED_INDEX_ENABLED', '1') != '0'
+EMBED_MODEL = os.environ.get('EMBED_MODEL', 'nomic-embed-text')
+EMBED_INDEX_DIR = os.environ.get(
+    'EMBED_INDEX_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'embeddings')
+)
+EMBED_BATCH_SIZE = _int_env('EMBED_BATCH_SIZE', 32)
+EMBED_MAX_CHARS = _int_env('EMBED_MAX_CHARS', 8000)
+
+# Interview scheduling storage: "sqlite" (durable, safe across worker processes) or "memory"
+SCHEDULE_STORE = os.environ.get('SCHEDULE_STORE', 'sqlite')
+SCHEDULE_DB_PATH = os.environ.get(
+    'SCHEDULE_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'schedule.sqlite3')
+)
+SCHEDULE_MAX_DURATION_MINUTES = _int_env('SCHEDULE_MAX_DURATION_MINUTES', 480)
+
+# Bulk interview slot allocation over interviewer and room calendars
+SCHEDULE_SLOT_STEP_MINUTES = _int_env('SCHEDULE_SLOT_STEP_MINUTES', 30)
+SCHEDULE_BULK_MAX_CANDIDATES = _int_env('SCHEDULE_BULK_MAX_CANDIDATES', 1000)
+
+# Offer letters: per-company templates (<name>.txt, str.format fields) and bulk generation limit
+OFFER_TEMPLATE_DIR = os.environ.get(
+    'OFFER_TEMPLATE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'offer_templates')
+)
+OFFER_BATCH_MAX = _int_env('OFFER_BATCH_MAX', 1000)
+
+# Salary benchmarking market data (versioned JSON file)
+SALARY_DATA_PATH = os.environ.get(
+    'SALARY_DATA_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'salary_data.json')
+)
+SALARY_BATCH_MAX = _int_env('SALARY_BATCH_MAX', 10000)
+
+# Per-document cache of extracted resume features (distinct texts kept)
+RESUME_FEATURES_CACHE_SIZE = _int_env('RESUME_FEATURES_CACHE_SIZE', 4096)
+
+# Include the per-stage timings / model usage block in /upload responses (override per request with ?timings=0|1)
+RESPONSE_TIMINGS = os.environ.get('RESPONSE_TIMINGS', '1') != '0'
+
+# Central LLM dispatcher: model requests running at once, waiting requests per priority class
+# (interactive, batch, background) before new ones get 429, and the longest wait for a slot in seconds
+LLM_MAX_IN_FLIGHT = _int_env('LLM_MAX_IN_FLIGHT', LLM_CONCURRENCY)
+LLM_QUEUE_MAX = _int_env('LLM_QUEUE_MAX', 32)
+LLM_QUEUE_TIMEOUT = _int_env('LLM_QUEUE_TIMEOUT', 120)
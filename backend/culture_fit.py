@@ -3,9 +3,16 @@ Culture Fit Assessment
 Analyzes candidate values, work style, and team compatibility
 """
 
-import requests
+from metrics import record_fallback
+from resume_features import extract_features
+from structured_output import CultureFitResult, CULTURE_FIT_SCHEMA, request_structured
 
-def assess_culture_fit(resume_text, company_values, job_desc):
+OPTIONS = {
+    'temperature': 0.3,
+    'num_predict': 400
+}
+
+def assess_culture_fit(resume_text, company_values, job_desc, on_token=None):
     """
     Assess candidate's cultural fit based on resume and company values
     
@@ -13,9 +20,11 @@ def assess_culture_fit(resume_text, company_values, job_desc):
         resume_text: Candidate resume content
         company_values: Company culture description
         job_desc: Job description with team details
+        on_token: Optional callback receiving model output as it streams
     
     Returns:
-        Culture fit analysis with score
+        Culture fit analysis with score; keyword-based results from the
+        fallback assessment are marked with 'fallback'
     """
     
     # Default company values if not provided
@@ -39,49 +48,25 @@ Assess cultural fit based on:
 3. **Work Style**: Matches team dynamics and work environment
 4. **Values Alignment**: Personal values align with company culture
 
-Provide:
-- Culture Fit Score: X/100
-- Key Strengths: List 2-3 cultural strengths
-- Potential Concerns: List any red flags
-- Overall Assessment: 2-3 sentences
+Answer with JSON only:
+- culture_score: culture fit score (0-100)
+- strengths: 2-3 cultural strengths
+- concerns: any red flags (empty list if none)
+- assessment: 2-3 sentence overall assessment
 
 Be objective and evidence-based. Look for indicators in their experience, projects, and communication style.
 """
 
     try:
-        response = requests.post(
-            'http://localhost:11434/api/generate',
-            json={
-                'model': 'recruitment-screener',
-                'prompt': prompt,
-                'stream': False,
-                'options': {
-                    'temperature': 0.3,
-                    'num_predict': 400
-                }
-            },
-            timeout=45
+        result = request_structured(
+            prompt, CULTURE_FIT_SCHEMA, CultureFitResult.from_dict, OPTIONS,
+            timeout=45, on_token=on_token
         )
-        
-        if response.status_code == 200:
-            result = response.json()
-            analysis = result.get('response', '')
-            
-            # Extract score
-            import re
-            score_match = re.search(r'(?:Culture Fit Score|Score).*?(\d+)/100', analysis, re.IGNORECASE)
-            score = int(score_match.group(1)) if score_match else 70
-            
-            return {
-                'culture_score': score,
-                'analysis': analysis,
-                'recommendation': get_culture_recommendation(score)
-            }
-        else:
-            return generate_fallback_culture_assessment(resume_text)
+        return result.to_dict(get_culture_recommendation(result.culture_score))
             
     except Exception as e:
         print(f"Error assessing culture fit: {e}")
+        record_fallback('culture_fit', 'model_error')
         return generate_fallback_culture_assessment(resume_text)
 
 
@@ -101,13 +86,10 @@ def generate_fallback_culture_assessment(resume_text):
     """Generate basic culture assessment if AI fails"""
     
     # Simple keyword-based assessment
-    collaboration_keywords = ['team', 'collaborated', 'partnership', 'cross-functional']
-    innovation_keywords = ['innovative', 'created', 'developed', 'improved', 'optimized']
-    leadership_keywords = ['led', 'managed', 'mentored', 'coordinated']
-    
-    collab_count = sum(1 for kw in collaboration_keywords if kw in resume_text.lower())
-    innov_count = sum(1 for kw in innovation_keywords if kw in resume_text.lower())
-    leader_count = sum(1 for kw in leadership_keywords if kw in resume_text.lower())
+    features = extract_features(resume_text)
+    collab_count = len(features.collaboration_keywords)
+    innov_count = len(features.innovation_keywords)
+    leader_count = len(features.leadership_keywords)
     
     # Calculate simple score
     base_score = 60
@@ -128,5 +110,6 @@ def generate_fallback_culture_assessment(resume_text):
     return {
         'culture_score': score,
         'analysis': analysis,
-        'recommendation': get_culture_recommendation(score)
+        'recommendation': get_culture_recommendation(score),
+        'fallback': True
     }
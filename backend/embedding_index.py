@@ -0,0 +1,255 @@
+"""
+Embedding Index
+Semantic resume search over a memory-mapped matrix of normalized embeddings
+"""
+
+from contextlib import contextmanager
+import json
+import os
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: only one process may write the index
+    fcntl = None
+
+from config import EMBED_INDEX_DIR, EMBED_MODEL, EMBED_BATCH_SIZE, EMBED_MAX_CHARS
+from llm_client import embed
+
+VECTORS_FILE = 'vectors.f32'
+KEYS_FILE = 'keys.txt'
+META_FILE = 'meta.json'
+LOCK_FILE = 'index.lock'
+INITIAL_CAPACITY = 1024
+
+# Loaded index: {'dim', 'count', 'capacity', 'vectors' (memmap), 'keys' (list), 'rows' (key -> row),
+# 'stamp' (meta.json version it was loaded from)}
+_index = None
+_lock = threading.Lock()  # Threads of this process; _file_lock covers other processes
+
+
+def _path(name):
+    return os.path.join(EMBED_INDEX_DIR, name)
+
+
+@contextmanager
+def _file_lock(exclusive=False):
+    """Lock the index files against other processes (shared for reads, exclusive for writes)"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(EMBED_INDEX_DIR, exist_ok=True)
+    with open(_path(LOCK_FILE), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _meta_stamp():
+    try:
+        stat = os.stat(_path(META_FILE))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _load():
+    """
+    Open the index, reloading it if another process has written since
+    (caller must hold _lock and _file_lock)
+    """
+    global _index
+    stamp = _meta_stamp()
+    if _index is not None and _index['stamp'] == stamp:
+        return _index
+
+    if _index is not None and _index['vectors'] is not None:
+        _index['vectors'] = None
+    _index = {'dim': None, 'count': 0, 'capacity': 0, 'vectors': None, 'keys': [], 'rows': {}, 'stamp': stamp}
+    if stamp is None:
+        return _index
+
+    with open(_path(META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get('model') != EMBED_MODEL:
+        print(f"Embedding index was built with {meta.get('model')}, rebuilding for {EMBED_MODEL}")
+        return _index
+
+    # Keys past meta's count were appended by a write that never committed
+    with open(_path(KEYS_FILE)) as f:
+        keys = f.read().split()[:meta['count']]
+
+    _index['dim'] = meta['dim']
+    _index['count'] = len(keys)
+    _index['keys'] = keys
+    _index['rows'] = {key: row for row, key in enumerate(keys)}
+    _map_vectors(os.path.getsize(_path(VECTORS_FILE)) // (4 * meta['dim']))
+    return _index
+
+
+def _truncate_keys(count):
+    """Drop keys left after the first count by an interrupted write, so appends line up with rows"""
+    if not os.path.exists(_path(KEYS_FILE)):
+        return
+    with open(_path(KEYS_FILE), 'r+b') as f:
+        size = 0
+        for _ in range(count):
+            size += len(f.readline())
+        f.truncate(size)
+
+
+def _map_vectors(capacity):
+    """(Re)map the vector file with room for capacity rows, growing it if needed"""
+    if _index['vectors'] is not None:
+        _index['vectors'].flush()
+        _index['vectors'] = None
+
+    size = capacity * _index['dim'] * 4
+    with open(_path(VECTORS_FILE), 'ab') as f:
+        if f.tell() < size:
+            f.truncate(size)
+
+    _index['capacity'] = capacity
+    _index['vectors'] = np.memmap(_path(VECTORS_FILE), dtype=np.float32, mode='r+',
+                                  shape=(capacity, _index['dim']))
+
+
+def _reset(dim):
+    """Start an empty index for vectors of the given dimension"""
+    os.makedirs(EMBED_INDEX_DIR, exist_ok=True)
+    if _index['vectors'] is not None:
+        _index['vectors'] = None
+    for name in (VECTORS_FILE, KEYS_FILE, META_FILE):
+        if os.path.exists(_path(name)):
+            os.remove(_path(name))
+
+    _index.update(dim=dim, count=0, keys=[], rows={})
+    _map_vectors(INITIAL_CAPACITY)
+
+
+def _write_meta():
+    """Atomically record how many rows of the vector and key files are valid (commits a write)"""
+    tmp_path = _path(META_FILE) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'model': EMBED_MODEL, 'dim': _index['dim'], 'count': _index['count']}, f)
+    os.replace(tmp_path, _path(META_FILE))
+    _index['stamp'] = _meta_stamp()
+
+
+def normalize(vectors):
+    """Scale rows to unit length so a dot product is the cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def has_document(key):
+    """Whether a document key (resume text SHA-256) is already indexed"""
+    with _lock, _file_lock():
+        return key in _load()['rows']
+
+
+def add_documents(keys, texts):
+    """
+    Embed and append documents that are not indexed yet
+
+    Args:
+        keys: Document keys (resume text SHA-256)
+        texts: Document texts, parallel to keys
+
+    Returns:
+        Number of documents added
+
+    Raises:
+        LLMError if the embedding model cannot be reached
+    """
+    with _lock, _file_lock():
+        indexed = _load()['rows']
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in indexed and key not in pending:
+                pending[key] = text[:EMBED_MAX_CHARS]
+
+    pending_keys = list(pending)
+    added = 0
+
+    for start in range(0, len(pending_keys), EMBED_BATCH_SIZE):
+        batch = pending_keys[start:start + EMBED_BATCH_SIZE]
+        # Embed outside the lock so searches are not blocked on the model
+        vectors = normalize(embed([pending[key] for key in batch]))
+
+        with _lock, _file_lock(exclusive=True):
+            index = _load()
+            if index['dim'] != vectors.shape[1]:
+                if index['count']:
+                    print(f"Embedding size changed from {index['dim']} to {vectors.shape[1]}, rebuilding index")
+                _reset(vectors.shape[1])
+
+            new = [(key, vector) for key, vector in zip(batch, vectors) if key not in index['rows']]
+            if not new:
+                continue
+
+            needed = index['count'] + len(new)
+            if needed > index['capacity']:
+                _map_vectors(max(needed, index['capacity'] * 2))
+
+            start_row = index['count']
+            index['vectors'][start_row:needed] = np.stack([vector for _, vector in new])
+            index['vectors'].flush()
+
+            _truncate_keys(start_row)
+            with open(_path(KEYS_FILE), 'a') as f:
+                f.write(''.join(f"{key}\n" for key, _ in new))
+            for offset, (key, _) in enumerate(new):
+                index['rows'][key] = start_row + offset
+                index['keys'].append(key)
+
+            index['count'] = needed
+            _write_meta()
+            added += len(new)
+
+    return added
+
+
+def search(query_text, top_k=10):
+    """
+    Find the indexed documents most similar to a query
+
+    Args:
+        query_text: Query (e.g. a job description)
+        top_k: Number of results
+
+    Returns:
+        List of (key, cosine similarity) tuples, most similar first
+    """
+    with _lock, _file_lock():
+        if not _load()['count']:
+            return []
+
+    query = normalize(embed([query_text[:EMBED_MAX_CHARS]]))[0]
+
+    with _lock, _file_lock():
+        index = _load()
+        count = index['count']
+        if not count or index['dim'] != query.shape[0]:
+            return []
+        similarities = index['vectors'][:count] @ query
+        keys = index['keys']
+
+    top_k = min(top_k, count)
+    if top_k <= 0:
+        return []
+    top = np.argpartition(-similarities, top_k - 1)[:top_k]
+    top = top[np.argsort(-similarities[top], kind='stable')]
+    return [(keys[row], float(similarities[row])) for row in top]
+
+
+def get_index_stats():
+    """Number of indexed documents, vector size and model"""
+    with _lock, _file_lock():
+        index = _load()
+        return {'documents': index['count'], 'dim': index['dim'], 'capacity': index['capacity'], 'model': EMBED_MODEL}
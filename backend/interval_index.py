@@ -0,0 +1,133 @@
+"""
+Interval Index
+Per-day sorted index of booked time intervals for fast conflict checks
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+
+class IntervalIndex:
+    """
+    Booked intervals of one calendar, bucketed by day and kept sorted
+    
+    Intervals in a calendar never overlap (a booking is only added after a
+    conflict check), so within a day both the start and end times are
+    sorted and the first interval that can overlap a query is found with
+    one binary search. Intervals spanning midnight are stored in each day
+    they touch.
+    """
+    
+    def __init__(self):
+        # date -> (sorted end times, entries sorted by end: (end, start, key))
+        self._days = {}
+        self._spans = {}
+    
+    def __len__(self):
+        return len(self._spans)
+    
+    def __contains__(self, key):
+        return key in self._spans
+    
+    def add(self, key, start, end):
+        """Add an interval [start, end) under a unique key"""
+        if key in self._spans:
+            self.remove(key)
+        self._spans[key] = (start, end)
+        for day in _days_touched(start, end):
+            ends, entries = self._days.setdefault(day, ([], []))
+            position = bisect_right(ends, end)
+            ends.insert(position, end)
+            entries.insert(position, (end, start, key))
+    
+    def remove(self, key):
+        """Remove an interval; unknown keys are ignored"""
+        span = self._spans.pop(key, None)
+        if span is None:
+            return
+        start, end = span
+        for day in _days_touched(start, end):
+            ends, entries = self._days[day]
+            position = bisect_left(ends, end)
+            while entries[position][2] != key:
+                position += 1
+            del ends[position]
+            del entries[position]
+            if not ends:
+                del self._days[day]
+    
+    def overlapping(self, start, end):
+        """
+        Keys of intervals overlapping [start, end), in start order
+        
+        O(log n + k) per day touched, for k overlapping intervals.
+        """
+        found = []
+        for day in _days_touched(start, end):
+            ends, entries = self._days.get(day, ((), ()))
+            # First interval ending after the query starts
+            position = bisect_right(ends, start)
+            while position < len(entries) and entries[position][1] < end:
+                key = entries[position][2]
+                if key not in found:
+                    found.append(key)
+                position += 1
+        return found
+    
+    def is_free(self, start, end):
+        """True if nothing overlaps [start, end)"""
+        for day in _days_touched(start, end):
+            ends, entries = self._days.get(day, ((), ()))
+            position = bisect_right(ends, start)
+            if position < len(entries) and entries[position][1] < end:
+                return False
+        return True
+    
+    def keys_on(self, day):
+        """Keys of intervals touching a date, in start order"""
+        ends, entries = self._days.get(day, ((), ()))
+        return [key for _, _, key in entries]
+    
+    def free_slots(self, slot_starts, duration):
+        """
+        Filter candidate slot starts down to those that are free
+        
+        Walks the sorted slots and the day's sorted intervals together, so
+        a whole day is checked in one pass.
+        
+        Args:
+            slot_starts: Sorted slot start datetimes
+            duration: Slot length as a timedelta
+        
+        Returns:
+            List of the free slot start datetimes
+        """
+        free = []
+        cursor = {}
+        for slot_start in slot_starts:
+            slot_end = slot_start + duration
+            busy = False
+            for day in _days_touched(slot_start, slot_end):
+                ends, entries = self._days.get(day, ((), ()))
+                position = cursor.get(day, 0)
+                # Intervals ending before this slot cannot block any later slot either
+                while position < len(ends) and ends[position] <= slot_start:
+                    position += 1
+                cursor[day] = position
+                if position < len(entries) and entries[position][1] < slot_end:
+                    busy = True
+                    break
+            if not busy:
+                free.append(slot_start)
+        return free
+
+
+def _days_touched(start, end):
+    """Dates an interval [start, end) falls on"""
+    day = start.date()
+    last = (end - timedelta(microseconds=1)).date() if end > start else day
+    days = [day]
+    while day < last:
+        day += timedelta(days=1)
+        days.append(day)
+    return days
@@ -3,10 +3,17 @@ Interview Question Generator
 Generates role-specific interview questions based on job requirements
 """
 
-import requests
 import json
 
-def generate_interview_questions(job_desc, resume_text, num_questions=5):
+from llm_client import generate
+from metrics import record_fallback
+
+OPTIONS = {
+    'temperature': 0.7,
+    'num_predict': 500
+}
+
+def generate_interview_questions(job_desc, resume_text, num_questions=5, on_token=None):
     """
     Generate interview questions based on job requirements and candidate profile
     
@@ -14,6 +21,7 @@ def generate_interview_questions(job_desc, resume_text, num_questions=5):
         job_desc: Job description text
         resume_text: Candidate resume text
         num_questions: Number of questions to generate (default 5)
+        on_token: Optional callback receiving model output as it streams
     
     Returns:
         List of interview questions with categories
@@ -43,36 +51,19 @@ Focus on:
 """
 
     try:
-        response = requests.post(
-            'http://localhost:11434/api/generate',
-            json={
-                'model': 'recruitment-screener',
-                'prompt': prompt,
-                'stream': False,
-                'options': {
-                    'temperature': 0.7,
-                    'num_predict': 500
-                }
-            },
-            timeout=60
-        )
+        questions_text = generate(prompt, OPTIONS, timeout=60, on_token=on_token)
         
-        if response.status_code == 200:
-            result = response.json()
-            questions_text = result.get('response', '')
-            
-            # Parse questions into structured format
-            questions = parse_questions(questions_text)
-            
-            return {
-                'questions': questions,
-                'raw_output': questions_text
-            }
-        else:
-            return generate_fallback_questions(job_desc)
+        # Parse questions into structured format
+        questions = parse_questions(questions_text)
+        
+        return {
+            'questions': questions,
+            'raw_output': questions_text
+        }
             
     except Exception as e:
         print(f"Error generating questions: {e}")
+        record_fallback('interview_questions', 'model_error')
         return generate_fallback_questions(job_desc)
 
 
@@ -0,0 +1,294 @@
+"""
+Batch Job Queue
+SQLite-backed background queue for batch resume screening
+"""
+
+from datetime import datetime
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from config import BATCH_QUEUE_PATH, BATCH_WORKERS, BATCH_LEASE_SECONDS
+from candidate_ranker import rank_with_summary
+from pipeline import iter_screened
+from candidate_store import save_candidates, requisition_key_for
+from llm_dispatcher import dispatch_as
+
+_local = threading.local()
+_workers = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+
+# Identifies this process in job leases; a job is only taken over once its lease has expired
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    job_desc TEXT NOT NULL,
+    company_values TEXT NOT NULL DEFAULT '',
+    requisition TEXT,
+    total INTEGER NOT NULL,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    worker_id TEXT,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_batch_jobs_status ON batch_jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS batch_job_items (
+    job_id TEXT NOT NULL REFERENCES batch_jobs (id),
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    pdf BLOB,
+    status TEXT NOT NULL DEFAULT 'pending',
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+MIGRATIONS = {
+    'worker_id': "ALTER TABLE batch_jobs ADD COLUMN worker_id TEXT",
+    'lease_expires_at': "ALTER TABLE batch_jobs ADD COLUMN lease_expires_at REAL"
+}
+
+
+def _connect():
+    """Return this thread's connection to the queue database"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(BATCH_QUEUE_PATH), exist_ok=True)
+        conn = sqlite3.connect(BATCH_QUEUE_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        _migrate(conn)
+        _local.conn = conn
+    return conn
+
+
+def _migrate(conn):
+    """Add columns missing from queues created by older versions"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(batch_jobs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(statement)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def submit_batch_job(resumes, job_desc, company_values="", requisition=None):
+    """
+    Queue a batch of resumes for background screening
+    
+    Args:
+        resumes: List of (name, pdf_bytes) tuples in upload order
+        job_desc: Job description text
+        company_values: Company culture description
+        requisition: Optional requisition dict (stored with the job so it
+            survives a restart)
+    
+    Returns:
+        Job ID
+    """
+    job_id = f"JOB-{uuid.uuid4().hex[:12].upper()}"
+    conn = _connect()
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "INSERT INTO batch_jobs (id, status, job_desc, company_values, requisition, total, created_at) "
+            "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+            (job_id, job_desc, company_values, json.dumps(requisition) if requisition else None,
+             len(resumes), datetime.now().isoformat())
+        )
+        conn.executemany(
+            "INSERT INTO batch_job_items (job_id, idx, name, pdf) VALUES (?, ?, ?, ?)",
+            [(job_id, idx, name, pdf) for idx, (name, pdf) in enumerate(resumes)]
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    
+    _wakeup.set()
+    return job_id
+
+
+def get_batch_job_status(job_id, top_n=10):
+    """
+    Get progress and the current (partial) ranking of a batch job
+    
+    Returns:
+        Status dict, or None if the job does not exist
+    """
+    conn = _connect()
+    job = conn.execute("SELECT * FROM batch_jobs WHERE id = ?", (job_id,)).fetchone()
+    if job is None:
+        return None
+    
+    items = conn.execute(
+        "SELECT idx, name, status, result, error FROM batch_job_items WHERE job_id = ? ORDER BY idx",
+        (job_id,)
+    ).fetchall()
+    
+    candidates = [json.loads(item['result']) for item in items if item['status'] == 'done']
+    ranked, summary = rank_with_summary(candidates, {'job_desc': job['job_desc']}, top_k=top_n)
+    
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'total': job['total'],
+        'completed': sum(1 for item in items if item['status'] == 'done'),
+        'failed': sum(1 for item in items if item['status'] == 'failed'),
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'error': job['error'],
+        'items': [
+            {'index': item['idx'], 'name': item['name'], 'status': item['status'], 'error': item['error']}
+            for item in items
+        ],
+        'total_processed': len(candidates),
+        'ranked_candidates': ranked,
+        'summary': summary
+    }
+
+
+def start_workers():
+    """
+    Start the background worker threads (once per process, at app start)
+    
+    Jobs left running by a stopped process are resumed once their lease
+    expires; their finished items are kept and only pending ones are
+    re-screened. Jobs still heartbeating in another process are left alone.
+    """
+    with _workers_lock:
+        if _workers:
+            return
+        
+        for n in range(BATCH_WORKERS):
+            worker = threading.Thread(target=_worker_loop, name=f"batch-worker-{n + 1}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def _worker_loop():
+    """Claim and run queued jobs until the process exits"""
+    while True:
+        try:
+            job_id = _claim_next_job()
+        except sqlite3.Error as e:
+            print(f"Batch queue error: {e}")
+            job_id = None
+        
+        if job_id is None:
+            # Poll occasionally so jobs queued by other processes are picked up too
+            _wakeup.wait(timeout=5)
+            _wakeup.clear()
+            continue
+        
+        _run_job(job_id)
+
+
+def _claim_next_job():
+    """Atomically lease the oldest queued (or abandoned running) job to this process and return its ID"""
+    conn = _connect()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT id FROM batch_jobs WHERE status = 'queued' "
+            "OR (status = 'running' AND COALESCE(lease_expires_at, 0) < ?) ORDER BY created_at LIMIT 1",
+            (now,)
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE batch_jobs SET status = 'running', started_at = COALESCE(started_at, ?), "
+                "worker_id = ?, lease_expires_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), WORKER_ID, now + BATCH_LEASE_SECONDS, row['id'])
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    
+    return row['id'] if row else None
+
+
+def _heartbeat(job_id, stop, lost):
+    """Renew this process's lease on a job until stopped; sets lost if another worker took it over"""
+    while not stop.wait(BATCH_LEASE_SECONDS / 3):
+        try:
+            renewed = _connect().execute(
+                "UPDATE batch_jobs SET lease_expires_at = ? WHERE id = ? AND worker_id = ? AND status = 'running'",
+                (time.time() + BATCH_LEASE_SECONDS, job_id, WORKER_ID)
+            ).rowcount
+        except sqlite3.Error as e:
+            print(f"Error renewing lease of batch job {job_id}: {e}")
+            continue
+        if not renewed:
+            lost.set()
+            return
+
+
+def _run_job(job_id):
+    """Screen the pending resumes of a job, recording each result as it finishes"""
+    conn = _connect()
+    stop = threading.Event()
+    lost = threading.Event()
+    threading.Thread(target=_heartbeat, args=(job_id, stop, lost), daemon=True).start()
+    
+    try:
+        job = conn.execute("SELECT * FROM batch_jobs WHERE id = ?", (job_id,)).fetchone()
+        requisition = json.loads(job['requisition']) if job['requisition'] else None
+        pending = conn.execute(
+            "SELECT idx, name, pdf FROM batch_job_items WHERE job_id = ? AND status = 'pending' ORDER BY idx",
+            (job_id,)
+        ).fetchall()
+        
+        resumes = [(item['name'], bytes(item['pdf'])) for item in pending]
+        screened = iter_screened(resumes, job['job_desc'], job['company_values'], requisition=requisition)
+        
+        requisition_key = requisition_key_for(job['job_desc'], requisition)
+        
+        # Model calls queue behind interactive requests, taking turns with other requisitions
+        with dispatch_as('batch', requisition_key):
+            for position, candidate, error in screened:
+                if lost.is_set():
+                    print(f"Lost the lease on batch job {job_id} to another worker")
+                    return
+                if candidate:
+                    candidate['candidate_id'] = save_candidates([candidate], requisition_key)[0]
+                # The PDF is no longer needed once its result is stored
+                conn.execute(
+                    "UPDATE batch_job_items SET status = ?, result = ?, error = ?, pdf = NULL WHERE job_id = ? AND idx = ?",
+                    ('done' if candidate else 'failed', json.dumps(candidate) if candidate else None,
+                     error, job_id, pending[position]['idx'])
+                )
+        
+        conn.execute(
+            "UPDATE batch_jobs SET status = 'completed', finished_at = ?, lease_expires_at = NULL "
+            "WHERE id = ? AND worker_id = ?",
+            (datetime.now().isoformat(), job_id, WORKER_ID)
+        )
+    except Exception as e:
+        print(f"Batch job {job_id} failed: {e}")
+        conn.execute(
+            "UPDATE batch_jobs SET status = 'failed', error = ?, finished_at = ?, lease_expires_at = NULL "
+            "WHERE id = ? AND worker_id = ?",
+            (str(e), datetime.now().isoformat(), job_id, WORKER_ID)
+        )
+    finally:
+        stop.set()
@@ -0,0 +1,190 @@
+"""
+LLM Result Cache
+Persistent SQLite cache of model outputs keyed by model, options and prompt hash
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES
+
+_connection = None
+_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+# Columns added after the first release, applied to existing caches on open
+MIGRATIONS = {
+    'tag': "ALTER TABLE llm_cache ADD COLUMN tag TEXT"
+}
+
+
+def _get_connection():
+    """Open the cache database on first use (caller must hold _lock)"""
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+        _connection = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False, timeout=30)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                tag TEXT
+            )
+        """)
+        columns = {row[1] for row in _connection.execute("PRAGMA table_info(llm_cache)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                _connection.execute(statement)
+        _connection.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        _connection.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_tag ON llm_cache (tag)")
+        _connection.commit()
+    return _connection
+
+
+def make_cache_key(model, prompt, options=None):
+    """
+    Build a content-addressed cache key
+    
+    Args:
+        model: Model name
+        prompt: Full prompt text
+        options: Generation options dict (temperature, num_predict, ...)
+    
+    Returns:
+        Hex SHA-256 digest identifying this exact generation request
+    """
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    payload = json.dumps({'model': model, 'options': options or {}, 'prompt': prompt_hash}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached(key):
+    """Return the cached response for a key, or None on a miss or expired entry"""
+    if not LLM_CACHE_ENABLED:
+        return None
+    
+    now = time.time()
+    with _lock:
+        try:
+            conn = _get_connection()
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row and now - row[1] <= LLM_CACHE_TTL_SECONDS:
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+                _counters['hits'] += 1
+                return row[0]
+            
+            if row:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"LLM cache read failed: {e}")
+        
+        _counters['misses'] += 1
+        return None
+
+
+def store_cached(key, model, response, tag=None):
+    """
+    Store a model response, evicting least recently used entries over the size limit
+    
+    Args:
+        key: Cache key (see make_cache_key)
+        model: Model name
+        response: Model output text
+        tag: Optional label for finding the entry again without its prompt (see delete_tagged)
+    """
+    if not LLM_CACHE_ENABLED or not response:
+        return
+    
+    now = time.time()
+    with _lock:
+        try:
+            conn = _get_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_access, tag) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, now, now, tag)
+            )
+            
+            overflow = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - LLM_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                _counters['evictions'] += overflow
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"LLM cache write failed: {e}")
+
+
+def delete_cached(key):
+    """Remove a single cached response"""
+    with _lock:
+        try:
+            conn = _get_connection()
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"LLM cache delete failed: {e}")
+
+
+def delete_tagged(tag, prefix=False):
+    """
+    Remove cached responses by tag
+    
+    Args:
+        tag: Tag given to store_cached
+        prefix: Match every tag starting with tag instead of the exact tag
+    
+    Returns:
+        Distinct tags of the removed entries
+    """
+    condition, value = ("substr(tag, 1, ?) = ?", (len(tag), tag)) if prefix else ("tag = ?", (tag,))
+    with _lock:
+        try:
+            conn = _get_connection()
+            tags = [row[0] for row in conn.execute(f"SELECT DISTINCT tag FROM llm_cache WHERE {condition}", value)]
+            conn.execute(f"DELETE FROM llm_cache WHERE {condition}", value)
+            conn.commit()
+            return tags
+        except sqlite3.Error as e:
+            print(f"LLM cache delete failed: {e}")
+            return []
+
+
+def clear_cache():
+    """Remove every cached response"""
+    with _lock:
+        conn = _get_connection()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+
+
+def get_cache_stats():
+    """Return hit/miss counters and current cache size"""
+    with _lock:
+        stats = dict(_counters)
+        try:
+            stats['entries'] = _get_connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        except sqlite3.Error:
+            stats['entries'] = None
+    
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+    stats['enabled'] = LLM_CACHE_ENABLED
+    stats['max_entries'] = LLM_CACHE_MAX_ENTRIES
+    stats['ttl_seconds'] = LLM_CACHE_TTL_SECONDS
+    return stats
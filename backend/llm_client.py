@@ -0,0 +1,233 @@
+"""
+LLM Client
+Shared, connection-pooled client for the Ollama HTTP API
+"""
+
+from contextlib import contextmanager
+import json
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (OLLAMA_BASE_URL, LLM_MODEL, LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT,
+                    LLM_MAX_RETRIES, LLM_POOL_SIZE, EMBED_MODEL)
+from llm_cache import make_cache_key, get_cached, store_cached
+from llm_dispatcher import QueueFull, get_dispatcher
+from metrics import record_llm_call
+
+
+class LLMError(Exception):
+    """Raised when the model backend cannot produce a response"""
+
+
+class LLMOverloaded(LLMError):
+    """Raised when the dispatcher has no model slot for a request; retry_after is in seconds"""
+    
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _build_session():
+    """Create a keep-alive session that retries transient failures with backoff"""
+    retry = Retry(
+        total=LLM_MAX_RETRIES,
+        connect=LLM_MAX_RETRIES,
+        read=0,  # Never re-send a request the model may already be working on
+        status=LLM_MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset(['POST']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=LLM_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_session = _build_session()
+
+
+def cache_key_for(prompt, options=None, model=None):
+    """Cache key used for a prompt sent through this client"""
+    return make_cache_key(model or LLM_MODEL, prompt, options)
+
+
+def generate(prompt, options=None, timeout=None, on_token=None, model=None, format=None, validate=None,
+             cache_tag=None):
+    """
+    Run a completion through /api/generate
+    
+    Args:
+        prompt: Prompt text
+        options: Model options (temperature, num_predict, ...)
+        timeout: Read timeout in seconds (default LLM_READ_TIMEOUT)
+        on_token: Optional callback receiving output as it streams
+        model: Model name (default LLM_MODEL)
+        format: Optional output format, "json" or a JSON schema dict
+        validate: Optional callable run on the text before it is cached; a
+            ValueError it raises propagates and the output is not cached
+        cache_tag: Optional tag stored with the cached output (see llm_cache.delete_tagged)
+    
+    Returns:
+        Generated text
+    """
+    return _complete('/api/generate', {'prompt': prompt}, prompt, options, timeout, on_token, model, format,
+                     validate, lambda chunk: chunk.get('response', ''), 'generate', cache_tag)
+
+
+def chat(prompt, options=None, timeout=None, on_token=None, model=None, format=None, validate=None,
+         cache_tag=None):
+    """Run a single-turn completion through /api/chat (same arguments as generate)"""
+    return _complete('/api/chat', {'messages': [{'role': 'user', 'content': prompt}]}, prompt, options,
+                     timeout, on_token, model, format, validate,
+                     lambda chunk: chunk.get('message', {}).get('content', ''), 'chat', cache_tag)
+
+
+def _complete(path, body, prompt, options, timeout, on_token, model, format, validate, extract, endpoint,
+              cache_tag=None):
+    """Serve a completion from the cache, or call the model and cache the result"""
+    model = model or LLM_MODEL
+    cache_key = make_cache_key(model, prompt, dict(options or {}, format=format) if format else options)
+    
+    cached = get_cached(cache_key)
+    if cached is not None:
+        record_llm_call(endpoint, model, 'cache_hit')
+        if on_token:
+            on_token(cached)
+        return cached
+    
+    payload = dict(body, model=model, stream=bool(on_token), options=options or {})
+    if format:
+        payload['format'] = format
+    
+    started = time.perf_counter()
+    try:
+        with _model_slot(endpoint, model):
+            content, usage = _request_completion(path, payload, timeout, on_token, extract)
+    except LLMOverloaded:
+        raise
+    except LLMError:
+        record_llm_call(endpoint, model, 'error', time.perf_counter() - started)
+        raise
+    record_llm_call(endpoint, model, 'ok', time.perf_counter() - started, usage)
+    
+    if validate:
+        validate(content)
+    
+    store_cached(cache_key, model, content, cache_tag)
+    return content
+
+
+@contextmanager
+def _model_slot(endpoint, model):
+    """Hold a dispatcher slot around a model request (priority and requisition come from the caller's context)"""
+    try:
+        get_dispatcher().acquire()
+    except QueueFull as e:
+        record_llm_call(endpoint, model, 'rejected')
+        raise LLMOverloaded(str(e), e.retry_after) from e
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        get_dispatcher().release(time.perf_counter() - started)
+
+
+def _request_completion(path, payload, timeout, on_token, extract):
+    """
+    POST a completion request
+    
+    Returns:
+        Tuple of (content, final response object carrying Ollama's
+        prompt_eval_count / eval_count / eval_duration)
+    """
+    try:
+        response = _session.post(
+            f"{OLLAMA_BASE_URL}{path}",
+            json=payload,
+            timeout=(LLM_CONNECT_TIMEOUT, timeout or LLM_READ_TIMEOUT),
+            stream=bool(on_token)
+        )
+    except requests.RequestException as e:
+        raise LLMError(f"Model request failed: {e}") from e
+    
+    with response:
+        if response.status_code != 200:
+            raise LLMError(f"Model returned HTTP {response.status_code}: {response.text[:200]}")
+        
+        try:
+            if on_token:
+                # Streaming responses arrive as one JSON object per line; the last one carries the counts
+                parts = []
+                usage = {}
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    token = extract(chunk)
+                    parts.append(token)
+                    on_token(token)
+                    if chunk.get('done'):
+                        usage = chunk
+                return ''.join(parts), usage
+            
+            data = response.json()
+            return extract(data), data
+        except (requests.RequestException, ValueError) as e:
+            raise LLMError(f"Model response was interrupted or malformed: {e}") from e
+
+
+def embed(texts, model=None, timeout=None):
+    """
+    Embed texts through /api/embed
+    
+    Args:
+        texts: List of input strings (sent in one request)
+        model: Embedding model name (default EMBED_MODEL)
+        timeout: Read timeout in seconds (default LLM_READ_TIMEOUT)
+    
+    Returns:
+        List of embedding vectors, one per input
+    """
+    model = model or EMBED_MODEL
+    started = time.perf_counter()
+    try:
+        with _model_slot('embed', model):
+            embeddings, usage = _request_embeddings(texts, model, timeout)
+    except LLMOverloaded:
+        raise
+    except LLMError:
+        record_llm_call('embed', model, 'error', time.perf_counter() - started)
+        raise
+    record_llm_call('embed', model, 'ok', time.perf_counter() - started, usage)
+    return embeddings
+
+
+def _request_embeddings(texts, model, timeout):
+    """POST an embedding request, returning (embeddings, response object)"""
+    try:
+        response = _session.post(
+            f"{OLLAMA_BASE_URL}/api/embed",
+            json={'model': model, 'input': list(texts)},
+            timeout=(LLM_CONNECT_TIMEOUT, timeout or LLM_READ_TIMEOUT)
+        )
+    except requests.RequestException as e:
+        raise LLMError(f"Embedding request failed: {e}") from e
+    
+    with response:
+        if response.status_code != 200:
+            raise LLMError(f"Model returned HTTP {response.status_code}: {response.text[:200]}")
+        try:
+            data = response.json()
+            embeddings = data['embeddings']
+        except (ValueError, KeyError) as e:
+            raise LLMError(f"Embedding response was malformed: {e}") from e
+    
+    if len(embeddings) != len(texts):
+        raise LLMError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+    return embeddings, data
@@ -0,0 +1,198 @@
+"""
+LLM Dispatcher
+Bounded in-flight limit, priority classes and per-requisition fair queuing for model requests
+"""
+
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+import contextvars
+import math
+import threading
+import time
+
+from config import LLM_MAX_IN_FLIGHT, LLM_QUEUE_MAX, LLM_QUEUE_TIMEOUT
+from metrics import inc, observe, register_collector
+
+# Highest priority first; a slot always goes to the most urgent class with waiters
+PRIORITIES = ('interactive', 'batch', 'background')
+DEFAULT_PRIORITY = 'interactive'
+DEFAULT_FLOW = 'default'
+
+# Assumed seconds per model request until real ones have been timed (for Retry-After)
+INITIAL_SERVICE_SECONDS = 5.0
+
+_dispatch = contextvars.ContextVar('llm_dispatch', default=(DEFAULT_PRIORITY, DEFAULT_FLOW))
+
+
+class QueueFull(Exception):
+    """Raised when a request cannot get a model slot; retry_after is a suggested wait in seconds"""
+    
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def set_dispatch(priority=DEFAULT_PRIORITY, flow=None):
+    """Set the priority class and fair-queuing flow (requisition key) for the current request"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of: {', '.join(PRIORITIES)}")
+    return _dispatch.set((priority, flow or DEFAULT_FLOW))
+
+
+@contextmanager
+def dispatch_as(priority, flow=None):
+    """Run a block (and threads started with metrics.in_context inside it) under a priority and flow"""
+    token = set_dispatch(priority, flow)
+    try:
+        yield
+    finally:
+        _dispatch.reset(token)
+
+
+def current_dispatch():
+    """(priority, flow) of the current request"""
+    return _dispatch.get()
+
+
+class LLMDispatcher:
+    """
+    Admission control in front of the model backend
+    
+    At most max_in_flight requests run at once. Others wait in one queue
+    per priority class; inside a class, flows (one per requisition) take
+    turns so a large batch cannot starve a smaller one. Once a class has
+    max_queue requests waiting, check_admission turns new work away
+    before it starts; calls of work already admitted always queue, so a
+    request is never left half-answered.
+    
+    Args:
+        max_in_flight: Concurrent model requests
+        max_queue: Waiting requests per priority class
+        queue_timeout: Longest wait for a slot in seconds
+    """
+    
+    def __init__(self, max_in_flight, max_queue, queue_timeout):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}  # flow -> deque of waiters
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        self._service_seconds = INITIAL_SERVICE_SECONDS
+        self._lock = threading.Lock()
+    
+    def _retry_after(self, priority):
+        """Seconds until the queue ahead of a new request in this class should have drained"""
+        ahead = self.in_flight + sum(
+            self._waiting[other] for other in PRIORITIES[:PRIORITIES.index(priority) + 1]
+        )
+        return max(1, math.ceil(self._service_seconds * ahead / self.max_in_flight))
+    
+    def check_admission(self, priority=None):
+        """Raise QueueFull if a new request in this class would be rejected (used before doing any work)"""
+        priority = priority or current_dispatch()[0]
+        with self._lock:
+            if self._waiting[priority] >= self.max_queue:
+                inc('hr_llm_queue_rejections_total', {'priority': priority})
+                raise QueueFull(f"Model queue is full ({priority})", self._retry_after(priority))
+    
+    def acquire(self, priority=None, flow=None):
+        """
+        Wait for a model slot
+        
+        Args:
+            priority: Priority class (default from the current request)
+            flow: Fair-queuing flow, e.g. a requisition key (default from the current request)
+        
+        Raises:
+            QueueFull if no slot freed up within queue_timeout
+        """
+        default_priority, default_flow = current_dispatch()
+        priority = priority or default_priority
+        flow = flow or default_flow
+        started = time.perf_counter()
+        
+        with self._lock:
+            if self.in_flight < self.max_in_flight and not any(self._waiting.values()):
+                self.in_flight += 1
+                observe('hr_llm_queue_wait_seconds', 0.0, {'priority': priority})
+                return
+            
+            granted = threading.Event()
+            self._queues[priority].setdefault(flow, deque()).append(granted)
+            self._waiting[priority] += 1
+        
+        granted.wait(self.queue_timeout)
+        
+        with self._lock:
+            # The slot may have been handed over between the timeout and taking the lock
+            if not granted.is_set():
+                waiters = self._queues[priority][flow]
+                waiters.remove(granted)
+                if not waiters:
+                    del self._queues[priority][flow]
+                self._waiting[priority] -= 1
+                inc('hr_llm_queue_timeouts_total', {'priority': priority})
+                raise QueueFull(
+                    f"No model slot within {self.queue_timeout}s ({priority})", self._retry_after(priority)
+                )
+        observe('hr_llm_queue_wait_seconds', time.perf_counter() - started, {'priority': priority})
+    
+    def release(self, seconds=None):
+        """Free a slot, handing it to the next waiter; seconds is how long it was held"""
+        with self._lock:
+            if seconds is not None:
+                self._service_seconds = 0.8 * self._service_seconds + 0.2 * seconds
+            
+            for priority in PRIORITIES:
+                flows = self._queues[priority]
+                if not flows:
+                    continue
+                # Round robin: serve the flow at the head, then send it to the back
+                flow, waiters = next(iter(flows.items()))
+                granted = waiters.popleft()
+                if waiters:
+                    flows.move_to_end(flow)
+                else:
+                    del flows[flow]
+                self._waiting[priority] -= 1
+                granted.set()  # The slot passes on, in_flight is unchanged
+                return
+            
+            self.in_flight -= 1
+    
+    def get_stats(self):
+        with self._lock:
+            return {
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'queued': dict(self._waiting),
+                'flows': {priority: len(flows) for priority, flows in self._queues.items()},
+                'avg_service_seconds': round(self._service_seconds, 3)
+            }
+
+
+_dispatcher = LLMDispatcher(LLM_MAX_IN_FLIGHT, LLM_QUEUE_MAX, LLM_QUEUE_TIMEOUT)
+
+
+def get_dispatcher():
+    """The process-wide dispatcher all model requests go through"""
+    return _dispatcher
+
+
+def get_dispatcher_stats():
+    """In-flight count, queue depth per priority class and average request time"""
+    return _dispatcher.get_stats()
+
+
+def collect_dispatcher_metrics():
+    stats = _dispatcher.get_stats()
+    samples = [('hr_llm_in_flight', 'gauge', 'Model requests currently running', {}, stats['in_flight'])]
+    for priority, queued in stats['queued'].items():
+        samples.append(('hr_llm_queue_depth', 'gauge', 'Model requests waiting for a slot',
+                        {'priority': priority}, queued))
+    return samples
+
+
+register_collector(collect_dispatcher_metrics)
@@ -0,0 +1,227 @@
+"""
+Metrics
+In-process instrumentation: stage latency, model tokens, cache hits and fallbacks, exported for Prometheus
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+
+# Histogram buckets in seconds, from sub-millisecond stages up to slow model calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# name -> (type, help text)
+METRICS = {
+    'hr_stage_duration_seconds': ('histogram', 'Wall time of pipeline stages'),
+    'hr_stage_fallbacks_total': ('counter', 'Stages that fell back to a default result'),
+    'hr_llm_requests_total': ('counter', 'Model requests by endpoint and outcome'),
+    'hr_llm_request_duration_seconds': ('histogram', 'Wall time of model requests (cache misses)'),
+    'hr_llm_prompt_tokens_total': ('counter', 'Prompt tokens evaluated by the model (prompt_eval_count)'),
+    'hr_llm_eval_tokens_total': ('counter', 'Tokens generated by the model (eval_count)'),
+    'hr_llm_eval_seconds_total': ('counter', 'Time the model spent generating tokens (eval_duration)'),
+    'hr_llm_queue_wait_seconds': ('histogram', 'Time model requests waited for a dispatcher slot'),
+    'hr_llm_queue_rejections_total': ('counter', 'Requests turned away (429) because their model priority queue was full'),
+    'hr_llm_queue_timeouts_total': ('counter', 'Model requests that gave up waiting for a dispatcher slot'),
+    'hr_http_requests_total': ('counter', 'HTTP requests by endpoint and status'),
+    'hr_http_request_duration_seconds': ('histogram', 'Wall time of HTTP requests')
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_collectors = []  # Callables returning [(name, type, help, labels dict, value)] at scrape time
+
+_trace = contextvars.ContextVar('request_trace', default=None)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def inc(name, labels=None, amount=1):
+    """Add to a counter"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, labels=None):
+    """Record a value in a histogram"""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        histogram[bisect_left(LATENCY_BUCKETS, value)] += 1
+        histogram[-1] += value
+
+
+def register_collector(collector):
+    """Add a callable whose samples (e.g. cache counters kept elsewhere) are read at scrape time"""
+    _collectors.append(collector)
+
+
+class RequestTrace:
+    """Stage timings, model usage and fallbacks of one request"""
+    
+    def __init__(self):
+        self.stages = {}
+        self.fallbacks = []
+        self.llm = {'calls': 0, 'cache_hits': 0, 'prompt_tokens': 0, 'eval_tokens': 0, 'seconds': 0.0}
+        self._lock = threading.Lock()
+    
+    def to_dict(self):
+        with self._lock:
+            return {
+                'stages': dict(self.stages),
+                'llm': dict(self.llm, seconds=round(self.llm['seconds'], 3)),
+                'fallbacks': list(self.fallbacks)
+            }
+
+
+def start_trace():
+    """Begin collecting a trace for the current request (threads started via in_context share it)"""
+    trace = RequestTrace()
+    _trace.set(trace)
+    return trace
+
+
+def current_trace():
+    """The trace of the current request, or None"""
+    return _trace.get()
+
+
+def in_context(fn):
+    """Wrap a callable so it runs with the caller's trace when submitted to a thread pool"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def timed(stage, fn):
+    """Wrap a callable so each call is recorded as a stage, with the caller's trace (for thread pools)"""
+    def run(*args, **kwargs):
+        with stage_timer(stage):
+            return fn(*args, **kwargs)
+    return in_context(run)
+
+
+def record_stage(stage, seconds):
+    """Record the wall time of a pipeline stage"""
+    observe('hr_stage_duration_seconds', seconds, {'stage': stage})
+    trace = _trace.get()
+    if trace:
+        with trace._lock:
+            trace.stages[stage] = round(seconds, 3)
+
+
+@contextmanager
+def stage_timer(stage):
+    """Time a block as a pipeline stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def record_fallback(stage, reason):
+    """Count a stage that returned its fallback result (reason: deadline, error, model_error, ...)"""
+    inc('hr_stage_fallbacks_total', {'stage': stage, 'reason': reason})
+    trace = _trace.get()
+    if trace:
+        with trace._lock:
+            trace.fallbacks.append({'stage': stage, 'reason': reason})
+
+
+def record_llm_call(endpoint, model, outcome, seconds=None, usage=None):
+    """
+    Record one model request
+    
+    Args:
+        endpoint: 'generate', 'chat' or 'embed'
+        model: Model name
+        outcome: 'ok', 'cache_hit', 'error' or 'rejected' (no dispatcher slot)
+        seconds: Wall time (cache misses only)
+        usage: Final Ollama response with prompt_eval_count, eval_count and eval_duration (ns)
+    """
+    labels = {'endpoint': endpoint, 'model': model}
+    inc('hr_llm_requests_total', dict(labels, outcome=outcome))
+    if seconds is not None:
+        observe('hr_llm_request_duration_seconds', seconds, labels)
+    
+    usage = usage or {}
+    prompt_tokens = usage.get('prompt_eval_count') or 0
+    eval_tokens = usage.get('eval_count') or 0
+    if prompt_tokens:
+        inc('hr_llm_prompt_tokens_total', {'model': model}, prompt_tokens)
+    if eval_tokens:
+        inc('hr_llm_eval_tokens_total', {'model': model}, eval_tokens)
+    if usage.get('eval_duration'):
+        inc('hr_llm_eval_seconds_total', {'model': model}, usage['eval_duration'] / 1e9)
+    
+    trace = _trace.get()
+    if trace:
+        with trace._lock:
+            trace.llm['calls'] += 1
+            trace.llm['cache_hits'] += outcome == 'cache_hit'
+            trace.llm['prompt_tokens'] += prompt_tokens
+            trace.llm['eval_tokens'] += eval_tokens
+            trace.llm['seconds'] += seconds or 0.0
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(value) for key, value in _histograms.items()}
+    
+    samples = {}
+    for (name, labels), value in counters.items():
+        samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    
+    for (name, labels), histogram in histograms.items():
+        lines = samples.setdefault(name, [])
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram[:-1]):
+            cumulative += count
+            le = bound if bound == '+Inf' else repr(float(bound))
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram[-1])}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    
+    metadata = dict(METRICS)
+    for collector in _collectors:
+        try:
+            collected = collector()
+        except Exception as e:
+            print(f"Error collecting metrics: {e}")
+            continue
+        for name, metric_type, help_text, labels, value in collected:
+            metadata.setdefault(name, (metric_type, help_text))
+            samples.setdefault(name, []).append(
+                f"{name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}"
+            )
+    
+    output = []
+    for name in sorted(samples):
+        metric_type, help_text = metadata[name]
+        output.append(f"# HELP {name} {help_text}")
+        output.append(f"# TYPE {name} {metric_type}")
+        output.extend(samples[name])
+    return '\n'.join(output) + '\n'
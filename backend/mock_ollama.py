@@ -0,0 +1,217 @@
+"""
+Mock Ollama Server
+Local stand-in for /api/generate, /api/chat and /api/embed with configurable latency and token rate
+"""
+
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import json
+import random
+import threading
+import time
+import zlib
+
+# Free-text answer laid out the way the skill match, culture fit and question parsers expect
+RESPONSE_TEXT = """## Match Score: {score}/100
+
+## Domain Check:
+Resume field: Web Development
+Job field: Web Development
+Match: YES
+
+## Skills Checklist:
+✓ React - Present
+✓ JavaScript - Present
+✗ GraphQL - Missing
+
+**Final Score: {score}/100**
+
+Culture Fit Score: {score}/100
+
+**Technical Skills:**
+1. Walk us through the architecture of a recent project you built end to end.
+2. How do you decide between client-side and server-side rendering?
+**Behavioral:**
+3. Tell us about a time you disagreed with a teammate on a technical decision.
+4. Describe how you handle shifting priorities close to a deadline.
+5. What would you want to learn in your first three months here?
+
+## Verdict:
+MODERATE MATCH
+
+## One-line Recommendation:
+Proceed to a technical interview."""
+
+EMBEDDING_DIMENSIONS = 64
+
+
+def score_for(text):
+    """Stable pseudo-random score per prompt, so rankings are not all ties"""
+    return 50 + zlib.crc32(text.encode('utf-8')) % 46
+
+
+def sample_json(schema, score):
+    """Build a value satisfying a JSON schema (the subset the structured prompts use)"""
+    if 'enum' in schema:
+        return schema['enum'][0]
+    kind = schema.get('type')
+    if kind == 'object':
+        return {name: sample_json(prop, score) for name, prop in schema.get('properties', {}).items()}
+    if kind == 'array':
+        return [sample_json(schema.get('items', {}), score) for _ in range(3)]
+    if kind == 'integer':
+        return max(schema.get('minimum', score), min(schema.get('maximum', score), score))
+    if kind == 'number':
+        return score / 100
+    if kind == 'boolean':
+        return True
+    return 'Sample answer from the mock model'
+
+
+def embed_text(text):
+    """Deterministic unit-free vector per text"""
+    rng = random.Random(zlib.crc32(text.encode('utf-8')))
+    return [rng.uniform(-1, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Serves one Ollama API request; timing comes from the server's settings"""
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json({'models': [{'name': self.server.model}]})
+        else:
+            self._send_json({'error': 'not found'}, 404)
+    
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError:
+            self._send_json({'error': 'invalid JSON'}, 400)
+            return
+        
+        self.server.count(self.path)
+        if self.path == '/api/embed':
+            texts = body.get('input')
+            texts = texts if isinstance(texts, list) else [texts or '']
+            time.sleep(self.server.latency / 4)
+            self._send_json({'model': body.get('model'), 'embeddings': [embed_text(text) for text in texts]})
+        elif self.path in ('/api/generate', '/api/chat'):
+            self._complete(body)
+        else:
+            self._send_json({'error': 'not found'}, 404)
+    
+    def _complete(self, body):
+        chat = self.path == '/api/chat'
+        prompt = json.dumps(body['messages']) if chat else body.get('prompt', '')
+        score = score_for(prompt)
+        if isinstance(body.get('format'), dict):
+            text = json.dumps(sample_json(body['format'], score))
+        else:
+            text = RESPONSE_TEXT.format(score=score)
+        tokens = text.split(' ')
+        tokens = [token + ' ' for token in tokens[:-1]] + tokens[-1:]
+        
+        def message(content, done):
+            chunk = {'model': body.get('model'), 'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ'), 'done': done}
+            if chat:
+                chunk['message'] = {'role': 'assistant', 'content': content}
+            else:
+                chunk['response'] = content
+            if done:
+                eval_seconds = len(tokens) / self.server.tokens_per_second
+                chunk.update(
+                    done_reason='stop',
+                    prompt_eval_count=max(1, len(prompt) // 4),
+                    eval_count=len(tokens),
+                    eval_duration=int(eval_seconds * 1e9),
+                    total_duration=int((self.server.latency + eval_seconds) * 1e9)
+                )
+            return chunk
+        
+        time.sleep(self.server.latency)
+        if body.get('stream', True):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for token in tokens:
+                time.sleep(1 / self.server.tokens_per_second)
+                self._send_chunk(message(token, False))
+            self._send_chunk(message('', True))
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            time.sleep(len(tokens) / self.server.tokens_per_second)
+            self._send_json(message(text, True))
+    
+    def _send_chunk(self, data):
+        line = (json.dumps(data) + '\n').encode('utf-8')
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+        self.wfile.flush()
+    
+    def _send_json(self, data, status=200):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class MockOllamaServer(ThreadingHTTPServer):
+    """
+    Threaded mock server
+    
+    Args:
+        address: (host, port) to listen on (port 0 picks a free one)
+        latency: Seconds before the first token (prompt evaluation)
+        tokens_per_second: Generation rate of response tokens
+        model: Model name reported by /api/tags
+    """
+    daemon_threads = True
+    
+    def __init__(self, address, latency=0.2, tokens_per_second=50.0, model='recruitment-screener'):
+        super().__init__(address, MockOllamaHandler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.model = model
+        self.requests = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+
+def start_mock_server(host='127.0.0.1', port=0, latency=0.2, tokens_per_second=50.0):
+    """Run a mock server on a background thread; call shutdown() on the result to stop it"""
+    server = MockOllamaServer((host, port), latency, tokens_per_second)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mock Ollama server for offline benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=50.0, help='generation rate')
+    args = parser.parse_args()
+    if args.tokens_per_second <= 0 or args.latency < 0:
+        parser.error('--tokens-per-second must be positive and --latency non-negative')
+    
+    server = MockOllamaServer((args.host, args.port), args.latency, args.tokens_per_second)
+    print(f"Mock Ollama listening on {server.url} (latency {args.latency}s, {args.tokens_per_second} tokens/s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
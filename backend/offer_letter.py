@@ -4,97 +4,71 @@ Generates professional offer letters for selected candidates
 """
 
 from datetime import datetime, timedelta
-
-def generate_offer_letter(candidate_data, job_details, salary_data, company_info=None):
-    """
-    Generate a professional offer letter
-    
-    Args:
-        candidate_data: Dict with name, email, address
-        job_details: Dict with title, department, start_date, manager
-        salary_data: Dict with salary, bonus, equity, benefits
-        company_info: Dict with company name, address, HR contact
-    
-    Returns:
-        Formatted offer letter text
-    """
-    
-    # Default company info
-    if not company_info:
-        company_info = {
-            'name': 'TechCorp Inc.',
-            'address': '123 Innovation Drive, Tech City, TC 12345',
-            'hr_contact': 'hr@techcorp.com',
-            'hr_phone': '(555) 123-4567'
-        }
-    
-    # Calculate start date if not provided
-    if 'start_date' not in job_details or not job_details['start_date']:
-        start_date = (datetime.now() + timedelta(days=14)).strftime("%B %d, %Y")
-    else:
-        start_date = job_details['start_date']
-    
-    offer_date = datetime.now().strftime("%B %d, %Y")
-    
-    # Format salary with commas
-    annual_salary = f"${salary_data.get('salary', 100000):,}"
-    signing_bonus = salary_data.get('signing_bonus', 0)
-    bonus_text = f" plus a signing bonus of ${signing_bonus:,}" if signing_bonus > 0 else ""
-    
-    # Generate equity info if provided
-    equity = salary_data.get('equity', {})
-    equity_text = ""
-    if equity and equity.get('shares', 0) > 0:
-        equity_text = f"""
-**Equity Compensation:**
-You will be granted {equity.get('shares', 0):,} stock options at a strike price of ${equity.get('strike_price', 0):.2f} per share, subject to a {equity.get('vesting_schedule', '4-year vesting schedule with 1-year cliff')}.
-"""
-    
-    # Benefits section
-    benefits = salary_data.get('benefits', [])
-    if not benefits:
-        benefits = [
-            "Comprehensive health, dental, and vision insurance",
-            "401(k) retirement plan with company match",
-            "Flexible PTO policy",
-            "Professional development stipend",
-            "Remote work options"
-        ]
-    
-    benefits_list = "\n".join([f"• {benefit}" for benefit in benefits])
-    
-    # Generate offer letter
-    offer_letter = f"""
-{'='*80}
+from string import Formatter
+import io
+import json
+import os
+import re
+import threading
+import uuid
+import zipfile
+
+from config import OFFER_TEMPLATE_DIR
+
+DEFAULT_COMPANY_INFO = {
+    'name': 'TechCorp Inc.',
+    'address': '123 Innovation Drive, Tech City, TC 12345',
+    'hr_contact': 'hr@techcorp.com',
+    'hr_phone': '(555) 123-4567'
+}
+
+DEFAULT_BENEFITS = [
+    "Comprehensive health, dental, and vision insurance",
+    "401(k) retirement plan with company match",
+    "Flexible PTO policy",
+    "Professional development stipend",
+    "Remote work options"
+]
+
+# Fields a template may reference, e.g. {candidate_name}
+TEMPLATE_FIELDS = frozenset("""
+rule offer_date accept_by company_name company_address hr_contact hr_phone
+candidate_name candidate_email candidate_first_name candidate_signature_name
+job_title department manager start_date employment_type location
+annual_salary bonus_text payment_schedule performance_bonus equity_text benefits_list
+""".split())
+
+DEFAULT_TEMPLATE = """
+{rule}
                               EMPLOYMENT OFFER LETTER
-{'='*80}
+{rule}
 
-**{company_info['name']}**
-{company_info['address']}
+**{company_name}**
+{company_address}
 
 **Date:** {offer_date}
 
-**To:** {candidate_data.get('name', 'Candidate Name')}
-**Email:** {candidate_data.get('email', 'candidate@email.com')}
+**To:** {candidate_name}
+**Email:** {candidate_email}
 
-Dear {candidate_data.get('name', 'Candidate').split()[0]},
+Dear {candidate_first_name},
 
-We are pleased to extend to you an offer of employment with {company_info['name']} for the position of **{job_details.get('title', 'Software Engineer')}** in our {job_details.get('department', 'Engineering')} department.
+We are pleased to extend to you an offer of employment with {company_name} for the position of **{job_title}** in our {department} department.
 
 **Position Details:**
 
-• **Job Title:** {job_details.get('title', 'Software Engineer')}
-• **Department:** {job_details.get('department', 'Engineering')}
-• **Reports To:** {job_details.get('manager', 'Engineering Manager')}
+• **Job Title:** {job_title}
+• **Department:** {department}
+• **Reports To:** {manager}
 • **Start Date:** {start_date}
-• **Employment Type:** {job_details.get('employment_type', 'Full-time')}
-• **Location:** {job_details.get('location', 'Hybrid - Office/Remote')}
+• **Employment Type:** {employment_type}
+• **Location:** {location}
 
 **Compensation:**
 
 • **Annual Salary:** {annual_salary}{bonus_text}
-• **Payment Schedule:** {salary_data.get('payment_schedule', 'Bi-weekly')}
-• **Performance Bonus:** {salary_data.get('performance_bonus', 'Eligible for annual performance-based bonus up to 15% of base salary')}
+• **Payment Schedule:** {payment_schedule}
+• **Performance Bonus:** {performance_bonus}
 {equity_text}
 
 **Benefits Package:**
@@ -103,7 +77,7 @@ We are pleased to extend to you an offer of employment with {company_info['name'
 
 **Employment Terms:**
 
-This is an at-will employment relationship, meaning either you or {company_info['name']} may terminate the relationship at any time, with or without cause or notice.
+This is an at-will employment relationship, meaning either you or {company_name} may terminate the relationship at any time, with or without cause or notice.
 
 This offer is contingent upon:
 • Successful completion of background check
@@ -113,13 +87,13 @@ This offer is contingent upon:
 **Next Steps:**
 
 To accept this offer:
-1. Sign and return this letter by {(datetime.now() + timedelta(days=7)).strftime("%B %d, %Y")}
+1. Sign and return this letter by {accept_by}
 2. Complete the attached onboarding documents
 3. Contact HR to schedule your first day
 
-We are excited about the possibility of you joining our team and believe you will make significant contributions to {company_info['name']}.
+We are excited about the possibility of you joining our team and believe you will make significant contributions to {company_name}.
 
-Please feel free to contact me at {company_info['hr_contact']} or {company_info['hr_phone']} if you have any questions.
+Please feel free to contact me at {hr_contact} or {hr_phone} if you have any questions.
 
 We look forward to working with you!
 
@@ -127,37 +101,332 @@ Sincerely,
 
 _______________________________
 HR Department
-{company_info['name']}
+{company_name}
 
 
 **ACCEPTANCE**
 
-I, {candidate_data.get('name', '_____________________')}, accept the terms and conditions of employment as outlined in this offer letter.
+I, {candidate_signature_name}, accept the terms and conditions of employment as outlined in this offer letter.
 
 Signature: _______________________________    Date: _______________
 
 
-{'='*80}
+{rule}
                     This offer is confidential and valid for 7 days
-{'='*80}
+{rule}
 """
+
+TEMPLATE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class OfferTemplate:
+    """
+    An offer letter template, parsed and validated once
+    
+    Templates use str.format fields ({candidate_name}); literal braces are
+    written {{ and }}. Rendering is a single format_map over values that
+    are computed per offer.
+    """
+    
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+        self.fields = compile_fields(text)
+    
+    def render(self, values):
+        return self.text.format_map(values)
+
+
+def compile_fields(text):
+    """
+    Parse a template and check it only references known fields
+    
+    Returns:
+        Set of field names used
     
+    Raises:
+        ValueError if the template is malformed or uses unknown fields
+    """
+    fields = set()
+    for _, field, spec, conversion in Formatter().parse(text):
+        if field is None:
+            continue
+        if field not in TEMPLATE_FIELDS or spec or conversion:
+            raise ValueError(f"Unsupported template field '{{{field}}}' (fields: {', '.join(sorted(TEMPLATE_FIELDS))})")
+        fields.add(field)
+    return fields
+
+
+# Templates registered in code, and templates loaded from OFFER_TEMPLATE_DIR keyed by name -> (mtime, template)
+_registered = {'default': OfferTemplate('default', DEFAULT_TEMPLATE)}
+_loaded = {}
+_templates_lock = threading.Lock()
+
+
+def register_template(name, text):
+    """Register (or replace) a company template under a name"""
+    if not TEMPLATE_NAME_PATTERN.match(name or ''):
+        raise ValueError("Template names may only contain letters, digits, '-' and '_'")
+    template = OfferTemplate(name, text)
+    with _templates_lock:
+        _registered[name] = template
+    return template
+
+
+def get_template(name=None):
+    """
+    Look up a template: registered ones first, then <name>.txt in OFFER_TEMPLATE_DIR
+    
+    Files are compiled on first use and again only when they change.
+    
+    Raises:
+        ValueError if the template does not exist or is invalid
+    """
+    name = name or 'default'
+    if not TEMPLATE_NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid template name: {name}")
+    
+    with _templates_lock:
+        if name in _registered:
+            return _registered[name]
+        
+        path = os.path.join(OFFER_TEMPLATE_DIR, f"{name}.txt")
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            raise ValueError(f"Unknown offer template: {name}")
+        
+        cached = _loaded.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        with open(path, encoding='utf-8') as f:
+            template = OfferTemplate(name, f.read())
+        _loaded[name] = (mtime, template)
+        return template
+
+
+def list_templates():
+    """Names of the registered and file-based templates"""
+    names = set(_registered)
+    if os.path.isdir(OFFER_TEMPLATE_DIR):
+        names.update(
+            filename[:-4] for filename in os.listdir(OFFER_TEMPLATE_DIR)
+            if filename.endswith('.txt') and TEMPLATE_NAME_PATTERN.match(filename[:-4])
+        )
+    return sorted(names)
+
+
+def offer_context(company_info=None, now=None):
+    """
+    Values shared by every offer in a run: company details and dates
+    
+    Args:
+        company_info: Dict with company name, address, HR contact (default TechCorp)
+        now: Generation time (default: the current time)
+    
+    Raises:
+        ValueError if company_info lacks any of the DEFAULT_COMPANY_INFO fields
+    """
+    company_info = company_info or DEFAULT_COMPANY_INFO
+    if not isinstance(company_info, dict):
+        raise ValueError("company_info must be an object")
+    missing = [key for key in DEFAULT_COMPANY_INFO if key not in company_info]
+    if missing:
+        raise ValueError(f"company_info is missing: {', '.join(missing)}")
+    now = now or datetime.now()
+    valid_until = now + timedelta(days=7)
+    
+    return {
+        'now': now,
+        'generated_at': now.isoformat(),
+        'valid_until': valid_until.isoformat(),
+        'default_start_date': (now + timedelta(days=14)).strftime("%B %d, %Y"),
+        'values': {
+            'rule': '=' * 80,
+            'offer_date': now.strftime("%B %d, %Y"),
+            'accept_by': valid_until.strftime("%B %d, %Y"),
+            'company_name': company_info['name'],
+            'company_address': company_info['address'],
+            'hr_contact': company_info['hr_contact'],
+            'hr_phone': company_info['hr_phone']
+        },
+        'default_benefits': "\n".join(f"• {benefit}" for benefit in DEFAULT_BENEFITS)
+    }
+
+
+def offer_values(context, candidate_data, job_details, salary_data):
+    """Template values of one offer"""
+    # Format salary with commas
+    annual_salary = f"${salary_data.get('salary', 100000):,}"
+    signing_bonus = salary_data.get('signing_bonus', 0)
+    bonus_text = f" plus a signing bonus of ${signing_bonus:,}" if signing_bonus > 0 else ""
+    
+    # Generate equity info if provided
+    equity = salary_data.get('equity', {})
+    equity_text = ""
+    if equity and equity.get('shares', 0) > 0:
+        equity_text = f"""
+**Equity Compensation:**
+You will be granted {equity.get('shares', 0):,} stock options at a strike price of ${equity.get('strike_price', 0):.2f} per share, subject to a {equity.get('vesting_schedule', '4-year vesting schedule with 1-year cliff')}.
+"""
+
+    benefits = salary_data.get('benefits', [])
+    benefits_list = "\n".join(f"• {benefit}" for benefit in benefits) if benefits else context['default_benefits']
+    
+    name = candidate_data.get('name', 'Candidate Name')
+    return dict(
+        context['values'],
+        candidate_name=name,
+        candidate_email=candidate_data.get('email', 'candidate@email.com'),
+        candidate_first_name=(candidate_data.get('name', 'Candidate').split() or ['Candidate'])[0],
+        candidate_signature_name=candidate_data.get('name', '_____________________'),
+        job_title=job_details.get('title', 'Software Engineer'),
+        department=job_details.get('department', 'Engineering'),
+        manager=job_details.get('manager', 'Engineering Manager'),
+        start_date=job_details.get('start_date') or context['default_start_date'],
+        employment_type=job_details.get('employment_type', 'Full-time'),
+        location=job_details.get('location', 'Hybrid - Office/Remote'),
+        annual_salary=annual_salary,
+        bonus_text=bonus_text,
+        payment_schedule=salary_data.get('payment_schedule', 'Bi-weekly'),
+        performance_bonus=salary_data.get(
+            'performance_bonus', 'Eligible for annual performance-based bonus up to 15% of base salary'
+        ),
+        equity_text=equity_text,
+        benefits_list=benefits_list
+    )
+
+
+def render_offer(template, context, candidate_data, job_details, salary_data):
+    """Render one offer with a compiled template and a shared context"""
     return {
-        'offer_letter': offer_letter,
-        'offer_id': generate_offer_id(),
-        'generated_at': datetime.now().isoformat(),
-        'valid_until': (datetime.now() + timedelta(days=7)).isoformat(),
+        'offer_letter': template.render(offer_values(context, candidate_data, job_details, salary_data)),
+        'offer_id': generate_offer_id(context['now']),
+        'generated_at': context['generated_at'],
+        'valid_until': context['valid_until'],
         'status': 'pending'
     }
 
 
-def generate_offer_id():
-    """Generate unique offer ID"""
-    import random
-    import string
-    timestamp = datetime.now().strftime("%Y%m%d")
-    random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    return f"OFFER-{timestamp}-{random_str}"
+def generate_offer_letter(candidate_data, job_details, salary_data, company_info=None, template=None):
+    """
+    Generate a professional offer letter
+    
+    Args:
+        candidate_data: Dict with name, email, address
+        job_details: Dict with title, department, start_date, manager
+        salary_data: Dict with salary, bonus, equity, benefits
+        company_info: Dict with company name, address, HR contact
+        template: Template name (default: company_info['template'] or "default")
+    
+    Returns:
+        Formatted offer letter text
+    """
+    context = offer_context(company_info)
+    template = get_template(template or (company_info or {}).get('template'))
+    return render_offer(template, context, candidate_data, job_details, salary_data)
+
+
+def generate_offer_batch(offers, company_info=None, job_details=None, salary_data=None, template=None):
+    """
+    Render many offers with one compiled template and one set of dates
+    
+    Args:
+        offers: List of dicts with 'candidate_data' and optional
+            'job_details' / 'salary_data' (merged over the batch defaults)
+        company_info: Company details shared by the batch
+        job_details: Default job details
+        salary_data: Default compensation
+        template: Template name (default: company_info['template'] or "default")
+    
+    Yields:
+        Offer dicts in input order with their 'index'; invalid entries
+        yield {'index', 'error'} instead
+    
+    Raises:
+        ValueError (before anything is yielded) if the template is unknown
+        or company_info is incomplete
+    """
+    context = offer_context(company_info)
+    compiled = get_template(template or (company_info or {}).get('template'))
+    job_details = job_details or {}
+    salary_data = salary_data or {}
+    
+    def generate():
+        for index, offer in enumerate(offers):
+            if not isinstance(offer, dict) or not isinstance(offer.get('candidate_data', {}), dict):
+                yield {'index': index, 'error': 'Each offer must be an object with candidate_data'}
+                continue
+            try:
+                rendered = render_offer(
+                    compiled, context, offer.get('candidate_data', {}),
+                    dict(job_details, **(offer.get('job_details') or {})),
+                    dict(salary_data, **(offer.get('salary_data') or {}))
+                )
+            except (TypeError, ValueError, AttributeError) as e:
+                yield {'index': index, 'error': f'Invalid offer data: {e}'}
+                continue
+            yield dict(rendered, index=index, candidate_name=offer.get('candidate_data', {}).get('name'))
+    
+    return generate()
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink for zipfile whose contents are drained as they are produced"""
+    
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self._position
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_ndjson(offers):
+    """Encode offers as newline-delimited JSON, one line per offer"""
+    for offer in offers:
+        yield json.dumps(offer) + "\n"
+
+
+def stream_zip(offers):
+    """
+    Encode offers as a zip archive, yielding bytes as each letter is added
+    
+    Each letter is stored as <offer_id>.txt; manifest.json lists the offers
+    (without letter text) and any errors.
+    """
+    buffer = _StreamBuffer()
+    manifest = []
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for offer in offers:
+            if 'error' in offer:
+                manifest.append(offer)
+            else:
+                archive.writestr(f"{offer['offer_id']}.txt", offer['offer_letter'])
+                manifest.append({key: value for key, value in offer.items() if key != 'offer_letter'})
+            yield buffer.drain()
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    yield buffer.drain()
+
+
+def generate_offer_id(now=None):
+    """Generate a unique offer ID (date plus a random 128-bit UUID)"""
+    timestamp = (now or datetime.now()).strftime("%Y%m%d")
+    return f"OFFER-{timestamp}-{uuid.uuid4().hex.upper()}"
 
 
 def generate_quick_offer(candidate_name, job_title, salary):
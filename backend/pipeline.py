@@ -0,0 +1,452 @@
+"""
+Screening Pipeline
+Runs resume parsing and model analysis concurrently
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+import sqlite3
+import threading
+import time
+
+from config import PARSE_WORKERS, LLM_CONCURRENCY, UPLOAD_DEADLINE_SECONDS, ANALYSIS_MODE, PRESCREEN_TOP_K
+from llm_client import LLMError
+from metrics import in_context, record_fallback, record_stage, stage_timer, timed
+from resume_parser import extract_text, source_sha256, get_cached_text, cache_text
+from skill_matcher import match_skills, match_skills_result
+from bias_detector import get_bias_report
+from culture_fit import assess_culture_fit, generate_fallback_culture_assessment, get_culture_recommendation
+from interview_questions import generate_interview_questions, generate_fallback_questions
+from salary_benchmark import benchmark_salary, extract_salary_info_from_resume
+from requisition import ensure_bias_report, extract_job_title
+from combined_analysis import run_combined_analysis, request_combined_analysis
+from candidate_ranker import rank_candidates, calculate_experience_score
+from candidate_store import save_candidates, requisition_key_for
+from prescreen import prescreen, select_for_escalation, render_prescreen
+
+# PDF parsing is CPU bound, so it gets a process pool shared across requests
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """Return the shared process pool used for PDF parsing"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        return _parse_pool
+
+
+def shutdown_parse_pool():
+    """Stop the parse worker processes; the next get_parse_pool() starts new ones"""
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def run_stages(stages, deadline=None, fallbacks=None, on_result=None):
+    """
+    Run independent analysis stages in parallel and gather their results
+    
+    Args:
+        stages: Dict mapping stage name to a zero-argument callable
+        deadline: Total seconds allowed for all stages (default UPLOAD_DEADLINE_SECONDS)
+        fallbacks: Dict mapping stage name to a zero-argument callable used
+            when that stage raises or misses the deadline
+        on_result: Optional callback(name, result) invoked as soon as each
+            stage (or its fallback) produces a result
+    
+    Returns:
+        Tuple of (results, timings) dicts keyed by stage name. Timings are in
+        seconds; stages that missed the deadline are reported as None.
+    """
+    deadline = deadline or UPLOAD_DEADLINE_SECONDS
+    fallbacks = fallbacks or {}
+    results = {}
+    elapsed = {}
+    reported = set()
+    report_lock = threading.Lock()
+    
+    def report(name, result):
+        # A stage that overran may still finish after its fallback was reported
+        with report_lock:
+            if name in reported:
+                return
+            reported.add(name)
+        on_result(name, result)
+    
+    def run_stage(name, stage):
+        started = time.perf_counter()
+        try:
+            result = stage()
+        finally:
+            seconds = time.perf_counter() - started
+            elapsed[name] = round(seconds, 3)
+            record_stage(name, seconds)
+        if on_result:
+            report(name, result)
+        return result
+    
+    pool = ThreadPoolExecutor(max_workers=len(stages) or 1)
+    try:
+        futures = {pool.submit(in_context(run_stage), name, stage): name for name, stage in stages.items()}
+        wait(futures, timeout=deadline)
+        timings = {name: elapsed.get(name) for name in stages}
+        
+        for future, name in futures.items():
+            if not future.done():
+                print(f"Stage {name} missed the {deadline:.3g}s deadline")
+                reason = 'deadline'
+            elif future.exception() is not None:
+                print(f"Stage {name} failed: {future.exception()}")
+                reason = 'error'
+            else:
+                results[name] = future.result()
+                continue
+            
+            if name in fallbacks:
+                record_fallback(name, reason)
+                results[name] = fallbacks[name]()
+                if on_result:
+                    report(name, results[name])
+    finally:
+        # Do not block the response on stages that overran the deadline
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    return results, timings
+
+
+def analyze_resume(resume_text, job_desc, company_values="", job_location="",
+                   requisition=None, on_token=None, on_section=None, mode=None):
+    """
+    Run the full single-resume analysis used by /upload
+    
+    Args:
+        resume_text: Parsed resume text
+        job_desc: Job description text
+        company_values: Company culture description
+        job_location: Job location for salary benchmarking
+        requisition: Optional pre-analyzed requisition (see requisition.py)
+        on_token: Optional callback(section, token) receiving model output as it
+            streams; token is None when the section's output so far was rejected
+            and the model is asked again
+        on_section: Optional callback(section, value) called as each section finishes
+        mode: "separate" or "combined" (default ANALYSIS_MODE); combined mode
+            falls back to the separate calls if the structured output is unusable
+    
+    Returns:
+        Tuple of (sections, timings); sections uses the /upload response keys
+    """
+    mode = mode or ANALYSIS_MODE
+    match_desc = requisition['summary'] if requisition else job_desc
+    
+    def tokens_for(section):
+        if on_token:
+            return lambda token: on_token(section, token)
+        return None
+    
+    def bias_stage():
+        if requisition:
+            return ensure_bias_report(requisition, tokens_for('bias_report'))
+        return get_bias_report(job_desc, tokens_for('bias_report'))[0]
+    
+    def report(name, value):
+        if not on_section:
+            return
+        if name == 'combined':
+            for section, section_value in value.items():
+                on_section(section, section_value)
+        else:
+            on_section(name, value)
+    
+    separate_stages = {
+        'analysis': lambda: match_skills(resume_text, match_desc, tokens_for('analysis')),
+        'culture_fit': lambda: assess_culture_fit(
+            resume_text, company_values, job_desc, tokens_for('culture_fit')
+        ),
+        'interview_questions': lambda: generate_interview_questions(
+            job_desc, resume_text, num_questions=5, on_token=tokens_for('interview_questions')
+        )
+    }
+    fallbacks = {
+        'analysis': lambda: "Skill analysis unavailable - the model did not return a result in time.",
+        'bias_report': lambda: "Bias analysis unavailable - the model did not return a result in time.",
+        'culture_fit': lambda: generate_fallback_culture_assessment(resume_text),
+        'interview_questions': lambda: generate_fallback_questions(job_desc)
+    }
+    
+    # Fan out the independent model calls and wait for all of them
+    if mode == 'combined':
+        started = time.perf_counter()
+        sections, timings = run_stages(
+            {
+                'combined': lambda: run_combined_analysis(
+                    resume_text, match_desc, company_values, on_token=tokens_for('combined')
+                ),
+                'bias_report': bias_stage
+            },
+            fallbacks=fallbacks,
+            on_result=report
+        )
+        combined = sections.pop('combined', None)
+        
+        # The per-module calls only get what is left of the request's deadline
+        remaining = UPLOAD_DEADLINE_SECONDS - (time.perf_counter() - started)
+        if combined:
+            sections.update(combined)
+        elif remaining > 0:
+            print(f"Combined analysis unusable, falling back to per-module calls ({remaining:.1f}s left)")
+            record_fallback('combined', 'unusable')
+            separate, separate_timings = run_stages(
+                separate_stages, deadline=remaining, fallbacks=fallbacks, on_result=report
+            )
+            sections.update(separate)
+            timings.update(separate_timings)
+        else:
+            print("Combined analysis unusable and the deadline has passed, using fallback sections")
+            record_fallback('combined', 'unusable')
+            for name in separate_stages:
+                record_fallback(name, 'deadline')
+                sections[name] = fallbacks[name]()
+                timings[name] = None
+                report(name, sections[name])
+    else:
+        sections, timings = run_stages(
+            dict(separate_stages, bias_report=bias_stage),
+            fallbacks=fallbacks,
+            on_result=report
+        )
+    
+    # Salary benchmarking
+    salary_started = time.perf_counter()
+    if requisition:
+        years_exp, skills = extract_salary_info_from_resume(resume_text, job_desc, requisition['skills'])
+        job_title = requisition['title']
+    else:
+        years_exp, skills = extract_salary_info_from_resume(resume_text, job_desc)
+        job_title = extract_job_title(job_desc)
+    sections['salary_benchmark'] = benchmark_salary(job_title, job_location, years_exp, skills)
+    salary_seconds = time.perf_counter() - salary_started
+    timings['salary_benchmark'] = round(salary_seconds, 3)
+    record_stage('salary_benchmark', salary_seconds)
+    
+    if on_section:
+        on_section('salary_benchmark', sections['salary_benchmark'])
+    
+    return sections, timings
+
+
+def screen_with_combined_call(resume_text, match_desc, company_values, job_desc):
+    """
+    Skill match and culture fit from one structured call, falling back to the per-module calls
+    
+    Returns:
+        Tuple of (SkillMatchResult, culture fit dict)
+    """
+    try:
+        skill_match, culture, _ = request_combined_analysis(
+            resume_text, match_desc, company_values, include_questions=False
+        )
+        return skill_match, culture.to_dict(get_culture_recommendation(culture.culture_score))
+    except (LLMError, ValueError) as e:
+        print(f"Combined analysis unusable, falling back to per-module calls: {e}")
+        return (
+            match_skills_result(resume_text, match_desc),
+            assess_culture_fit(resume_text, company_values, job_desc)
+        )
+
+
+def screen_batch(resumes, job_desc, company_values="", max_workers=None, requisition=None, mode=None,
+                 escalate_top_k=None):
+    """
+    Parse, analyze and rank a batch of resumes concurrently
+    
+    Args:
+        resumes: List of (name, source) tuples in upload order, where source
+            is the PDF bytes or a file path (see resume_parser.open_upload)
+        job_desc: Job description text
+        company_values: Company culture description
+        max_workers: Maximum number of concurrent model calls
+        requisition: Optional pre-analyzed requisition; its compact summary
+            is sent for skill matching instead of the full job description
+        mode: "separate" or "combined" model calls (default ANALYSIS_MODE)
+        escalate_top_k: Pre-screen the batch without the model and only analyze
+            this many top resumes (default PRESCREEN_TOP_K; 0 analyzes all)
+    
+    Returns:
+        Ranked list of candidates (see rank_candidates)
+    """
+    candidates = [None] * len(resumes)
+    for idx, candidate, _ in iter_screened(resumes, job_desc, company_values, max_workers,
+                                            requisition, mode, escalate_top_k):
+        candidates[idx] = candidate
+    
+    # Keep upload order so the stable sort in rank_candidates breaks ties deterministically
+    candidates = [c for c in candidates if c is not None]
+    
+    # Persist every result so candidates beyond the returned top 10 stay reachable
+    try:
+        ids = save_candidates(candidates, requisition_key_for(job_desc, requisition))
+        for candidate, candidate_id in zip(candidates, ids):
+            candidate['candidate_id'] = candidate_id
+    except sqlite3.Error as e:
+        print(f"Error storing candidates: {e}")
+    
+    return rank_candidates(candidates, {'job_desc': job_desc})
+
+
+def iter_parsed(resumes):
+    """
+    Extract resume text in the shared process pool, skipping files already in the text cache
+    
+    Args:
+        resumes: List of (name, source) tuples (see screen_batch)
+    
+    Yields:
+        (index, text, error) tuples in completion order; text is None and
+        error is a message when the resume could not be read or parsed
+    """
+    parse_pool = get_parse_pool()
+    parse_futures = {}
+    
+    for idx, (name, source) in enumerate(resumes):
+        try:
+            digest = source_sha256(source)
+        except OSError as e:
+            print(f"Error reading {name}: {e}")
+            yield idx, None, f"Could not read file: {e}"
+            continue
+        
+        text = get_cached_text(digest)
+        if text is None:
+            parse_futures[parse_pool.submit(extract_text, source)] = (idx, digest)
+        else:
+            yield idx, text, None
+    
+    for future in as_completed(parse_futures):
+        idx, digest = parse_futures[future]
+        try:
+            text = future.result()
+        except Exception as e:
+            print(f"Error parsing {resumes[idx][0]}: {e}")
+            yield idx, None, f"Could not parse PDF: {e}"
+            continue
+        
+        cache_text(digest, text)
+        yield idx, text, None
+
+
+def iter_screened(resumes, job_desc, company_values="", max_workers=None, requisition=None, mode=None,
+                  escalate_top_k=None):
+    """
+    Screen resumes concurrently, yielding each one as soon as it is finished
+    
+    Takes the same arguments as screen_batch. Without pre-screening, model
+    calls for a resume start as soon as that resume is parsed. With it, the
+    whole batch is parsed and scored first, the rest are yielded with their
+    pre-screen scores and only the top escalate_top_k reach the model.
+    
+    Yields:
+        (index, candidate, error) tuples in completion order; candidate is
+        None and error is a message when the resume could not be screened
+    """
+    max_workers = min(max_workers or LLM_CONCURRENCY, LLM_CONCURRENCY)
+    mode = mode or ANALYSIS_MODE
+    if escalate_top_k is None:
+        escalate_top_k = PRESCREEN_TOP_K
+    match_desc = requisition['summary'] if requisition else job_desc
+    texts = [None] * len(resumes)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as llm_pool:
+        analysis_futures = {}
+        
+        def submit_analysis(idx):
+            if mode == 'combined':
+                analysis_futures[idx] = (
+                    llm_pool.submit(timed('batch_combined', screen_with_combined_call),
+                                    texts[idx], match_desc, company_values, job_desc),
+                )
+            else:
+                analysis_futures[idx] = (
+                    llm_pool.submit(timed('batch_skill_match', match_skills_result), texts[idx], match_desc),
+                    llm_pool.submit(timed('batch_culture_fit', assess_culture_fit),
+                                    texts[idx], company_values, job_desc)
+                )
+        
+        # Stage 1: parse PDFs in the process pool, starting model calls as each one finishes
+        for idx, text, error in iter_parsed(resumes):
+            if error:
+                yield idx, None, error
+                continue
+            texts[idx] = text
+            if not escalate_top_k:
+                submit_analysis(idx)
+        
+        # Optional model-free tier: only the best pre-screened resumes are analyzed
+        prescreened = {}
+        if escalate_top_k:
+            parsed = [idx for idx, text in enumerate(texts) if text is not None]
+            with stage_timer('prescreen'):
+                scores = prescreen(
+                    [texts[idx] for idx in parsed], job_desc,
+                    requisition['skills'] if requisition else None
+                )
+            prescreened = dict(zip(parsed, scores))
+            escalated = {parsed[pos] for pos in select_for_escalation(scores, escalate_top_k)}
+            
+            for idx in parsed:
+                if idx in escalated:
+                    submit_analysis(idx)
+                else:
+                    yield idx, prescreen_candidate(resumes[idx][0], texts[idx], prescreened[idx]), None
+        
+        # Stage 2: skill matching and culture fit run in the bounded worker pool;
+        # a resume is finished once both of its calls have completed
+        owners = {}
+        remaining = {}
+        for idx, futures in analysis_futures.items():
+            remaining[idx] = len(futures)
+            for future in futures:
+                owners[future] = idx
+        
+        for future in as_completed(owners):
+            idx = owners[future]
+            remaining[idx] -= 1
+            if remaining[idx]:
+                continue
+            
+            name = resumes[idx][0]
+            try:
+                results = [f.result() for f in analysis_futures[idx]]
+                skill_match, culture_fit = results[0] if len(results) == 1 else results
+            except Exception as e:
+                print(f"Error processing {name}: {e}")
+                yield idx, None, f"Analysis failed: {e}"
+                continue
+            
+            yield idx, {
+                'name': name,
+                'analysis': skill_match.to_markdown(),
+                'skill_score': skill_match.match_score,
+                'resume_text': texts[idx],
+                'experience_score': calculate_experience_score(texts[idx]),
+                'culture_score': culture_fit['culture_score'],
+                'tier': 'llm',
+                'prescreen_score': prescreened[idx]['prescreen_score'] if idx in prescreened else None
+            }, None
+
+
+def prescreen_candidate(name, resume_text, result):
+    """Candidate entry for a resume ranked by its pre-screen score alone"""
+    return {
+        'name': name,
+        'analysis': render_prescreen(result),
+        'skill_score': result['prescreen_score'],
+        'resume_text': resume_text,
+        'experience_score': result['experience_score'],
+        'culture_score': result['culture_score'],
+        'tier': 'prescreen',
+        'prescreen_score': result['prescreen_score']
+    }
@@ -0,0 +1,145 @@
+"""
+Pre-Screening
+Deterministic, model-free first-tier scoring used to pick which resumes reach the LLM
+"""
+
+from collections import Counter
+import math
+import re
+
+from requisition import SKILL_PATTERN, extract_required_skills
+from candidate_ranker import calculate_experience_score
+from culture_fit import generate_fallback_culture_assessment
+from resume_features import extract_features
+
+# Share of the pre-screen score taken by each signal
+WEIGHTS = {
+    'skill_coverage': 0.5,
+    'keyword_score': 0.2,
+    'experience_score': 0.2,
+    'culture_score': 0.1
+}
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#]*')
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to we
+will with you your who what which years year experience strong knowledge understanding ability
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens, keeping symbols used in skill names (c++, c#)"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def bm25_scores(documents, query_terms):
+    """
+    Score tokenized documents against a set of query terms with Okapi BM25
+    
+    Args:
+        documents: List of token lists
+        query_terms: Iterable of distinct query terms
+    
+    Returns:
+        List of raw BM25 scores in document order
+    """
+    if not documents:
+        return []
+    
+    counts = [Counter(doc) for doc in documents]
+    lengths = [len(doc) for doc in documents]
+    avg_length = (sum(lengths) / len(lengths)) or 1
+    
+    # Inverse document frequency over the pool being screened
+    n_docs = len(documents)
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for c in counts if term in c)
+        if df:
+            idf[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+    
+    scores = []
+    for c, length in zip(counts, lengths):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+        score = 0.0
+        for term, weight in idf.items():
+            tf = c.get(term)
+            if tf:
+                score += weight * tf * (BM25_K1 + 1) / (tf + norm)
+        scores.append(score)
+    return scores
+
+
+def prescreen(texts, job_desc, required_skills=None):
+    """
+    Score resumes against a job without calling the model
+    
+    Args:
+        texts: List of resume texts
+        job_desc: Job description text
+        required_skills: Skills to check for (default: extracted from job_desc,
+            or a requisition's 'skills')
+    
+    Returns:
+        List of score dicts in input order with 'prescreen_score' (0-100),
+        its parts and the resume's 'seniority'; 'keyword_score' is BM25
+        relevance relative to the best resume in the pool
+    """
+    if required_skills is None:
+        required_skills = extract_required_skills(job_desc)
+    required = set(required_skills)
+    
+    query_terms = {t for t in tokenize(job_desc) if t not in STOPWORDS and len(t) > 1}
+    keyword_raw = bm25_scores([tokenize(text) for text in texts], query_terms)
+    best_keyword = max(keyword_raw, default=0)
+    
+    results = []
+    for text, keyword in zip(texts, keyword_raw):
+        found = {match.lower() for match in SKILL_PATTERN.findall(text)}
+        matched = [skill for skill in required_skills if skill in found]
+        
+        scores = {
+            'skill_coverage': round(100 * len(matched) / len(required), 1) if required else 0.0,
+            'keyword_score': round(100 * keyword / best_keyword, 1) if best_keyword else 0.0,
+            'experience_score': calculate_experience_score(text),
+            'culture_score': generate_fallback_culture_assessment(text)['culture_score']
+        }
+        
+        results.append(dict(
+            scores,
+            prescreen_score=round(sum(WEIGHTS[name] * value for name, value in scores.items()), 1),
+            matched_skills=matched,
+            missing_skills=[skill for skill in required_skills if skill not in found],
+            seniority=extract_features(text).seniority
+        ))
+    
+    return results
+
+
+def select_for_escalation(results, top_k):
+    """Indices of the top_k pre-screen results, best first (ties keep input order)"""
+    order = sorted(range(len(results)), key=lambda idx: results[idx]['prescreen_score'], reverse=True)
+    return order[:top_k]
+
+
+def render_prescreen(result):
+    """Render a pre-screen result in the markdown layout of match_skills"""
+    checklist = [f"✓ {skill} - Present" for skill in result['matched_skills']]
+    checklist += [f"✗ {skill} - Missing" for skill in result['missing_skills']]
+    
+    return f"""## Match Score: {round(result['prescreen_score'])}/100
+
+## Pre-screen (no model analysis):
+Skill coverage: {result['skill_coverage']}%
+Keyword relevance: {result['keyword_score']}/100
+Experience: {result['experience_score']}/100
+
+## Skills Checklist:
+{chr(10).join(checklist) if checklist else 'No required skills identified'}
+
+## Verdict:
+Not escalated for full analysis - ranked below the pre-screen cut-off"""
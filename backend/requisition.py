@@ -0,0 +1,185 @@
+"""
+Job Requisitions
+Parses a job description once into a reusable requisition for screening
+"""
+
+from datetime import datetime
+import re
+import threading
+import uuid
+
+from bias_detector import get_bias_report
+from llm_client import LLMError
+
+# Skills recognised in job descriptions (version suffixes like HTML5 still match)
+SKILL_KEYWORDS = [
+    'python', 'javascript', 'typescript', 'java', 'golang', 'rust', 'c++', 'c#', 'ruby', 'php',
+    'html', 'css', 'sass', 'react', 'vue', 'angular', 'node', 'express', 'django', 'flask',
+    'rest', 'graphql', 'sql', 'postgresql', 'mysql', 'mongodb', 'redis',
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform', 'ci/cd', 'linux', 'git',
+    'machine learning', 'deep learning', 'ai', 'pandas', 'numpy', 'tensorflow', 'pytorch',
+    'spark', 'statistics', 'tableau', 'jest', 'cypress', 'agile', 'scrum'
+]
+
+# Domain signals used to label the requisition
+DOMAIN_KEYWORDS = {
+    'web development': ['web developer', 'frontend', 'front-end', 'html', 'css', 'react', 'vue', 'angular', 'responsive'],
+    'backend engineering': ['backend', 'back-end', 'api', 'microservices', 'django', 'flask', 'express', 'database'],
+    'data science': ['data scientist', 'machine learning', 'statistics', 'pandas', 'tensorflow', 'pytorch', 'modeling'],
+    'data engineering': ['data engineer', 'etl', 'spark', 'pipeline', 'warehouse', 'airflow'],
+    'devops': ['devops', 'kubernetes', 'terraform', 'ci/cd', 'infrastructure', 'sre', 'docker'],
+    'product management': ['product manager', 'roadmap', 'stakeholder', 'product strategy']
+}
+
+# Lines that state a requirement worth keeping in the compact prompt
+REQUIREMENT_MARKERS = re.compile(
+    r'require|must|experience|years|degree|proficien|knowledge|familiar|understanding|skill',
+    re.IGNORECASE
+)
+MAX_REQUIREMENT_LINES = 12
+
+SKILL_PATTERN = re.compile(
+    r'(?<![\w+#])(' + '|'.join(re.escape(s) for s in sorted(SKILL_KEYWORDS, key=len, reverse=True)) + r')(?![a-zA-Z+#])',
+    re.IGNORECASE
+)
+LOCATION_PATTERN = re.compile(r'^\s*location\s*:\s*([^\n]+)', re.IGNORECASE | re.MULTILINE)
+
+# In-memory storage (in production, use database)
+_requisitions = {}
+_requisitions_lock = threading.Lock()
+
+
+def create_requisition(job_desc, location="", company_values=""):
+    """
+    Analyze a job description once and store it as a requisition
+    
+    Args:
+        job_desc: Full job description text
+        location: Job location (detected from the description if empty)
+        company_values: Company culture description used for culture fit
+    
+    Returns:
+        Requisition dict with its ID
+    """
+    skills = extract_required_skills(job_desc)
+    title = extract_job_title(job_desc)
+    domain = detect_domain(job_desc)
+    
+    if not location:
+        location_match = LOCATION_PATTERN.search(job_desc)
+        location = location_match.group(1).strip() if location_match else ""
+    
+    # A model outage must not block creating the requisition; the report is filled in on first use
+    try:
+        bias_report, _ = get_bias_report(job_desc)
+    except LLMError as e:
+        print(f"Error generating bias report for requisition: {e}")
+        bias_report = None
+    
+    requisition = {
+        'id': f"REQ-{uuid.uuid4().hex[:12].upper()}",
+        'title': title,
+        'domain': domain,
+        'location': location,
+        'skills': skills,
+        'company_values': company_values,
+        'bias_report': bias_report,
+        'bias_report_status': 'ready' if bias_report is not None else 'pending',
+        'job_desc': job_desc,
+        'summary': build_requirements_summary(job_desc, title, domain, skills),
+        'created_at': datetime.now().isoformat()
+    }
+    
+    with _requisitions_lock:
+        _requisitions[requisition['id']] = requisition
+    
+    return requisition
+
+
+def ensure_bias_report(requisition, on_token=None):
+    """
+    Bias report of a requisition, generating it if creating the requisition could not
+    
+    Raises:
+        LLMError if the model is still unavailable
+    """
+    if requisition['bias_report'] is not None:
+        if on_token:
+            on_token(requisition['bias_report'])
+        return requisition['bias_report']
+    
+    bias_report, _ = get_bias_report(requisition['job_desc'], on_token)
+    with _requisitions_lock:
+        requisition['bias_report'] = bias_report
+        requisition['bias_report_status'] = 'ready'
+    return bias_report
+
+
+def get_requisition(requisition_id):
+    """Get a stored requisition by ID, or None if it does not exist"""
+    with _requisitions_lock:
+        return _requisitions.get(requisition_id)
+
+
+def extract_required_skills(job_desc):
+    """Extract known skills from a job description, in order of first mention"""
+    skills = []
+    for match in SKILL_PATTERN.finditer(job_desc):
+        skill = match.group(1).lower()
+        if skill not in skills:
+            skills.append(skill)
+    return skills
+
+
+def detect_domain(job_desc):
+    """Pick the domain whose keywords appear most often in the job description"""
+    text = job_desc.lower()
+    scores = {
+        domain: sum(text.count(keyword) for keyword in keywords)
+        for domain, keywords in DOMAIN_KEYWORDS.items()
+    }
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else 'general software engineering'
+
+
+def build_requirements_summary(job_desc, title, domain, skills):
+    """
+    Build a compact job summary for per-resume prompts
+    
+    Keeps the title, domain, skill list and the lines that state
+    requirements, so each resume does not re-send the full posting.
+    """
+    requirement_lines = []
+    for line in job_desc.splitlines():
+        line = line.strip(' \t-*•')
+        if line and not line.endswith(':') and REQUIREMENT_MARKERS.search(line):
+            requirement_lines.append(f"- {line[:200]}")
+        if len(requirement_lines) >= MAX_REQUIREMENT_LINES:
+            break
+    
+    summary = f"""Job Title: {title}
+Domain: {domain}
+Required Skills: {', '.join(skills) if skills else 'Not specified'}"""
+    
+    if requirement_lines:
+        summary += "\nKey Requirements:\n" + "\n".join(requirement_lines)
+    
+    return summary
+
+
+def extract_job_title(job_desc):
+    """Extract job title from job description"""
+    # Look for common patterns
+    patterns = [
+        r'(?:position|role|job):\s*([^\n]+)',
+        r'(?:hiring|seeking)\s+(?:a\s+)?([a-zA-Z\s]+?)(?:\s+to|\s+for)',
+        r'^([a-zA-Z\s]+)\s+(?:Position|Role|Job)',
+    ]
+    
+    for pattern in patterns:
+        match = re.search(pattern, job_desc, re.IGNORECASE | re.MULTILINE)
+        if match:
+            return match.group(1).strip()
+    
+    # Default fallback
+    return "Software Engineer"
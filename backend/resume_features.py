@@ -0,0 +1,142 @@
+"""
+Resume Features
+Keyword and experience extraction shared by the scoring, salary and culture modules
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+import re
+
+from config import RESUME_FEATURES_CACHE_SIZE
+
+# Keyword groups; skills and seniority titles must appear as whole words, the others anywhere in the text
+SKILL_KEYWORDS = ['python', 'javascript', 'react', 'node', 'aws', 'kubernetes', 'docker',
+                  'sql', 'mongodb', 'golang', 'rust', 'machine learning', 'ai', 'terraform']
+EXPERIENCE_KEYWORDS = ['senior', 'lead', 'manager', 'director', 'principal', 'architect']
+COLLABORATION_KEYWORDS = ['team', 'collaborated', 'partnership', 'cross-functional']
+INNOVATION_KEYWORDS = ['innovative', 'created', 'developed', 'improved', 'optimized']
+LEADERSHIP_KEYWORDS = ['led', 'managed', 'mentored', 'coordinated']
+SENIOR_KEYWORDS = ['senior', 'sr', 'lead', 'principal', 'staff', 'head of', 'director', 'architect']
+JUNIOR_KEYWORDS = ['junior', 'jr', 'intern', 'graduate', 'entry-level', 'trainee']
+
+SUBSTRING_GROUPS = {
+    'experience': EXPERIENCE_KEYWORDS,
+    'collaboration': COLLABORATION_KEYWORDS,
+    'innovation': INNOVATION_KEYWORDS,
+    'leadership': LEADERSHIP_KEYWORDS
+}
+WORD_GROUPS = {
+    'skills': SKILL_KEYWORDS,
+    'senior': SENIOR_KEYWORDS,
+    'junior': JUNIOR_KEYWORDS
+}
+
+# Years at or above which a resume counts as senior, and below which as junior
+SENIOR_YEARS = 7
+JUNIOR_YEARS = 3
+
+
+def _alternation(keywords):
+    ordered = sorted(set(keywords), key=lambda keyword: (-len(keyword), keyword))
+    return '|'.join(re.escape(keyword).replace(r'\ ', r'\s+') for keyword in ordered)
+
+
+def _groups_by_keyword(groups):
+    by_keyword = {}
+    for name, keywords in groups.items():
+        for keyword in keywords:
+            by_keyword.setdefault(keyword, []).append(name)
+    return by_keyword
+
+
+# One scan finds year counts ("5+ years") and whole-word keywords; substring groups are plain `in` checks
+FEATURE_PATTERN = re.compile(
+    r'(?P<years>\d+)\+?\s*years?'
+    rf'|(?<![a-z0-9])(?P<word>{_alternation(sum(WORD_GROUPS.values(), []))})(?![a-z0-9])'
+)
+WORD_MATCH_GROUPS = _groups_by_keyword(WORD_GROUPS)
+
+
+@dataclass(frozen=True)
+class ResumeFeatures:
+    """Signals extracted from one document"""
+    years_experience: object  # Largest "N years" mentioned, or None
+    skills: frozenset
+    experience_keywords: frozenset
+    collaboration_keywords: frozenset
+    innovation_keywords: frozenset
+    leadership_keywords: frozenset
+    seniority: str  # 'junior', 'mid' or 'senior'
+    
+    def to_dict(self):
+        return {
+            'years_experience': self.years_experience,
+            'skills': sorted(self.skills),
+            'experience_keywords': sorted(self.experience_keywords),
+            'collaboration_keywords': sorted(self.collaboration_keywords),
+            'innovation_keywords': sorted(self.innovation_keywords),
+            'leadership_keywords': sorted(self.leadership_keywords),
+            'seniority': self.seniority
+        }
+
+
+def scan_features(text):
+    """
+    Extract features from a document (uncached)
+    
+    Args:
+        text: Resume (or job description) text
+    
+    Returns:
+        ResumeFeatures
+    """
+    lowered = text.lower()
+    years = []
+    found = {name: set() for name in WORD_GROUPS}
+    
+    for match in FEATURE_PATTERN.finditer(lowered):
+        if match.group('years'):
+            years.append(int(match.group('years')))
+            continue
+        keyword = ' '.join(match.group('word').split())
+        for name in WORD_MATCH_GROUPS[keyword]:
+            found[name].add(keyword)
+    
+    # Same matching as the keyword heuristics always used ("led" also counts in "skilled")
+    for name, keywords in SUBSTRING_GROUPS.items():
+        found[name] = {keyword for keyword in keywords if keyword in lowered}
+    
+    years_experience = max(years) if years else None
+    if found['senior'] or (years_experience is not None and years_experience >= SENIOR_YEARS):
+        seniority = 'senior'
+    elif found['junior'] or (years_experience is not None and years_experience < JUNIOR_YEARS):
+        seniority = 'junior'
+    else:
+        seniority = 'mid'
+    
+    return ResumeFeatures(
+        years_experience=years_experience,
+        skills=frozenset(found['skills']),
+        experience_keywords=frozenset(found['experience']),
+        collaboration_keywords=frozenset(found['collaboration']),
+        innovation_keywords=frozenset(found['innovation']),
+        leadership_keywords=frozenset(found['leadership']),
+        seniority=seniority
+    )
+
+
+@lru_cache(maxsize=RESUME_FEATURES_CACHE_SIZE)
+def extract_features(text):
+    """
+    Features of a document, computed once per distinct text
+    
+    Every module scoring the same resume (pre-screen, ranking, salary,
+    culture fallback, candidate store) shares the cached result.
+    """
+    return scan_features(text)
+
+
+def get_feature_cache_stats():
+    """Hit/miss counts of the per-document feature cache"""
+    info = extract_features.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
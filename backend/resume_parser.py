@@ -1,8 +1,144 @@
+"""
+Resume Parser
+Extracts PDF text page by page within a page/character budget
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+
 import pdfplumber
 
-def parse_resume(file_path):
-    text = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text()
+from config import PARSE_MAX_PAGES, PARSE_MAX_CHARS, PARSE_CACHE_MAX_ENTRIES, UPLOAD_SPILL_BYTES
+
+# Extracted text keyed by the SHA-256 of the PDF bytes
+_text_cache = OrderedDict()
+_text_cache_lock = threading.Lock()
+
+
+def parse_resume(source):
+    """
+    Extract resume text, reusing the cached text for files seen before
+    
+    Args:
+        source: PDF as a file path, raw bytes or a binary file-like object
+    
+    Returns:
+        Extracted text, truncated to the configured budget
+    """
+    digest = source_sha256(source)
+    text = get_cached_text(digest)
+    if text is None:
+        text = extract_text(source)
+        cache_text(digest, text)
     return text
+
+
+@contextmanager
+def open_upload(file, spill_threshold=UPLOAD_SPILL_BYTES):
+    """
+    Load an uploaded file for parsing without touching disk when possible
+    
+    Args:
+        file: Uploaded file (werkzeug FileStorage)
+        spill_threshold: Size in bytes above which the upload is written to a temp file
+    
+    Yields:
+        Raw bytes for uploads up to the threshold, otherwise the temp file path
+        (removed again when the context exits)
+    """
+    head = file.stream.read(spill_threshold + 1)
+    if len(head) <= spill_threshold:
+        yield head
+        return
+    
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+        temp_path = temp_file.name
+        temp_file.write(head)
+        shutil.copyfileobj(file.stream, temp_file)
+    
+    try:
+        yield temp_path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _open_pdf(source):
+    """Open a path, bytes buffer or stream with pdfplumber"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return pdfplumber.open(source)
+
+
+def iter_pages(source, max_pages=PARSE_MAX_PAGES):
+    """Yield the text of each page lazily, stopping after max_pages"""
+    with _open_pdf(source) as pdf:
+        for page_number, page in enumerate(pdf.pages):
+            if page_number >= max_pages:
+                break
+            # Pages without a text layer return None
+            yield page.extract_text() or ""
+            page.flush_cache()
+
+
+def extract_text(source, max_pages=PARSE_MAX_PAGES, max_chars=PARSE_MAX_CHARS):
+    """Extract text from a PDF, stopping once the character budget is spent"""
+    parts = []
+    remaining = max_chars
+    
+    for page_text in iter_pages(source, max_pages):
+        if len(page_text) >= remaining:
+            parts.append(page_text[:remaining])
+            break
+        parts.append(page_text)
+        remaining -= len(page_text)
+    
+    return "".join(parts)
+
+
+def source_sha256(source):
+    """Hash a PDF given as bytes, a stream or a path (files are read in chunks)"""
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    
+    digest = hashlib.sha256()
+    if hasattr(source, 'read'):
+        position = source.tell()
+        for chunk in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(chunk)
+        source.seek(position)
+    else:
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cached_text(digest):
+    """Return previously extracted text for a file hash, or None"""
+    with _text_cache_lock:
+        text = _text_cache.get(digest)
+        if text is not None:
+            _text_cache.move_to_end(digest)
+        return text
+
+
+def cache_text(digest, text):
+    """Remember extracted text, evicting the least recently used files"""
+    with _text_cache_lock:
+        _text_cache[digest] = text
+        _text_cache.move_to_end(digest)
+        while len(_text_cache) > PARSE_CACHE_MAX_ENTRIES:
+            _text_cache.popitem(last=False)
+
+
+def clear_text_cache():
+    """Forget all extracted text"""
+    with _text_cache_lock:
+        _text_cache.clear()
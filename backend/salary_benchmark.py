@@ -3,7 +3,121 @@ Salary Benchmarking Module
 Provides salary recommendations based on role, experience, and market data
 """
 
-def benchmark_salary(job_title, location, years_experience, skills):
+import json
+import re
+import threading
+
+from config import SALARY_DATA_PATH
+from resume_features import SKILL_KEYWORDS, extract_features
+
+TOKEN_BOUNDARY = r'(?<![a-z0-9]){}(?![a-z0-9])'
+NON_WORD_PATTERN = re.compile(r'[^a-z0-9+#]+')
+
+
+def compile_terms(terms):
+    """
+    One regex matching any of the terms as whole words
+    
+    Longer terms come first in the alternation, so "senior software
+    engineer" wins over "software engineer" at the same position.
+    """
+    ordered = sorted(terms, key=lambda term: (-len(term), term))
+    alternation = '|'.join(re.escape(term).replace(r'\ ', r'\s+') for term in ordered)
+    return re.compile(TOKEN_BOUNDARY.format(f'(?:{alternation})'))
+
+
+def normalize_text(text):
+    """Lowercase and reduce punctuation and runs of whitespace to single spaces"""
+    return NON_WORD_PATTERN.sub(' ', (text or '').lower()).strip()
+
+
+class SalaryTables:
+    """
+    Market data loaded from a versioned JSON file into lookup structures
+    
+    Roles and premium skills are each matched with one compiled regex;
+    locations are looked up by normalized key (with aliases), and the
+    result of every distinct location string is memoized.
+    """
+    
+    def __init__(self, data):
+        self.version = data['version']
+        self.currency = data.get('currency', 'USD')
+        self.roles = {normalize_text(role): bases for role, bases in data['roles'].items()}
+        self.default_role = data['default_role']
+        self.locations = {normalize_text(key): value for key, value in data['locations'].items()}
+        self.default_location = data.get('default_location', 1.0)
+        self.location_aliases = {
+            normalize_text(alias): normalize_text(target) for alias, target in data.get('location_aliases', {}).items()
+        }
+        self.premium_skills = {normalize_text(skill): premium for skill, premium in data['premium_skills'].items()}
+        self.per_year = data['experience']['per_year']
+        self.max_years = data['experience']['max_years']
+        
+        self.role_pattern = compile_terms(self.roles)
+        self.skill_pattern = compile_terms(self.premium_skills)
+        self._location_cache = {}
+    
+    def match_role(self, job_title):
+        """Most specific (longest) known role named in a job title, or None"""
+        matches = [' '.join(match.split()) for match in self.role_pattern.findall(normalize_text(job_title))]
+        return max(matches, key=len) if matches else None
+    
+    def location_multiplier(self, location):
+        """Multiplier of a location such as "San Francisco, CA" (default when unknown)"""
+        if location in self._location_cache:
+            return self._location_cache[location]
+        
+        multiplier = self.default_location
+        # Try the whole string, then the part before the first comma ("Austin, TX" -> "austin")
+        for candidate in (location, (location or '').split(',')[0]):
+            key = normalize_text(candidate)
+            key = self.location_aliases.get(key, key)
+            if key in self.locations:
+                multiplier = self.locations[key]
+                break
+        
+        if len(self._location_cache) < 10000:
+            self._location_cache[location] = multiplier
+        return multiplier
+    
+    def skill_premium(self, skills):
+        """Sum of the premiums of the distinct premium skills found in a skill list"""
+        found = set()
+        for skill in skills or []:
+            found.update(' '.join(match.split()) for match in self.skill_pattern.findall(normalize_text(skill)))
+        return sum(self.premium_skills[skill] for skill in found)
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def load_salary_tables(path=None):
+    """Load and compile the market data file (default SALARY_DATA_PATH)"""
+    with open(path or SALARY_DATA_PATH, encoding='utf-8') as f:
+        return SalaryTables(json.load(f))
+
+
+def get_salary_tables():
+    """The market data, loaded on first use"""
+    global _tables
+    with _tables_lock:
+        if _tables is None:
+            _tables = load_salary_tables()
+        return _tables
+
+
+def reload_salary_tables():
+    """Re-read SALARY_DATA_PATH after the data file has been updated"""
+    global _tables
+    tables = load_salary_tables()
+    with _tables_lock:
+        _tables = tables
+    return tables
+
+
+def benchmark_salary(job_title, location, years_experience, skills, include_recommendation=True, tables=None):
     """
     Estimate salary range based on role and market data
     
@@ -12,90 +126,33 @@ def benchmark_salary(job_title, location, years_experience, skills):
         location: Geographic location
         years_experience: Years of relevant experience
         skills: List of key skills
+        include_recommendation: Add the markdown hiring recommendation
+        tables: SalaryTables to use (default: the loaded market data)
     
     Returns:
         Salary benchmark data with ranges
     """
-    
-    # Salary base rates by common tech roles (USD annual)
-    role_bases = {
-        'software engineer': {'min': 80000, 'max': 150000, 'median': 110000},
-        'senior software engineer': {'min': 120000, 'max': 200000, 'median': 155000},
-        'frontend developer': {'min': 75000, 'max': 140000, 'median': 105000},
-        'backend developer': {'min': 85000, 'max': 155000, 'median': 115000},
-        'full stack developer': {'min': 90000, 'max': 160000, 'median': 120000},
-        'data scientist': {'min': 95000, 'max': 170000, 'median': 125000},
-        'devops engineer': {'min': 90000, 'max': 165000, 'median': 120000},
-        'product manager': {'min': 100000, 'max': 180000, 'median': 135000},
-        'data engineer': {'min': 95000, 'max': 170000, 'median': 125000},
-        'machine learning engineer': {'min': 110000, 'max': 190000, 'median': 145000},
-        'web developer': {'min': 70000, 'max': 130000, 'median': 95000}
-    }
-    
-    # Location multipliers (relative to US national average)
-    location_multipliers = {
-        'san francisco': 1.45,
-        'new york': 1.35,
-        'seattle': 1.30,
-        'boston': 1.25,
-        'austin': 1.15,
-        'denver': 1.10,
-        'chicago': 1.10,
-        'remote': 1.05,
-        'atlanta': 1.05,
-        'default': 1.0
-    }
-    
-    # Premium skills that add to salary
-    premium_skills = {
-        'kubernetes': 5000,
-        'aws': 8000,
-        'azure': 7000,
-        'gcp': 7000,
-        'terraform': 5000,
-        'react': 5000,
-        'python': 5000,
-        'golang': 8000,
-        'rust': 10000,
-        'machine learning': 10000,
-        'ai': 10000,
-        'blockchain': 12000
-    }
+    tables = tables or get_salary_tables()
     
     # Find matching role
-    job_title_lower = job_title.lower()
-    base_salary = None
-    
-    for role, data in role_bases.items():
-        if role in job_title_lower:
-            base_salary = data
-            break
-    
-    if not base_salary:
-        # Default for unknown roles
-        base_salary = {'min': 75000, 'max': 140000, 'median': 100000}
+    role = tables.match_role(job_title)
+    base_salary = tables.roles[role] if role else tables.default_role
     
     # Apply experience multiplier
-    exp_multiplier = 1.0 + (min(years_experience, 10) * 0.05)  # 5% per year, cap at 10 years
+    exp_multiplier = 1.0 + (min(years_experience, tables.max_years) * tables.per_year)
     
     # Apply location multiplier
-    location_lower = location.lower() if location else 'default'
-    loc_multiplier = location_multipliers.get(location_lower, location_multipliers['default'])
+    loc_multiplier = tables.location_multiplier(location) if location else tables.default_location
     
     # Calculate skill premium
-    skill_premium = 0
-    if skills:
-        skills_lower = [s.lower() for s in skills]
-        for skill, premium in premium_skills.items():
-            if any(skill in s for s in skills_lower):
-                skill_premium += premium
+    skill_premium = tables.skill_premium(skills)
     
     # Calculate final ranges
     min_salary = int((base_salary['min'] * exp_multiplier * loc_multiplier) + skill_premium)
     max_salary = int((base_salary['max'] * exp_multiplier * loc_multiplier) + skill_premium)
     median_salary = int((base_salary['median'] * exp_multiplier * loc_multiplier) + skill_premium)
     
-    return {
+    result = {
         'job_title': job_title,
         'location': location or 'Not specified',
         'years_experience': years_experience,
@@ -103,17 +160,61 @@ def benchmark_salary(job_title, location, years_experience, skills):
             'min': min_salary,
             'max': max_salary,
             'median': median_salary,
-            'currency': 'USD'
+            'currency': tables.currency
         },
         'market_position': get_market_position(median_salary),
         'factors': {
             'base_role': base_salary['median'],
+            'matched_role': role,
             'experience_adjustment': f'+{int((exp_multiplier - 1) * 100)}%',
             'location_adjustment': f'+{int((loc_multiplier - 1) * 100)}%',
             'skill_premium': f'+${skill_premium:,}'
         },
-        'recommendation': generate_salary_recommendation(min_salary, max_salary, median_salary)
+        'data_version': tables.version
     }
+    if include_recommendation:
+        result['recommendation'] = generate_salary_recommendation(min_salary, max_salary, median_salary)
+    return result
+
+
+def benchmark_salaries(rows, include_recommendation=False):
+    """
+    Benchmark many role/location/experience rows against one snapshot of the market data
+    
+    Args:
+        rows: List of dicts with 'job_title', 'location', 'years_experience'
+            and 'skills' (same defaults as the /salary endpoint)
+        include_recommendation: Add the markdown recommendation to each row
+    
+    Returns:
+        List of benchmark dicts in input order with their 'index'; invalid
+        rows get {'index', 'error'} instead
+    """
+    tables = get_salary_tables()
+    results = []
+    
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results.append({'index': index, 'error': 'Each row must be an object'})
+            continue
+        
+        years = row.get('years_experience', 3)
+        skills = row.get('skills') or []
+        if isinstance(years, bool) or not isinstance(years, (int, float)) or years < 0:
+            results.append({'index': index, 'error': 'years_experience must be a non-negative number'})
+            continue
+        if not isinstance(skills, list) or not all(isinstance(skill, str) for skill in skills):
+            results.append({'index': index, 'error': 'skills must be a list of strings'})
+            continue
+        
+        result = benchmark_salary(
+            str(row.get('job_title') or 'Software Engineer'), str(row.get('location') or ''),
+            years, skills, include_recommendation, tables
+        )
+        result['index'] = index
+        results.append(result)
+    
+    return results
 
 
 def get_market_position(salary):
@@ -144,20 +245,22 @@ def generate_salary_recommendation(min_sal, max_sal, median_sal):
 """
 
 
-def extract_salary_info_from_resume(resume_text, job_desc):
+def extract_salary_info_from_resume(resume_text, job_desc, job_skills=None):
     """
     Extract salary-relevant information from resume and job description
     Helper function to prepare data for benchmarking
+    
+    If job_skills is given (e.g. from a requisition), it is used instead of
+    scanning the job description again.
     """
-    import re
+    features = extract_features(resume_text)
     
-    # Extract years of experience
-    year_patterns = re.findall(r'(\d+)\+?\s*years?', resume_text.lower())
-    years_exp = max([int(y) for y in year_patterns]) if year_patterns else 2
+    # Years of experience
+    years_exp = features.years_experience if features.years_experience is not None else 2
     
-    # Extract skills
-    skill_keywords = ['python', 'javascript', 'react', 'node', 'aws', 'kubernetes', 'docker', 
-                     'sql', 'mongodb', 'golang', 'rust', 'machine learning', 'ai', 'terraform']
-    skills = [skill for skill in skill_keywords if skill in resume_text.lower() or skill in job_desc.lower()]
+    # Skills (whole words, so "ai" is not found inside "email")
+    found = set(features.skills)
+    found.update(job_skills if job_skills is not None else extract_features(job_desc).skills)
+    skills = [skill for skill in SKILL_KEYWORDS if skill in found]
     
     return years_exp, skills
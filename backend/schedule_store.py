@@ -0,0 +1,401 @@
+"""
+Schedule Storage
+Pluggable interview storage: in-memory for development, SQLite for durable multi-process use
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+import itertools
+import json
+import os
+import sqlite3
+import threading
+
+from config import SCHEDULE_STORE, SCHEDULE_DB_PATH, SCHEDULE_MAX_DURATION_MINUTES
+from interval_index import IntervalIndex
+
+# Fields of an interview record in the order they are stored
+FIELDS = (
+    'candidate_name', 'candidate_email', 'interview_type', 'start_time', 'end_time',
+    'duration_minutes', 'status', 'scheduled_at', 'meeting_link', 'interviewer',
+    'interviewer_id', 'room', 'room_id'
+)
+
+RESOURCE_KINDS = ('interviewer', 'room')
+
+# Calendar of interviews booked without an interviewer or room (one shared calendar)
+DEFAULT_CALENDAR = 'calendar:default'
+
+
+def calendar_keys(interviewer_id=None, room_id=None):
+    """
+    Calendars an interview occupies
+    
+    An interview blocks its interviewer and its room. Interviews booked
+    without either share one default calendar, as before resources existed.
+    """
+    keys = []
+    if interviewer_id:
+        keys.append(f"interviewer:{interviewer_id}")
+    if room_id:
+        keys.append(f"room:{room_id}")
+    return keys or [DEFAULT_CALENDAR]
+
+
+class ScheduleStore(ABC):
+    """
+    Interface of an interview store
+    
+    book() must check for conflicts and insert atomically, so two requests
+    can never book overlapping interviews for the same interviewer, room
+    or default calendar. IDs are assigned by the store and never reused.
+    A store missing any method cannot be instantiated.
+    """
+    
+    @abstractmethod
+    def book(self, interview, start, end):
+        """
+        Insert an interview unless it overlaps a scheduled one on the same calendar
+        
+        Args:
+            interview: Record with the FIELDS keys (no 'id')
+            start: Start datetime
+            end: End datetime
+        
+        Returns:
+            Tuple of (stored interview with its 'id', None) or (None, conflicting interviews)
+        """
+    
+    @abstractmethod
+    def cancel(self, interview_id, reason=""):
+        """Mark an interview cancelled, returning the updated record or None if unknown"""
+    
+    @abstractmethod
+    def get(self, interview_id):
+        """Return one interview or None"""
+    
+    @abstractmethod
+    def list_scheduled(self, date=None):
+        """Scheduled (non-cancelled) interviews in start order, optionally starting on a date"""
+    
+    @abstractmethod
+    def conflicts(self, start, end, interviewer_id=None, room_id=None):
+        """Scheduled interviews overlapping [start, end) on the given calendars"""
+    
+    @abstractmethod
+    def scheduled_between(self, start, end):
+        """All scheduled interviews overlapping [start, end), on any calendar"""
+    
+    @abstractmethod
+    def free_slots(self, slot_starts, duration, interviewer_id=None, room_id=None):
+        """The slot start datetimes (sorted) whose [start, start + duration) is free on the given calendars"""
+    
+    @abstractmethod
+    def save_resource(self, resource):
+        """Create or replace an interviewer or room ({'id', 'kind', 'name', ...})"""
+    
+    @abstractmethod
+    def list_resources(self, kind=None):
+        """Interviewers and rooms, optionally of one kind, ordered by ID"""
+
+
+class MemoryScheduleStore(ScheduleStore):
+    """Process-local store; fast, but lost on restart and not shared between workers"""
+    
+    def __init__(self):
+        self._interviews = {}
+        self._calendars = {}
+        self._resources = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def _calendar(self, key):
+        return self._calendars.setdefault(key, IntervalIndex())
+    
+    def book(self, interview, start, end):
+        keys = calendar_keys(interview.get('interviewer_id'), interview.get('room_id'))
+        with self._lock:
+            conflicts = self._conflicts(start, end, keys)
+            if conflicts:
+                return None, conflicts
+            interview = dict(interview, id=next(self._ids))
+            self._interviews[interview['id']] = interview
+            for key in keys:
+                self._calendar(key).add(interview['id'], start, end)
+            return dict(interview), None
+    
+    def cancel(self, interview_id, reason=""):
+        with self._lock:
+            interview = self._interviews.get(interview_id)
+            if not interview:
+                return None
+            interview.update(status='cancelled', cancellation_reason=reason,
+                             cancelled_at=datetime.now().isoformat())
+            # A cancelled interview no longer blocks its slot
+            for key in calendar_keys(interview.get('interviewer_id'), interview.get('room_id')):
+                self._calendar(key).remove(interview_id)
+            return dict(interview)
+    
+    def get(self, interview_id):
+        with self._lock:
+            interview = self._interviews.get(interview_id)
+            return dict(interview) if interview else None
+    
+    def list_scheduled(self, date=None):
+        with self._lock:
+            return sorted(
+                (dict(i) for i in self._interviews.values()
+                 if i['status'] == 'scheduled' and (not date or i['start_time'][:10] == date)),
+                key=lambda i: i['start_time']
+            )
+    
+    def conflicts(self, start, end, interviewer_id=None, room_id=None):
+        with self._lock:
+            return self._conflicts(start, end, calendar_keys(interviewer_id, room_id))
+    
+    def _conflicts(self, start, end, keys):
+        ids = []
+        for key in keys:
+            ids.extend(i for i in self._calendar(key).overlapping(start, end) if i not in ids)
+        return sorted((dict(self._interviews[i]) for i in ids), key=lambda i: i['start_time'])
+    
+    def scheduled_between(self, start, end):
+        with self._lock:
+            return [
+                dict(i) for i in self._interviews.values()
+                if i['status'] == 'scheduled'
+                and i['start_time'] < end.isoformat() and i['end_time'] > start.isoformat()
+            ]
+    
+    def free_slots(self, slot_starts, duration, interviewer_id=None, room_id=None):
+        keys = calendar_keys(interviewer_id, room_id)
+        with self._lock:
+            free = list(slot_starts)
+            for key in keys:
+                free = self._calendar(key).free_slots(free, duration)
+            return free
+    
+    def save_resource(self, resource):
+        with self._lock:
+            self._resources[resource['id']] = dict(resource)
+            return dict(resource)
+    
+    def list_resources(self, kind=None):
+        with self._lock:
+            return [
+                dict(self._resources[key]) for key in sorted(self._resources)
+                if not kind or self._resources[key]['kind'] == kind
+            ]
+
+
+class SQLiteScheduleStore(ScheduleStore):
+    """
+    Durable store shared by all worker processes
+    
+    Bookings run in a BEGIN IMMEDIATE transaction, so the conflict check
+    and insert hold the database write lock together. IDs come from an
+    AUTOINCREMENT key and are never reused.
+    """
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS interviews (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_name TEXT,
+        candidate_email TEXT,
+        interview_type TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        day TEXT NOT NULL,
+        duration_minutes INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        scheduled_at TEXT NOT NULL,
+        meeting_link TEXT,
+        interviewer TEXT,
+        cancellation_reason TEXT,
+        cancelled_at TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_interviews_start ON interviews (status, start_time);
+    CREATE INDEX IF NOT EXISTS idx_interviews_day ON interviews (status, day, start_time);
+    CREATE TABLE IF NOT EXISTS schedule_resources (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        details TEXT NOT NULL
+    );
+    """
+    
+    # Columns added after the first release, created on existing databases
+    MIGRATIONS = {
+        'interviewer_id': "ALTER TABLE interviews ADD COLUMN interviewer_id TEXT",
+        'room': "ALTER TABLE interviews ADD COLUMN room TEXT",
+        'room_id': "ALTER TABLE interviews ADD COLUMN room_id TEXT"
+    }
+    
+    INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_interviews_interviewer ON interviews (interviewer_id, status, start_time);
+    CREATE INDEX IF NOT EXISTS idx_interviews_room ON interviews (room_id, status, start_time);
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+    
+    def _connect(self):
+        """Return this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._migrate(conn)
+            self._local.conn = conn
+        return conn
+    
+    def _migrate(self, conn):
+        """Add columns missing from databases created by older versions"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(interviews)")}
+            for column, statement in self.MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.executescript(self.INDEXES)
+    
+    @staticmethod
+    def _to_dict(row):
+        interview = dict(row)
+        del interview['day']
+        for key in ('cancellation_reason', 'cancelled_at'):
+            if interview[key] is None:
+                del interview[key]
+        return interview
+    
+    def _overlapping(self, conn, start, end, keys=None):
+        """Scheduled rows overlapping [start, end), on the given calendars (default all)"""
+        # Interviews are at most SCHEDULE_MAX_DURATION_MINUTES long, which bounds the index range scan
+        earliest = start - timedelta(minutes=SCHEDULE_MAX_DURATION_MINUTES)
+        sql = ("SELECT * FROM interviews WHERE status = 'scheduled' AND start_time >= ? AND start_time < ? "
+               "AND end_time > ?")
+        params = [earliest.isoformat(), end.isoformat(), start.isoformat()]
+        
+        if keys is not None:
+            calendars = []
+            for key in keys:
+                kind, _, resource_id = key.partition(':')
+                if key == DEFAULT_CALENDAR:
+                    calendars.append("(interviewer_id IS NULL AND room_id IS NULL)")
+                else:
+                    calendars.append(f"{kind}_id = ?")
+                    params.append(resource_id)
+            sql += " AND (" + " OR ".join(calendars) + ")"
+        
+        return conn.execute(sql + " ORDER BY start_time", params).fetchall()
+    
+    def book(self, interview, start, end):
+        keys = calendar_keys(interview.get('interviewer_id'), interview.get('room_id'))
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conflicts = self._overlapping(conn, start, end, keys)
+            if conflicts:
+                conn.execute("ROLLBACK")
+                return None, [self._to_dict(row) for row in conflicts]
+            
+            cursor = conn.execute(
+                f"INSERT INTO interviews ({', '.join(FIELDS)}, day) VALUES ({', '.join('?' * len(FIELDS))}, ?)",
+                [interview.get(field) for field in FIELDS] + [start.date().isoformat()]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(interview, id=cursor.lastrowid), None
+    
+    def cancel(self, interview_id, reason=""):
+        conn = self._connect()
+        cursor = conn.execute(
+            "UPDATE interviews SET status = 'cancelled', cancellation_reason = ?, cancelled_at = ? WHERE id = ?",
+            (reason, datetime.now().isoformat(), interview_id)
+        )
+        return self.get(interview_id) if cursor.rowcount else None
+    
+    def get(self, interview_id):
+        row = self._connect().execute("SELECT * FROM interviews WHERE id = ?", (interview_id,)).fetchone()
+        return self._to_dict(row) if row else None
+    
+    def list_scheduled(self, date=None):
+        conn = self._connect()
+        if date:
+            rows = conn.execute(
+                "SELECT * FROM interviews WHERE status = 'scheduled' AND day = ? ORDER BY start_time", (date,)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT * FROM interviews WHERE status = 'scheduled' ORDER BY start_time"
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+    
+    def conflicts(self, start, end, interviewer_id=None, room_id=None):
+        keys = calendar_keys(interviewer_id, room_id)
+        return [self._to_dict(row) for row in self._overlapping(self._connect(), start, end, keys)]
+    
+    def scheduled_between(self, start, end):
+        return [self._to_dict(row) for row in self._overlapping(self._connect(), start, end)]
+    
+    def free_slots(self, slot_starts, duration, interviewer_id=None, room_id=None):
+        if not slot_starts:
+            return []
+        # Load the booked intervals of the whole range once, then check every slot against them
+        keys = calendar_keys(interviewer_id, room_id)
+        calendars = {key: IntervalIndex() for key in keys}
+        for row in self._overlapping(self._connect(), slot_starts[0], slot_starts[-1] + duration, keys):
+            start, end = datetime.fromisoformat(row['start_time']), datetime.fromisoformat(row['end_time'])
+            for key in calendar_keys(row['interviewer_id'], row['room_id']):
+                if key in calendars:
+                    calendars[key].add(row['id'], start, end)
+        
+        free = list(slot_starts)
+        for calendar in calendars.values():
+            free = calendar.free_slots(free, duration)
+        return free
+    
+    def save_resource(self, resource):
+        details = {key: value for key, value in resource.items() if key not in ('id', 'kind', 'name')}
+        self._connect().execute(
+            "INSERT OR REPLACE INTO schedule_resources (id, kind, name, details) VALUES (?, ?, ?, ?)",
+            (resource['id'], resource['kind'], resource['name'], json.dumps(details))
+        )
+        return dict(resource)
+    
+    def list_resources(self, kind=None):
+        conn = self._connect()
+        if kind:
+            rows = conn.execute("SELECT * FROM schedule_resources WHERE kind = ? ORDER BY id", (kind,)).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM schedule_resources ORDER BY id").fetchall()
+        return [
+            dict(json.loads(row['details']), id=row['id'], kind=row['kind'], name=row['name'])
+            for row in rows
+        ]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_schedule_store():
+    """Return the configured store (SCHEDULE_STORE: "sqlite" or "memory")"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if SCHEDULE_STORE == 'memory':
+                _store = MemoryScheduleStore()
+            else:
+                _store = SQLiteScheduleStore(SCHEDULE_DB_PATH)
+        return _store
@@ -4,13 +4,18 @@ Manages interview scheduling and calendar integration
 """
 
 from datetime import datetime, timedelta
-import json
+import time as time_module
 
-# In-memory storage (in production, use database)
-scheduled_interviews = []
+from config import SCHEDULE_MAX_DURATION_MINUTES, SCHEDULE_SLOT_STEP_MINUTES, SCHEDULE_BULK_MAX_CANDIDATES
+from schedule_store import get_schedule_store
+from slot_allocator import allocate, can_interview, normalize_resource, slot_grid
 
+# Standard interview hours: 9 AM - 5 PM
+WORKING_HOURS = ["09:00", "10:00", "11:00", "13:00", "14:00", "15:00", "16:00"]
 
-def schedule_interview(candidate_name, candidate_email, date, time, interview_type="Technical", duration_minutes=60):
+
+def schedule_interview(candidate_name, candidate_email, date, time, interview_type="Technical", duration_minutes=60,
+                       interviewer_id=None, room_id=None):
     """
     Schedule an interview for a candidate
     
@@ -21,6 +26,8 @@ def schedule_interview(candidate_name, candidate_email, date, time, interview_ty
         time: Interview time (HH:MM)
         interview_type: Type of interview (Technical, Behavioral, etc.)
         duration_minutes: Interview duration in minutes
+        interviewer_id: Registered interviewer to book (optional)
+        room_id: Registered room to book (optional)
     
     Returns:
         Interview details with confirmation
@@ -31,31 +38,34 @@ def schedule_interview(candidate_name, candidate_email, date, time, interview_ty
         interview_datetime = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
         end_datetime = interview_datetime + timedelta(minutes=duration_minutes)
         
-        # Check for conflicts
-        conflicts = check_scheduling_conflicts(interview_datetime, end_datetime)
-        if conflicts:
+        if not 0 < duration_minutes <= SCHEDULE_MAX_DURATION_MINUTES:
             return {
                 'success': False,
-                'message': 'Time slot already booked',
-                'conflicts': conflicts
+                'message': f'Duration must be between 1 and {SCHEDULE_MAX_DURATION_MINUTES} minutes'
             }
         
+        resources = {resource['id']: resource for resource in get_schedule_store().list_resources()}
+        for resource_id, kind in ((interviewer_id, 'interviewer'), (room_id, 'room')):
+            if resource_id and resources.get(resource_id, {}).get('kind') != kind:
+                return {
+                    'success': False,
+                    'message': f'Unknown {kind}: {resource_id}'
+                }
+        
         # Create interview record
-        interview = {
-            'id': len(scheduled_interviews) + 1,
-            'candidate_name': candidate_name,
-            'candidate_email': candidate_email,
-            'interview_type': interview_type,
-            'start_time': interview_datetime.isoformat(),
-            'end_time': end_datetime.isoformat(),
-            'duration_minutes': duration_minutes,
-            'status': 'scheduled',
-            'scheduled_at': datetime.now().isoformat(),
-            'meeting_link': generate_meeting_link(),
-            'interviewer': 'TBD'
-        }
+        interview = new_interview(
+            candidate_name, candidate_email, interview_type, interview_datetime, end_datetime,
+            resources.get(interviewer_id), resources.get(room_id)
+        )
         
-        scheduled_interviews.append(interview)
+        # The store checks for conflicts and inserts atomically
+        interview, conflicts = get_schedule_store().book(interview, interview_datetime, end_datetime)
+        if conflicts:
+            return {
+                'success': False,
+                'message': 'Time slot already booked',
+                'conflicts': format_conflicts(conflicts)
+            }
         
         return {
             'success': True,
@@ -64,29 +74,43 @@ def schedule_interview(candidate_name, candidate_email, date, time, interview_ty
             'calendar_invite': generate_calendar_invite(interview)
         }
         
-    except ValueError as e:
+    except (ValueError, TypeError) as e:
         return {
             'success': False,
             'message': f'Invalid date/time format: {e}'
         }
 
 
-def check_scheduling_conflicts(start_time, end_time):
-    """Check if time slot conflicts with existing interviews"""
-    conflicts = []
-    
-    for interview in scheduled_interviews:
-        existing_start = datetime.fromisoformat(interview['start_time'])
-        existing_end = datetime.fromisoformat(interview['end_time'])
-        
-        # Check for overlap
-        if (start_time < existing_end and end_time > existing_start):
-            conflicts.append({
-                'candidate': interview['candidate_name'],
-                'time': interview['start_time']
-            })
-    
-    return conflicts
+def new_interview(candidate_name, candidate_email, interview_type, start, end, interviewer=None, room=None):
+    """Build the record of a new interview, optionally with a registered interviewer and room"""
+    return {
+        'candidate_name': candidate_name,
+        'candidate_email': candidate_email,
+        'interview_type': interview_type,
+        'start_time': start.isoformat(),
+        'end_time': end.isoformat(),
+        'duration_minutes': int((end - start).total_seconds() // 60),
+        'status': 'scheduled',
+        'scheduled_at': datetime.now().isoformat(),
+        'meeting_link': generate_meeting_link(),
+        'interviewer': interviewer['name'] if interviewer else 'TBD',
+        'interviewer_id': interviewer['id'] if interviewer else None,
+        'room': room['name'] if room else None,
+        'room_id': room['id'] if room else None
+    }
+
+
+def check_scheduling_conflicts(start_time, end_time, interviewer_id=None, room_id=None):
+    """Check if time slot conflicts with existing (non-cancelled) interviews on the same calendars"""
+    return format_conflicts(get_schedule_store().conflicts(start_time, end_time, interviewer_id, room_id))
+
+
+def format_conflicts(interviews):
+    """Summarize conflicting interviews for the API response"""
+    return [
+        {'candidate': interview['candidate_name'], 'time': interview['start_time']}
+        for interview in interviews
+    ]
 
 
 def generate_meeting_link():
@@ -111,46 +135,62 @@ def generate_calendar_invite(interview):
 
 
 def get_available_slots(date, interview_type="Technical"):
-    """Get available interview slots for a given date"""
-    target_date = datetime.strptime(date, "%Y-%m-%d").date()
+    """
+    Get available interview slots for a given date
     
-    # Standard interview hours: 9 AM - 5 PM
-    working_hours = [
-        "09:00", "10:00", "11:00", "13:00", "14:00", "15:00", "16:00"
+    With interviewers registered, a slot is offered when an interviewer who
+    takes this interview type works then and is free; each slot lists them.
+    Otherwise the fixed WORKING_HOURS of the shared calendar are used.
+    """
+    store = get_schedule_store()
+    interviewers = [
+        interviewer for interviewer in store.list_resources('interviewer')
+        if can_interview(interviewer, interview_type)
     ]
-    
-    available_slots = []
-    
-    for time_slot in working_hours:
-        slot_datetime = datetime.strptime(f"{date} {time_slot}", "%Y-%m-%d %H:%M")
-        slot_end = slot_datetime + timedelta(hours=1)
+    if interviewers:
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+        duration = timedelta(hours=1)
+        slot_starts, available = slot_grid(day, 1, duration, timedelta(minutes=SCHEDULE_SLOT_STEP_MINUTES), interviewers)
         
-        # Check if slot is available
-        conflicts = check_scheduling_conflicts(slot_datetime, slot_end)
+        free_by_slot = {}
+        for position, interviewer in enumerate(interviewers):
+            # Only the slots inside this interviewer's own working hours
+            working = [start for start, positions in zip(slot_starts, available) if position in positions]
+            for slot_datetime in store.free_slots(working, duration, interviewer_id=interviewer['id']):
+                free_by_slot.setdefault(slot_datetime, []).append(interviewer['id'])
         
-        if not conflicts:
-            available_slots.append({
-                'time': time_slot,
+        return [
+            {
+                'time': slot_datetime.strftime("%H:%M"),
                 'datetime': slot_datetime.isoformat(),
-                'available': True
-            })
+                'available': True,
+                'interviewers': free_by_slot[slot_datetime]
+            }
+            for slot_datetime in sorted(free_by_slot)
+        ]
+    
+    slot_starts = [datetime.strptime(f"{date} {time_slot}", "%Y-%m-%d %H:%M") for time_slot in WORKING_HOURS]
     
-    return available_slots
+    # Check the whole day against the booked intervals in one pass
+    return [
+        {
+            'time': slot_datetime.strftime("%H:%M"),
+            'datetime': slot_datetime.isoformat(),
+            'available': True
+        }
+        for slot_datetime in store.free_slots(slot_starts, timedelta(hours=1))
+    ]
 
 
 def cancel_interview(interview_id, reason=""):
     """Cancel a scheduled interview"""
-    for interview in scheduled_interviews:
-        if interview['id'] == interview_id:
-            interview['status'] = 'cancelled'
-            interview['cancellation_reason'] = reason
-            interview['cancelled_at'] = datetime.now().isoformat()
-            
-            return {
-                'success': True,
-                'message': f"Interview {interview_id} cancelled successfully",
-                'interview': interview
-            }
+    interview = get_schedule_store().cancel(interview_id, reason)
+    if interview:
+        return {
+            'success': True,
+            'message': f"Interview {interview_id} cancelled successfully",
+            'interview': interview
+        }
     
     return {
         'success': False,
@@ -161,12 +201,126 @@ def cancel_interview(interview_id, reason=""):
 def get_scheduled_interviews(date=None):
     """Get all scheduled interviews, optionally filtered by date"""
     if date:
-        target_date = datetime.strptime(date, "%Y-%m-%d").date()
-        return [
-            interview for interview in scheduled_interviews
-            if datetime.fromisoformat(interview['start_time']).date() == target_date
-            and interview['status'] == 'scheduled'
-        ]
+        # Validate the format before querying
+        datetime.strptime(date, "%Y-%m-%d")
+    return get_schedule_store().list_scheduled(date)
+
+
+def register_resource(data):
+    """Create or update an interviewer or room with its working hours"""
+    try:
+        resource = normalize_resource(data or {})
+    except ValueError as e:
+        return {
+            'success': False,
+            'message': f'Invalid resource: {e}'
+        }
     
-    return [i for i in scheduled_interviews if i['status'] == 'scheduled']
+    return {
+        'success': True,
+        'message': f"{resource['kind'].capitalize()} {resource['id']} saved",
+        'resource': get_schedule_store().save_resource(resource)
+    }
+
+
+def list_resources(kind=None):
+    """Registered interviewers and rooms"""
+    return get_schedule_store().list_resources(kind)
 
+
+def schedule_bulk(candidates, start_date, days=5, duration_minutes=60, interview_type="Technical",
+                  step_minutes=None, max_per_day=None, dry_run=False):
+    """
+    Assign interview slots to a shortlist in one pass
+    
+    Candidates are served in the order given (e.g. ranked_candidates from
+    /batch), each getting the earliest slot with a free interviewer who
+    takes the interview type and, if rooms are registered, a free room.
+    
+    Args:
+        candidates: List of dicts with 'name' (or 'candidate_name') and
+            optionally 'email' (or 'candidate_email') and 'candidate_id'
+        start_date: First day to schedule (YYYY-MM-DD)
+        days: Number of days to consider
+        duration_minutes: Interview duration in minutes
+        interview_type: Type of interview
+        step_minutes: Spacing of slot starts (default SCHEDULE_SLOT_STEP_MINUTES)
+        max_per_day: Optional cap on interviews per interviewer per day
+        dry_run: Plan without booking
+    
+    Returns:
+        Dict with 'scheduled' interviews, 'unassigned' candidates and 'stats'
+    """
+    try:
+        first_day = datetime.strptime(start_date or '', "%Y-%m-%d").date()
+    except ValueError as e:
+        return {'success': False, 'message': f'Invalid start_date: {e}'}
+    
+    step_minutes = step_minutes or SCHEDULE_SLOT_STEP_MINUTES
+    for name, value, upper in (('days', days, 31), ('duration_minutes', duration_minutes, SCHEDULE_MAX_DURATION_MINUTES),
+                               ('step_minutes', step_minutes, 24 * 60)):
+        if not isinstance(value, int) or not 0 < value <= upper:
+            return {'success': False, 'message': f'{name} must be an integer between 1 and {upper}'}
+    if max_per_day is not None and (not isinstance(max_per_day, int) or max_per_day < 1):
+        return {'success': False, 'message': 'max_per_day must be a positive integer'}
+    if not isinstance(candidates, list) or not candidates:
+        return {'success': False, 'message': 'candidates must be a non-empty list'}
+    if len(candidates) > SCHEDULE_BULK_MAX_CANDIDATES:
+        return {'success': False, 'message': f'At most {SCHEDULE_BULK_MAX_CANDIDATES} candidates per request'}
+    
+    store = get_schedule_store()
+    interviewers = [
+        interviewer for interviewer in store.list_resources('interviewer')
+        if can_interview(interviewer, interview_type)
+    ]
+    rooms = store.list_resources('room')
+    range_start = datetime.combine(first_day, datetime.min.time())
+    booked = store.scheduled_between(range_start, range_start + timedelta(days=days))
+    
+    started = time_module.perf_counter()
+    assignments, unassigned = allocate(
+        candidates, interviewers, rooms, booked, first_day, days,
+        timedelta(minutes=duration_minutes), timedelta(minutes=step_minutes), max_per_day
+    )
+    allocation_ms = round((time_module.perf_counter() - started) * 1000, 2)
+    
+    scheduled = []
+    for assignment in assignments:
+        candidate = assignment['candidate']
+        interview = new_interview(
+            candidate.get('name') or candidate.get('candidate_name'),
+            candidate.get('email') or candidate.get('candidate_email'),
+            interview_type, assignment['start'], assignment['end'],
+            assignment['interviewer'] if assignment['interviewer']['id'] else None, assignment['room']
+        )
+        if not dry_run:
+            # Another request may have taken the slot since the calendars were loaded
+            interview, conflicts = store.book(interview, assignment['start'], assignment['end'])
+            if conflicts:
+                unassigned.append(dict(candidate, reason='Slot booked concurrently, please retry'))
+                continue
+        if candidate.get('candidate_id') is not None:
+            interview['candidate_id'] = candidate['candidate_id']
+        scheduled.append(interview)
+    
+    return {
+        'success': True,
+        'dry_run': dry_run,
+        'scheduled': scheduled,
+        'unassigned': [
+            {
+                'name': candidate.get('name') or candidate.get('candidate_name'),
+                'candidate_id': candidate.get('candidate_id'),
+                'reason': candidate.get('reason', 'No free interviewer or room in the range')
+            }
+            for candidate in unassigned
+        ],
+        'stats': {
+            'candidates': len(candidates),
+            'scheduled': len(scheduled),
+            'unassigned': len(unassigned),
+            'interviewers': len(interviewers),
+            'rooms': len(rooms),
+            'allocation_ms': allocation_ms
+        }
+    }
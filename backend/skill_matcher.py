@@ -1,6 +1,30 @@
-import ollama
-
-def match_skills(resume_text, job_description):
+from structured_output import SkillMatchResult, SKILL_MATCH_SCHEMA, request_structured
+
+OPTIONS = {
+    "temperature": 0.05,
+    "num_predict": 600
+}
+
+def match_skills(resume_text, job_description, on_token=None):
+    """Skill match analysis rendered as markdown for display"""
+    return match_skills_result(resume_text, job_description, on_token).to_markdown()
+
+
+def match_skills_result(resume_text, job_description, on_token=None):
+    """
+    Score a resume against a job description
+    
+    Args:
+        resume_text: Candidate resume content
+        job_description: Job description (or a requisition summary)
+        on_token: Optional callback receiving the raw JSON as it streams
+    
+    Returns:
+        SkillMatchResult
+    
+    Raises:
+        LLMError if the model call fails, ValueError if the output stays malformed
+    """
     prompt = f"""You are a VERY STRICT recruitment analyst. Score accurately based on actual skill overlap.
 
 RESUME:
@@ -32,40 +56,18 @@ JOB DESCRIPTION:
 - Web development skills DON'T transfer to data science
 - If candidate is in WRONG FIELD, score must be <40
 
-**OUTPUT**:
-
-## Match Score: [X]/100
-
-## Domain Check:
-Resume field: [field]
-Job field: [field]
-Match: [YES/NO] - [If NO: "Domain mismatch penalty applied"]
-
-## Skills Checklist:
-[For each required skill]
-✓/✗ [Skill name] - [Status]
-
-## Penalties Applied:
-- Domain mismatch: -[X] or "N/A"
-- Missing core skills: -[X]
-- Missing qualifications: -[X]
-**Final Score: [X]/100**
-
-## Verdict:
-[STRONG MATCH / MODERATE MATCH / WEAK MATCH / POOR MATCH]
-
-## One-line Recommendation:
-[Brief suggestion]
+**OUTPUT** (JSON only):
+- match_score: final score after penalties (0-100)
+- resume_field / job_field: the candidate's field and the job's field
+- domain_match: true if the fields match
+- matched_skills / missing_skills: required skills marked ✓ / ✗
+- penalties: each penalty applied, e.g. "Missing core skill: -20"
+- verdict: STRONG MATCH / MODERATE MATCH / WEAK MATCH / POOR MATCH
+- recommendation: one-line suggestion
 
 Remember: Different fields = score must be <35"""
 
-    response = ollama.chat(
-        model="recruitment-screener",
-        messages=[{"role": "user", "content": prompt}],
-        options={
-            "temperature": 0.05,
-            "num_predict": 600
-        }
+    return request_structured(
+        prompt, SKILL_MATCH_SCHEMA, SkillMatchResult.from_dict, OPTIONS,
+        on_token=on_token, use_chat=True
     )
-
-    return response["message"]["content"]
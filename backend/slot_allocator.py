@@ -0,0 +1,257 @@
+"""
+Slot Allocator
+Greedy assignment of interview slots to ranked candidates across interviewer and room calendars
+"""
+
+from datetime import datetime, timedelta
+
+from interval_index import IntervalIndex
+from schedule_store import DEFAULT_CALENDAR, RESOURCE_KINDS, calendar_keys
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+# Monday to Friday, 9 AM - 5 PM with a lunch break
+DEFAULT_WORKING_HOURS = {day: [["09:00", "12:00"], ["13:00", "17:00"]] for day in WEEKDAYS[:5]}
+
+# Stands in for the interviewer when none are registered: the shared default calendar
+DEFAULT_INTERVIEWER = {'id': None, 'kind': 'interviewer', 'name': 'TBD', 'working_hours': DEFAULT_WORKING_HOURS}
+
+
+def _minutes(value):
+    """Minutes after midnight of an "HH:MM" time"""
+    parsed = datetime.strptime(value, "%H:%M")
+    return parsed.hour * 60 + parsed.minute
+
+
+def parse_working_hours(hours):
+    """
+    Validate a weekly calendar and convert it to minute ranges
+    
+    Args:
+        hours: {"mon": [["09:00", "12:00"], ["13:00", "17:00"]], ...}; days
+            left out are not worked
+    
+    Returns:
+        Dict of weekday number (Monday = 0) -> sorted list of (start, end) minutes
+    
+    Raises:
+        ValueError if a day or time range is malformed
+    """
+    if not isinstance(hours, dict):
+        raise ValueError("working_hours must map weekdays to lists of [start, end] times")
+    
+    calendar = {}
+    for day, windows in hours.items():
+        if day not in WEEKDAYS:
+            raise ValueError(f"Unknown weekday '{day}' (use {', '.join(WEEKDAYS)})")
+        ranges = []
+        for window in windows or []:
+            if not isinstance(window, (list, tuple)) or len(window) != 2:
+                raise ValueError(f"Working hours for {day} must be [start, end] pairs")
+            start, end = _minutes(window[0]), _minutes(window[1])
+            if start >= end:
+                raise ValueError(f"Working hours {window[0]}-{window[1]} on {day} end before they start")
+            ranges.append((start, end))
+        calendar[WEEKDAYS.index(day)] = sorted(ranges)
+    return calendar
+
+
+def normalize_resource(data):
+    """
+    Validate an interviewer or room definition
+    
+    Args:
+        data: Dict with 'id', 'kind' ("interviewer" or "room"), optional
+            'name', 'working_hours' (default Monday-Friday 9-5) and
+            'interview_types' (interviewers only; default any type)
+    
+    Returns:
+        Resource dict ready to store
+    
+    Raises:
+        ValueError if the definition is invalid
+    """
+    resource_id = str(data.get('id') or '').strip()
+    if not resource_id:
+        raise ValueError("id is required")
+    kind = data.get('kind')
+    if kind not in RESOURCE_KINDS:
+        raise ValueError(f"kind must be one of: {', '.join(RESOURCE_KINDS)}")
+    
+    working_hours = data.get('working_hours') or DEFAULT_WORKING_HOURS
+    parse_working_hours(working_hours)
+    
+    resource = {
+        'id': resource_id,
+        'kind': kind,
+        'name': data.get('name') or resource_id,
+        'working_hours': working_hours
+    }
+    if kind == 'interviewer':
+        interview_types = data.get('interview_types') or []
+        if not isinstance(interview_types, list):
+            raise ValueError("interview_types must be a list")
+        resource['interview_types'] = interview_types
+    return resource
+
+
+def can_interview(interviewer, interview_type):
+    """Whether an interviewer takes this type of interview (no list means any type)"""
+    interview_types = interviewer.get('interview_types')
+    return not interview_types or interview_type in interview_types
+
+
+def slot_grid(start_date, days, duration, step, resources):
+    """
+    Candidate slot starts and which resources' working hours cover them
+    
+    Args:
+        start_date: First date of the range
+        days: Number of days
+        duration: Interview length as a timedelta
+        step: Spacing of slot starts as a timedelta
+        resources: Resources with 'working_hours'
+    
+    Returns:
+        Tuple of (sorted slot start datetimes, list of resource positions
+        available at each start)
+    """
+    calendars = [parse_working_hours(resource['working_hours']) for resource in resources]
+    duration_minutes = duration.total_seconds() / 60
+    step_minutes = int(step.total_seconds() // 60)
+    
+    grid = {}
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        midnight = datetime.combine(day, datetime.min.time())
+        for position, calendar in enumerate(calendars):
+            for window_start, window_end in calendar.get(day.weekday(), []):
+                minute = window_start
+                while minute + duration_minutes <= window_end:
+                    grid.setdefault(midnight + timedelta(minutes=minute), []).append(position)
+                    minute += step_minutes
+    
+    starts = sorted(grid)
+    return starts, [grid[start] for start in starts]
+
+
+def works_at(calendar, start, end):
+    """Whether [start, end) falls inside a working-hour window of a parsed calendar"""
+    if start.date() != (end - timedelta(microseconds=1)).date():
+        return False
+    first, last = start.hour * 60 + start.minute, end.hour * 60 + end.minute or 24 * 60
+    windows = calendar.get(start.weekday(), [])
+    return any(window_start <= first and last <= window_end for window_start, window_end in windows)
+
+
+def allocate(candidates, interviewers, rooms, booked, start_date, days, duration, step, max_per_day=None):
+    """
+    Assign each candidate, in rank order, the earliest slot with a free interviewer and room
+    
+    Greedy earliest-fit: candidates are taken best first and each gets the
+    first slot where an interviewer who works then is free (the one with
+    the fewest interviews in the range wins ties) and a room is free.
+    Slot starts that have run out of interviewers or rooms are skipped by
+    all later candidates, so one pass over the grid serves the whole list.
+    
+    Args:
+        candidates: Candidates best first
+        interviewers: Eligible interviewer resources (none: the default calendar)
+        rooms: Room resources (none: interviews need no room)
+        booked: Scheduled interviews already in the range
+        start_date: First date of the range
+        days: Number of days
+        duration: Interview length as a timedelta
+        step: Spacing of slot starts as a timedelta
+        max_per_day: Optional cap on interviews per interviewer per day
+    
+    Returns:
+        Tuple of (assignments: dicts with 'candidate', 'start', 'end',
+        'interviewer', 'room'; unassigned candidates)
+    """
+    interviewers = interviewers or [DEFAULT_INTERVIEWER]
+    rooms = rooms or [None]
+    
+    # Busy intervals of every calendar involved, plus interviewer load per day and overall
+    calendars = {}
+    daily_load = {}
+    total_load = {}
+    for interview in booked:
+        start = datetime.fromisoformat(interview['start_time'])
+        end = datetime.fromisoformat(interview['end_time'])
+        for key in calendar_keys(interview.get('interviewer_id'), interview.get('room_id')):
+            calendars.setdefault(key, IntervalIndex()).add(('booked', interview['id']), start, end)
+        interviewer_key = interview.get('interviewer_id')
+        daily_load[(interviewer_key, start.date())] = daily_load.get((interviewer_key, start.date()), 0) + 1
+        total_load[interviewer_key] = total_load.get(interviewer_key, 0) + 1
+    
+    def calendar(key):
+        return calendars.setdefault(key, IntervalIndex())
+    
+    interviewer_keys = [calendar_keys(interviewer['id'])[0] for interviewer in interviewers]
+    room_keys = [calendar_keys(room_id=room['id'])[0] if room else None for room in rooms]
+    # Without interviewers or rooms everything shares the default calendar (checked once, as the interviewer)
+    room_keys = [None if key == DEFAULT_CALENDAR else key for key in room_keys]
+    room_hours = [parse_working_hours(room['working_hours']) if room else None for room in rooms]
+    
+    starts, available = slot_grid(start_date, days, duration, step, interviewers)
+    exhausted = [False] * len(starts)
+    first_open = 0
+    
+    assignments = []
+    unassigned = []
+    
+    for candidate in candidates:
+        # Slots before first_open have no free interviewer or room left
+        while first_open < len(starts) and exhausted[first_open]:
+            first_open += 1
+        
+        chosen = None
+        for position in range(first_open, len(starts)):
+            if exhausted[position]:
+                continue
+            start = starts[position]
+            end = start + duration
+            day = start.date()
+            
+            free = [
+                idx for idx in available[position]
+                if (max_per_day is None or daily_load.get((interviewers[idx]['id'], day), 0) < max_per_day)
+                and calendar(interviewer_keys[idx]).is_free(start, end)
+            ]
+            room = next((
+                idx for idx, room in enumerate(rooms)
+                if room is None or (works_at(room_hours[idx], start, end) and calendar(room_keys[idx]).is_free(start, end))
+            ), None)
+            
+            # Bookings only ever add load, so a slot that is full now stays full
+            if not free or room is None:
+                exhausted[position] = True
+                continue
+            
+            interviewer = min(free, key=lambda idx: (total_load.get(interviewers[idx]['id'], 0), idx))
+            chosen = (start, end, interviewer, room)
+            break
+        
+        if chosen is None:
+            unassigned.append(candidate)
+            continue
+        
+        start, end, interviewer, room = chosen
+        key = ('planned', len(assignments))
+        calendar(interviewer_keys[interviewer]).add(key, start, end)
+        if room_keys[room]:
+            calendar(room_keys[room]).add(key, start, end)
+        interviewer_id = interviewers[interviewer]['id']
+        daily_load[(interviewer_id, start.date())] = daily_load.get((interviewer_id, start.date()), 0) + 1
+        total_load[interviewer_id] = total_load.get(interviewer_id, 0) + 1
+        
+        assignments.append({
+            'candidate': candidate,
+            'start': start,
+            'end': end,
+            'interviewer': interviewers[interviewer],
+            'room': rooms[room]
+        })
+    
+    return assignments, unassigned
@@ -0,0 +1,214 @@
+"""
+Structured Model Output
+JSON schemas, typed result objects and validated requests for model output
+"""
+
+from dataclasses import dataclass, field
+import json
+import threading
+
+from config import STRUCTURED_MAX_ATTEMPTS
+import llm_client
+
+SKILL_MATCH_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'match_score': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'resume_field': {'type': 'string'},
+        'job_field': {'type': 'string'},
+        'domain_match': {'type': 'boolean'},
+        'matched_skills': {'type': 'array', 'items': {'type': 'string'}},
+        'missing_skills': {'type': 'array', 'items': {'type': 'string'}},
+        'penalties': {'type': 'array', 'items': {'type': 'string'}},
+        'verdict': {'type': 'string', 'enum': ['STRONG MATCH', 'MODERATE MATCH', 'WEAK MATCH', 'POOR MATCH']},
+        'recommendation': {'type': 'string'}
+    },
+    'required': ['match_score', 'resume_field', 'job_field', 'domain_match',
+                 'matched_skills', 'missing_skills', 'verdict', 'recommendation']
+}
+
+CULTURE_FIT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'culture_score': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'strengths': {'type': 'array', 'items': {'type': 'string'}},
+        'concerns': {'type': 'array', 'items': {'type': 'string'}},
+        'assessment': {'type': 'string'}
+    },
+    'required': ['culture_score', 'strengths', 'concerns', 'assessment']
+}
+
+_counters = {'requests': 0, 'malformed': 0, 'retries': 0, 'failures': 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+@dataclass
+class SkillMatchResult:
+    """Validated skill match analysis"""
+    match_score: int
+    resume_field: str
+    job_field: str
+    domain_match: bool
+    matched_skills: list
+    missing_skills: list
+    verdict: str
+    recommendation: str
+    penalties: list = field(default_factory=list)
+    
+    @classmethod
+    def from_dict(cls, data):
+        validate_schema(data, SKILL_MATCH_SCHEMA, 'skill_match')
+        return cls(**{key: data[key] for key in SKILL_MATCH_SCHEMA['properties'] if key in data})
+    
+    def to_markdown(self):
+        """Render in the markdown layout the frontend displays"""
+        checklist = [f"✓ {skill} - Present" for skill in self.matched_skills]
+        checklist += [f"✗ {skill} - Missing" for skill in self.missing_skills]
+        penalties = "\n".join(f"- {penalty}" for penalty in self.penalties) or "- None"
+        
+        return f"""## Match Score: {self.match_score}/100
+
+## Domain Check:
+Resume field: {self.resume_field}
+Job field: {self.job_field}
+Match: {'YES' if self.domain_match else 'NO - Domain mismatch penalty applied'}
+
+## Skills Checklist:
+{chr(10).join(checklist) if checklist else 'No required skills identified'}
+
+## Penalties Applied:
+{penalties}
+**Final Score: {self.match_score}/100**
+
+## Verdict:
+{self.verdict}
+
+## One-line Recommendation:
+{self.recommendation}"""
+
+
+@dataclass
+class CultureFitResult:
+    """Validated culture fit assessment"""
+    culture_score: int
+    strengths: list
+    concerns: list
+    assessment: str
+    
+    @classmethod
+    def from_dict(cls, data):
+        validate_schema(data, CULTURE_FIT_SCHEMA, 'culture_fit')
+        return cls(**{key: data[key] for key in CULTURE_FIT_SCHEMA['properties']})
+    
+    def to_dict(self, recommendation):
+        """Convert to the assess_culture_fit response shape"""
+        return {
+            'culture_score': self.culture_score,
+            'analysis': f"**Culture Fit Score**: {self.culture_score}/100\n\n**Overall Assessment**: {self.assessment}",
+            'strengths': self.strengths,
+            'concerns': self.concerns,
+            'recommendation': recommendation
+        }
+
+
+def request_structured(prompt, schema, parse, options=None, timeout=None, on_token=None,
+                       use_chat=False, max_attempts=STRUCTURED_MAX_ATTEMPTS):
+    """
+    Ask the model for JSON matching a schema and parse it
+    
+    Malformed output is never cached; the model is re-asked with the
+    validation error until max_attempts is used up. A malformed answer
+    has already been streamed, so on_token then receives None to tell
+    the listener to discard it.
+    
+    Args:
+        prompt: Prompt text
+        schema: JSON schema passed as Ollama's format option
+        parse: Callable turning the decoded JSON into a result object,
+            raising ValueError when it does not validate
+        options: Model options
+        timeout: Read timeout in seconds
+        on_token: Optional callback receiving the raw JSON as it streams,
+            and None when the answer streamed so far was rejected
+        use_chat: Use /api/chat instead of /api/generate
+        max_attempts: Total model calls allowed
+    
+    Returns:
+        The parsed result object
+    
+    Raises:
+        ValueError if every attempt was malformed (LLMError propagates as is)
+    """
+    complete = llm_client.chat if use_chat else llm_client.generate
+    parsed = {}
+    
+    def validate(text):
+        parsed['result'] = parse(json.loads(text))
+    
+    _count('requests')
+    attempt_prompt = prompt
+    
+    for attempt in range(max_attempts):
+        if attempt:
+            _count('retries')
+        try:
+            text = complete(attempt_prompt, options, timeout=timeout, on_token=on_token,
+                            format=schema, validate=validate)
+            # Cache hits skip validate(), so parse here when needed
+            return parsed.pop('result', None) or parse(json.loads(text))
+        except ValueError as e:
+            _count('malformed')
+            print(f"Malformed model output (attempt {attempt + 1}/{max_attempts}): {e}")
+            if on_token:
+                on_token(None)
+            attempt_prompt = f"""{prompt}
+
+Your previous answer was rejected: {e}
+Answer again with ONLY valid JSON that matches the required schema."""
+    
+    _count('failures')
+    raise ValueError(f"Model output was malformed after {max_attempts} attempts")
+
+
+def get_structured_output_stats():
+    """Return request, malformed-output, retry and failure counters"""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def validate_schema(value, schema, path='response'):
+    """Minimal JSON schema check covering the keywords used by this app, raising ValueError"""
+    expected = schema['type']
+    
+    if expected == 'object':
+        if not isinstance(value, dict):
+            raise ValueError(f"{path} must be an object")
+        for key in schema.get('required', []):
+            if key not in value:
+                raise ValueError(f"{path}.{key} is missing")
+        for key, sub_schema in schema.get('properties', {}).items():
+            if key in value:
+                validate_schema(value[key], sub_schema, f"{path}.{key}")
+    elif expected == 'array':
+        if not isinstance(value, list):
+            raise ValueError(f"{path} must be an array")
+        for idx, item in enumerate(value):
+            validate_schema(item, schema['items'], f"{path}[{idx}]")
+    elif expected == 'integer':
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"{path} must be an integer")
+        if not schema.get('minimum', value) <= value <= schema.get('maximum', value):
+            raise ValueError(f"{path} is out of range")
+    elif expected == 'boolean':
+        if not isinstance(value, bool):
+            raise ValueError(f"{path} must be a boolean")
+    elif expected == 'string':
+        if not isinstance(value, str):
+            raise ValueError(f"{path} must be a string")
+        if 'enum' in schema and value not in schema['enum']:
+            raise ValueError(f"{path} must be one of {schema['enum']}")
@@ -93,24 +93,17 @@ async function submitData() {
         formData.append("resume", resumeFile);
         formData.append("job_desc", jobDesc);
 
-        let response = await fetch("http://127.0.0.1:5000/upload", {
+        let response = await fetch("http://127.0.0.1:5000/upload/stream", {
             method: "POST",
             body: formData
         });
 
-        clearTimeout(timeoutWarning);
-
         if (!response.ok) {
+            clearTimeout(timeoutWarning);
             throw new Error(`Server error: ${response.status} ${response.statusText}`);
         }
 
-        let data = await response.json();
-        
-        if (data.error) {
-            throw new Error(data.error);
-        }
-        
-        displayResults(data);
+        await readAnalysisStream(response, () => clearTimeout(timeoutWarning));
         
     } catch (error) {
         clearTimeout(timeoutWarning);
@@ -127,28 +120,110 @@ async function submitData() {
     }
 }
 
-function displayResults(data) {
-    // Overview Tab - Summary
-    const summaryOutput = document.getElementById("summary-output");
-    summaryOutput.innerHTML = formatAnalysis(data.analysis);
+// Read server-sent events from /upload/stream, rendering each section as it arrives
+async function readAnalysisStream(response, onFirstEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const data = {};
+    const streamed = {};
+    let buffer = '';
+    let shown = false;
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop();
+        
+        for (const frame of frames) {
+            const eventLine = frame.match(/^event: (.+)$/m);
+            const dataLine = frame.match(/^data: (.+)$/m);
+            if (!eventLine || !dataLine) continue;
+            
+            const event = eventLine[1];
+            const payload = JSON.parse(dataLine[1]);
+            
+            if (!shown) {
+                onFirstEvent();
+                ["summary-output", "stats-output", "analysis-output", "bias-output",
+                 "culture-output", "salary-output", "questions-output"].forEach(id => {
+                    document.getElementById(id).innerHTML = '<p class="info-text">Generating...</p>';
+                });
+                document.getElementById("results").classList.remove("hidden");
+                shown = true;
+            }
+            
+            if (event === 'token') {
+                streamed[payload.section] = (streamed[payload.section] || '') + payload.token;
+                if (!(payload.section in data)) {
+                    displayStreamingSection(payload.section, streamed[payload.section]);
+                }
+            } else if (event === 'reset') {
+                // The model's answer was rejected and is being regenerated
+                streamed[payload.section] = '';
+                if (!(payload.section in data)) {
+                    displayStreamingSection(payload.section, '');
+                }
+            } else if (event === 'section') {
+                data[payload.section] = payload.data;
+                displayResults(data, false);
+            } else if (event === 'done') {
+                data.timings = payload.timings;
+                displayResults(data, true);
+                return;
+            } else if (event === 'error') {
+                throw new Error(payload.error);
+            }
+        }
+    }
+    
+    // The server always ends with 'done' or 'error'; anything else means the connection was cut
+    throw new Error('The analysis stream ended before the analysis finished');
+}
+
+// Show raw model output for a section that is still being generated
+function displayStreamingSection(section, text) {
+    const outputs = {
+        analysis: ["analysis-output", "summary-output"],
+        bias_report: ["bias-output"],
+        culture_fit: ["culture-output"],
+        interview_questions: ["questions-output"]
+    };
+    
+    (outputs[section] || []).forEach(id => {
+        document.getElementById(id).innerHTML = formatText(text);
+    });
+}
+
+function displayResults(data, scroll = true) {
+    // Sections still streaming are left as they are
+    if (data.analysis !== undefined) {
+        // Overview Tab - Summary
+        const summaryOutput = document.getElementById("summary-output");
+        summaryOutput.innerHTML = formatAnalysis(data.analysis);
+        
+        // Skills Tab
+        const analysisOutput = document.getElementById("analysis-output");
+        analysisOutput.innerHTML = formatAnalysis(data.analysis);
+    }
     
     // Overview Tab - Stats
     const statsOutput = document.getElementById("stats-output");
     statsOutput.innerHTML = generateStatsHTML(data);
     
-    // Skills Tab
-    const analysisOutput = document.getElementById("analysis-output");
-    analysisOutput.innerHTML = formatAnalysis(data.analysis);
-    
     // Bias Tab
-    const biasOutput = document.getElementById("bias-output");
-    biasOutput.innerHTML = formatBiasReport(data.bias_report);
+    if (data.bias_report !== undefined) {
+        const biasOutput = document.getElementById("bias-output");
+        biasOutput.innerHTML = formatBiasReport(data.bias_report);
+    }
     
     // Culture Fit Tab
     const cultureOutput = document.getElementById("culture-output");
     if (data.culture_fit) {
         cultureOutput.innerHTML = formatCultureFit(data.culture_fit);
-    } else {
+    } else if (scroll) {
         cultureOutput.innerHTML = '<p class="info-text">Culture fit data not available</p>';
     }
     
@@ -156,7 +231,7 @@ function displayResults(data) {
     const salaryOutput = document.getElementById("salary-output");
     if (data.salary_benchmark) {
         salaryOutput.innerHTML = formatSalaryBenchmark(data.salary_benchmark);
-    } else {
+    } else if (scroll) {
         salaryOutput.innerHTML = '<p class="info-text">Salary benchmark data not available</p>';
     }
     
@@ -164,7 +239,7 @@ function displayResults(data) {
     const questionsOutput = document.getElementById("questions-output");
     if (data.interview_questions) {
         questionsOutput.innerHTML = formatInterviewQuestions(data.interview_questions);
-    } else {
+    } else if (scroll) {
         questionsOutput.innerHTML = '<p class="info-text">Interview questions not available</p>';
     }
     
@@ -172,7 +247,9 @@ function displayResults(data) {
     document.getElementById("results").classList.remove("hidden");
     
     // Smooth scroll to results
-    document.getElementById("results").scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+    if (scroll) {
+        document.getElementById("results").scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+    }
 }
 
 function generateStatsHTML(data) {
@@ -338,7 +415,8 @@ async function submitBatchData() {
         }
         formData.append("job_desc", jobDesc);
         
-        let response = await fetch("http://127.0.0.1:5000/batch", {
+        // Submit as a background job, then poll for progress
+        let response = await fetch("http://127.0.0.1:5000/batch/jobs", {
             method: "POST",
             body: formData
         });
@@ -347,7 +425,8 @@ async function submitBatchData() {
             throw new Error(`Server error: ${response.status}`);
         }
         
-        let data = await response.json();
+        let job = await response.json();
+        let data = await pollBatchJob(job.job_id, loading);
         displayBatchResults(data);
         
     } catch (error) {
@@ -358,6 +437,30 @@ async function submitBatchData() {
     }
 }
 
+async function pollBatchJob(jobId, loading) {
+    while (true) {
+        let response = await fetch(`http://127.0.0.1:5000/batch/${jobId}/status`);
+        
+        if (!response.ok) {
+            throw new Error(`Server error: ${response.status}`);
+        }
+        
+        let data = await response.json();
+        
+        if (data.status === 'completed') {
+            return data;
+        }
+        if (data.status === 'failed') {
+            throw new Error(data.error || 'Batch job failed');
+        }
+        
+        const done = data.completed + data.failed;
+        loading.innerHTML = `<span class="spinner"></span> Processed ${done} of ${data.total} resume(s)...`;
+        
+        await new Promise(resolve => setTimeout(resolve, 2000));
+    }
+}
+
 function displayBatchResults(data) {
     // Summary
     const summary = document.getElementById("batch-summary");